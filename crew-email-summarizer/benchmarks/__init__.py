@@ -0,0 +1,17 @@
+"""
+Benchmarks package for CrewAI email summarizer.
+
+Run individual benchmarks from the project directory, e.g.:
+    python -m benchmarks.bench_process_many
+"""
+
+import os
+
+# Benchmarks run fully offline
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+# Measure the pipeline itself rather than the provider's rate limits
+os.environ.setdefault("EMAIL_RATE_LIMIT_RPM", "0")
+os.environ.setdefault("EMAIL_RATE_LIMIT_TPM", "0")
+os.environ.setdefault("EMAIL_USER_TOKEN_BUDGET", "0")
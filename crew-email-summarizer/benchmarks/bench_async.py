@@ -0,0 +1,64 @@
+"""
+Sync vs Async Pipeline Benchmark
+Compares the thread-based sync pipeline with the asyncio pipeline
+(process_email_async) under load against the fake LLM backend.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_llm import FakeLLM, patched_tools
+from main import EmailSummarizerCrew
+
+
+REQUEST_COUNT = 400
+LLM_LATENCY = 0.1
+IN_FLIGHT_LEVELS = [16, 64, 200]
+
+
+def _run_sync(crew, emails, in_flight):
+    """Summarize-then-review each email on a pool of in_flight blocked threads."""
+    def pipeline(email_content):
+        summary = crew.summarizer.tool._run(email_content)
+        return crew.reviewer.tool._run(email_content, summary)
+    
+    with ThreadPoolExecutor(max_workers=in_flight) as executor:
+        list(executor.map(pipeline, emails))
+        return threading.active_count()
+
+
+async def _run_async(crew, emails, in_flight):
+    """Run process_email_async with at most in_flight emails pending on one event loop."""
+    semaphore = asyncio.Semaphore(in_flight)
+    
+    async def pipeline(email_content):
+        async with semaphore:
+            return await crew.process_email_async(email_content)
+    
+    results = await asyncio.gather(*(pipeline(e) for e in emails))
+    assert all(r["status"] == "success" for r in results)
+    return threading.active_count()
+
+
+def main():
+    emails = [f"Subject: Ticket {i}\n\nPlease triage ticket {i} before the standup." for i in range(REQUEST_COUNT)]
+    crew = EmailSummarizerCrew()
+    
+    print(f"{'path':>6} {'in-flight':>10} {'seconds':>9} {'emails/s':>9} {'threads':>8}")
+    with patched_tools(FakeLLM(latency=LLM_LATENCY)):
+        for in_flight in IN_FLIGHT_LEVELS:
+            start = time.perf_counter()
+            threads = _run_sync(crew, emails, in_flight)
+            elapsed = time.perf_counter() - start
+            print(f"{'sync':>6} {in_flight:>10} {elapsed:>9.3f} {REQUEST_COUNT / elapsed:>9.1f} {threads:>8}")
+            
+            start = time.perf_counter()
+            threads = asyncio.run(_run_async(crew, emails, in_flight))
+            elapsed = time.perf_counter() - start
+            print(f"{'async':>6} {in_flight:>10} {elapsed:>9.3f} {REQUEST_COUNT / elapsed:>9.1f} {threads:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Token Budget Benchmark
+Compares fixed and adaptive max_tokens by email size (tokens reserved per
+email and the emails per minute a tokens-per-minute cap then admits), shows
+a user's token budget and the email size limit refusing work before any
+call reaches the fake LLM backend, and times token counting with and
+without its cache.
+"""
+
+import time
+
+from benchmarks.corpus import generate_email
+from benchmarks.fake_llm import FakeLLM, patched_tools
+from main import EmailSummarizerCrew
+from utils.budget import get_token_budget
+from utils.llm_client import get_llm_client
+from utils.tokens import count_tokens, get_tokenizer
+
+
+EMAIL_WORDS = (40, 120, 300, 800, 2000)
+# A provider tokens-per-minute cap; the rate limiter reserves prompt plus max_tokens per call
+TPM_CAP = 100_000
+USER_EMAILS = 12
+COUNT_ROUNDS = 200
+
+
+def _estimates(crew, emails, adaptive):
+    llm = get_llm_client()
+    previous = llm.adaptive_max_tokens
+    llm.adaptive_max_tokens = adaptive
+    try:
+        return [crew.estimate(email) for email in emails]
+    finally:
+        llm.adaptive_max_tokens = previous
+
+
+def _max_tokens_table(crew):
+    emails = [generate_email(words=words, seed=words) for words in EMAIL_WORDS]
+    fixed = _estimates(crew, emails, adaptive=False)
+    adaptive = _estimates(crew, emails, adaptive=True)
+    print(f"{'email words':>11} {'calls':>6} {'prompt tok':>10} {'fixed max':>10} {'adaptive max':>12} "
+          f"{'fixed em/min':>12} {'adaptive em/min':>15} {'worst cost $':>12}")
+    for words, fixed_estimate, adaptive_estimate in zip(EMAIL_WORDS, fixed, adaptive):
+        print(f"{words:>11} {adaptive_estimate['calls']:>6} {adaptive_estimate['prompt_tokens']:>10} "
+              f"{fixed_estimate['max_completion_tokens']:>10} {adaptive_estimate['max_completion_tokens']:>12} "
+              f"{TPM_CAP / fixed_estimate['total_tokens']:>12.1f} {TPM_CAP / adaptive_estimate['total_tokens']:>15.1f} "
+              f"{adaptive_estimate['cost_usd']:>12.5f}")
+
+
+def _user_budget(crew):
+    budget = get_token_budget()
+    emails = [generate_email(words=120, seed=100 + i) for i in range(USER_EMAILS)]
+    per_email = crew.estimate(emails[0])["total_tokens"]
+    previous = budget.user_tokens
+    # Room for about a third of the emails
+    budget.user_tokens = per_email * USER_EMAILS // 3
+    fake = FakeLLM(latency=0.01)
+    try:
+        with patched_tools(fake), budget.user(f"bench-{time.time_ns()}") as user:
+            statuses = [crew.process_email(email).get("rejected", "processed") for email in emails]
+            used = budget.used(user)
+    finally:
+        budget.user_tokens = previous
+    processed = statuses.count("processed")
+    print(f"\nuser budget of {per_email * USER_EMAILS // 3} tokens, {USER_EMAILS} emails of ~{per_email} estimated tokens: "
+          f"{processed} processed, {statuses.count('user')} rejected, {fake.calls} LLM calls "
+          f"({fake.calls / max(processed, 1):.1f} per processed email), {used} tokens charged")
+
+
+def _oversized_email(crew):
+    email = generate_email(words=30000, seed=7)
+    fake = FakeLLM(latency=0.01)
+    with patched_tools(fake):
+        start = time.perf_counter()
+        result = crew.process_email(email)
+        elapsed = time.perf_counter() - start
+    print(f"email of {count_tokens(email)} tokens over the {get_token_budget().max_email_tokens}-token limit: "
+          f"rejected={result.get('rejected')}, {fake.calls} LLM calls, refused in {elapsed * 1000:.1f} ms")
+
+
+def _count_cache():
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        print("count_tokens: tokenizer unavailable, so counts are estimated and not cached")
+        return
+    emails = [generate_email(words=800, seed=200 + i) for i in range(10)]
+    
+    def uncached(text):
+        return len(tokenizer.encode(text, add_special_tokens=False).ids)
+    
+    start = time.perf_counter()
+    for _ in range(COUNT_ROUNDS):
+        for email in emails:
+            uncached(email)
+    uncached_s = time.perf_counter() - start
+    for email in emails:
+        count_tokens(email)
+    start = time.perf_counter()
+    for _ in range(COUNT_ROUNDS):
+        for email in emails:
+            count_tokens(email)
+    cached_s = time.perf_counter() - start
+    calls = COUNT_ROUNDS * len(emails)
+    print(f"count_tokens on an 800-word email: {uncached_s / calls * 1e6:.1f} us uncached, "
+          f"{cached_s / calls * 1e6:.2f} us cached")
+
+
+def main():
+    crew = EmailSummarizerCrew(mode="fast")
+    _max_tokens_table(crew)
+    _user_budget(crew)
+    _oversized_email(crew)
+    _count_cache()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compaction Benchmark
+Measures how much of a realistic corporate corpus (quoted threads,
+signatures, legal footers, tracking links, HTML) compaction removes, what it
+costs locally, and the end-to-end token and latency savings of process_email
+against a fake LLM whose latency grows with prompt size.
+"""
+
+import contextlib
+import io
+import os
+import statistics
+import time
+from collections import Counter
+
+from benchmarks.corpus import generate_thread_email
+from benchmarks.fake_llm import FakeLLM, patched_tools
+from main import EmailSummarizerCrew
+from utils.compaction import compact_email
+
+
+EMAILS = 60
+PER_PROMPT_TOKEN_LATENCY = 0.0002
+
+
+def _corpus():
+    return [
+        generate_thread_email(words=80 + 40 * (i % 6), seed=i, history=2 + i % 4, as_html=i % 3 == 0)
+        for i in range(EMAILS)
+    ]
+
+
+def _pipeline(emails, compaction):
+    os.environ["EMAIL_COMPACTION"] = "1" if compaction else "0"
+    crew = EmailSummarizerCrew(mode="fast")
+    fake = FakeLLM(latency=0.02, per_prompt_token_latency=PER_PROMPT_TOKEN_LATENCY)
+    latencies = []
+    with patched_tools(fake), contextlib.redirect_stdout(io.StringIO()):
+        for email_content in emails:
+            start = time.perf_counter()
+            crew.process_email(email_content)
+            latencies.append(time.perf_counter() - start)
+    return fake.prompt_tokens / len(emails), statistics.mean(latencies)
+
+
+def main():
+    emails = _corpus()
+    
+    start = time.perf_counter()
+    results = [compact_email(e) for e in emails]
+    per_email_ms = (time.perf_counter() - start) / len(emails) * 1000
+    
+    original_bytes = sum(r.original_bytes for r in results)
+    compacted_bytes = sum(r.compacted_bytes for r in results)
+    original_tokens = sum(r.original_tokens for r in results)
+    compacted_tokens = sum(r.compacted_tokens for r in results)
+    by_rule = Counter()
+    for r in results:
+        by_rule.update(r.removed_bytes)
+    
+    print(f"Corpus: {len(emails)} emails, {original_bytes / len(emails):.0f} bytes and {original_tokens / len(emails):.0f} tokens on average")
+    print(f"Compacted: {compacted_bytes / len(emails):.0f} bytes and {compacted_tokens / len(emails):.0f} tokens "
+          f"({1 - compacted_tokens / original_tokens:.0%} fewer tokens), {per_email_ms:.2f} ms per email")
+    print("Bytes removed by rule: " + ", ".join(f"{rule} {count / original_bytes:.0%}" for rule, count in by_rule.most_common()))
+    
+    previous = os.environ.get("EMAIL_COMPACTION")
+    try:
+        print(f"\n{'pipeline':>12} {'prompt words/email':>19} {'mean s':>8}")
+        for label, compaction in (("raw", False), ("compacted", True)):
+            words, latency = _pipeline(emails, compaction)
+            print(f"{label:>12} {words:>19.0f} {latency:>8.3f}")
+    finally:
+        if previous is None:
+            os.environ.pop("EMAIL_COMPACTION", None)
+        else:
+            os.environ["EMAIL_COMPACTION"] = previous
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Pre-extraction Benchmark
+Measures the local hint extractor on a dated synthetic corpus: its cost per
+email, how many dates it resolves and how many action items it assigns an
+owner and due date, and what the hinted summary prompt costs against the
+plain one in prompt tokens and in the completion budget (max_tokens).
+"""
+
+import statistics
+import time
+
+import litellm
+
+from benchmarks.corpus import generate_email
+from tools.summarizer_tool import SUMMARY_HINTED_PROMPT_TEMPLATE, SUMMARY_PROMPT_TEMPLATE
+from utils.hints import extract_hints
+from utils.llm_client import TASK_SETTINGS
+from utils.tokens import count_tokens
+
+
+EMAILS = 40
+SENT = "Date: Mon, 07 Oct 2024 09:30:00 +0000"
+# Output tokens cost several times input tokens; priced with a mapped Gemini model
+PRICED_MODEL = "gemini/gemini-2.5-flash"
+
+
+def _corpus():
+    # A Date header after the subject line anchors "Friday" and "next week"
+    emails = []
+    for i in range(EMAILS):
+        subject, body = generate_email(words=80 + 60 * (i % 5), seed=i).split("\n", 1)
+        emails.append(f"{subject}\n{SENT}\n{body}")
+    return emails
+
+
+def main():
+    emails = _corpus()
+    
+    timings, hints = [], []
+    for email_content in emails:
+        extract_hints.cache_clear()
+        start = time.perf_counter()
+        hints.append(extract_hints(email_content))
+        timings.append(time.perf_counter() - start)
+    
+    dates = [mention for h in hints for mention in h.dates]
+    actions = [item for h in hints for item in h.action_items]
+    print(f"Corpus: {len(emails)} emails; extraction {statistics.mean(timings) * 1000:.2f} ms mean, "
+          f"{max(timings) * 1000:.2f} ms max per email")
+    print(f"Dates: {len(dates) / len(emails):.1f} per email, {sum(m.date is not None for m in dates) / len(dates):.0%} resolved, "
+          f"{sum(m.deadline for m in dates) / len(dates):.0%} deadlines")
+    print(f"Action items: {len(actions) / len(emails):.1f} per email, {sum(a.owner is not None for a in actions) / len(actions):.0%} with an owner, "
+          f"{sum(a.due is not None for a in actions) / len(actions):.0%} with a resolved due date")
+    
+    plain = statistics.mean(count_tokens(SUMMARY_PROMPT_TEMPLATE.format(email_content=e)) for e in emails)
+    hinted = statistics.mean(
+        count_tokens(SUMMARY_HINTED_PROMPT_TEMPLATE.format(email_content=e, hints=h.to_prompt()))
+        for e, h in zip(emails, hints)
+    )
+    print(f"\n{'prompt':>8} {'prompt tokens':>14} {'max_tokens':>11} {'worst-case tokens':>18} {'worst-case cost $':>18}")
+    for label, prompt_tokens, task in (("plain", plain, "summary"), ("hinted", hinted, "summary_hinted")):
+        cap = TASK_SETTINGS[task][1]
+        cost = sum(litellm.cost_per_token(model=PRICED_MODEL, prompt_tokens=int(prompt_tokens), completion_tokens=cap))
+        print(f"{label:>8} {prompt_tokens:>14.0f} {cap:>11} {prompt_tokens + cap:>18.0f} {cost:>18.5f}")
+    print("\nExample hint block:\n" + hints[0].to_prompt())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+History Store Benchmark
+Compares the session memory of the old in-memory history list with the
+SQLite history store as the number of processed emails grows, and times the
+queries the Streamlit history view runs (count, one page, opening an entry)
+and an add once the store is full, which evicts the oldest entry.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.corpus import generate_email
+from utils.history import HistoryStore
+
+
+COUNTS = (100, 1000, 10000)
+PAGE_SIZE = 5
+
+
+def _result(i):
+    return {
+        "summary": f"MAIN TOPIC: Update {i}\nKEY POINTS:\n" + "- A key point of the email\n" * 6,
+        "review": f"QUALITY SCORE: 8/10\nSTRENGTHS:\n" + "- A strength of the summary\n" * 5,
+        "status": "error" if i % 20 == 0 else "success",
+        "fallback": False,
+        "model_tier": "strong"
+    }
+
+
+def _timed(function, repeat=50):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    emails = [generate_email(words=300, seed=i) for i in range(50)]
+    print(f"{'emails':>7} {'list MB':>8} {'store MB':>9} {'db MB':>7} {'count ms':>9} {'page ms':>8} {'open ms':>8} {'full add ms':>11}")
+    for count in COUNTS:
+        # The old session state: every result dictionary kept in a list
+        tracemalloc.start()
+        processing_history = []
+        for i in range(count):
+            processing_history.append({"timestamp": "2025-01-01 00:00:00", "email_preview": emails[i % 50][:100] + "...", "result": _result(i)})
+        list_mb = tracemalloc.get_traced_memory()[0] / 1e6
+        tracemalloc.stop()
+        del processing_history
+        
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "history.sqlite3")
+            tracemalloc.start()
+            store = HistoryStore(path=path, max_entries=count)
+            for i in range(count):
+                store.add("session", emails[i % 50] + f"\n{i}", _result(i), latency_s=1.0)
+            store_mb = tracemalloc.get_traced_memory()[0] / 1e6
+            tracemalloc.stop()
+            
+            count_ms = _timed(lambda: store.count(session_id="session", status="success"))
+            middle = count // PAGE_SIZE // 2
+            page_ms = _timed(lambda: store.page(page=middle, page_size=PAGE_SIZE, session_id="session"))
+            entry = store.latest("session")
+            open_ms = _timed(lambda: store.texts(entry.entry_id))
+            added = iter(range(count, count + 1000))
+            add_ms = _timed(lambda: store.add("session", emails[0] + f"\n{next(added)}", _result(0), latency_s=1.0))
+            db_mb = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory)) / 1e6
+            print(f"{count:>7} {list_mb:>8.2f} {store_mb:>9.2f} {db_mb:>7.1f} {count_ms:>9.3f} {page_ms:>8.3f} {open_ms:>8.3f} {add_ms:>11.3f}")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    print("\nThe list grows with every email; the store keeps only a connection in memory.")
+
+
+if __name__ == "__main__":
+    main()
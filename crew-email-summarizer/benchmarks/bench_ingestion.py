@@ -0,0 +1,51 @@
+"""
+Mailbox Ingestion Benchmark
+Measures ingestion throughput and peak memory for growing mbox files to show
+that memory use stays flat regardless of mailbox size.
+"""
+
+import os
+import tempfile
+import time
+import tracemalloc
+
+from utils.ingestion import iter_emails
+
+
+MESSAGE_COUNTS = [1000, 4000, 16000]
+BODY_PARAGRAPHS = 20
+
+
+def _write_mbox(path, count):
+    paragraph = "Please review the attached figures and confirm the budget by Friday. " * 4
+    with open(path, "w") as handle:
+        for i in range(count):
+            handle.write(f"From sender{i}@example.com Mon Oct  7 09:00:00 2024\n")
+            handle.write(f"Message-ID: <msg{i}@example.com>\n")
+            handle.write(f"From: sender{i}@example.com\nTo: team@example.com\n")
+            handle.write(f"Subject: Update {i}\nDate: Mon, 07 Oct 2024 09:00:00 +0000\n\n")
+            handle.write((paragraph + "\n\n") * BODY_PARAGRAPHS)
+            handle.write(">From the archive: quoted line\n\n")
+
+
+def main():
+    print(f"{'messages':>9} {'file MB':>8} {'seconds':>8} {'msgs/s':>8} {'peak KB':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in MESSAGE_COUNTS:
+            path = os.path.join(directory, f"bench_{count}.mbox")
+            _write_mbox(path, count)
+            
+            tracemalloc.start()
+            start = time.perf_counter()
+            parsed = sum(1 for _ in iter_emails(path))
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            
+            assert parsed == count
+            size_mb = os.path.getsize(path) / 1e6
+            print(f"{count:>9} {size_mb:>8.1f} {elapsed:>8.2f} {count / elapsed:>8.0f} {peak / 1024:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Background Job Queue Benchmark
+Measures how long the caller (the Streamlit script) is blocked per email when
+the crew runs inline versus when it is submitted to the job queue, the
+throughput of the worker pool against the fake LLM backend, how a burst
+beyond the queue depth is rejected, and what cancelling queued jobs saves.
+"""
+
+import queue
+import statistics
+import time
+
+from benchmarks.fake_llm import FakeLLM, patched_tools
+from main import EmailSummarizerCrew
+from utils.jobs import JobQueue
+
+
+LLM_LATENCY = 0.1
+EMAIL_COUNT = 64
+WORKER_LEVELS = (1, 4, 16)
+BURST = 100
+MAX_PENDING = 32
+
+
+def _process(crew, email):
+    with crew.checkout() as idle_crew:
+        return idle_crew.process_email(email)
+
+
+def main():
+    emails = [f"Subject: Ticket {i}\n\nPlease triage ticket {i} before the standup." for i in range(EMAIL_COUNT)]
+    crew = EmailSummarizerCrew(mode="fast")
+    
+    with patched_tools(FakeLLM(latency=LLM_LATENCY)) as fake:
+        # Blocking time of the caller per email (after one warm-up email)
+        _process(crew, emails[0])
+        start = time.perf_counter()
+        for email in emails[:8]:
+            _process(crew, email)
+        inline_ms = (time.perf_counter() - start) / 8 * 1000
+        
+        jobs = JobQueue(workers=4, max_pending=EMAIL_COUNT)
+        submit_times = []
+        job_ids = []
+        for email in emails:
+            start = time.perf_counter()
+            job_ids.append(jobs.submit("summarize", _process, crew, email))
+            submit_times.append((time.perf_counter() - start) * 1000)
+        for job_id in job_ids:
+            jobs.wait(job_id)
+        jobs.shutdown()
+        print(f"caller blocked per email: inline {inline_ms:.1f} ms, submit p50 {statistics.median(submit_times):.3f} ms, "
+              f"max {max(submit_times):.3f} ms")
+        
+        # Throughput and per-job timing of the worker pool
+        print(f"\n{'workers':>8} {'seconds':>8} {'emails/s':>9} {'wait p50':>9} {'wait max':>9} {'run p50':>8}")
+        for workers in WORKER_LEVELS:
+            jobs = JobQueue(workers=workers, max_pending=EMAIL_COUNT)
+            start = time.perf_counter()
+            job_ids = [jobs.submit("summarize", _process, crew, email) for email in emails]
+            finished = [jobs.wait(job_id) for job_id in job_ids]
+            elapsed = time.perf_counter() - start
+            jobs.shutdown()
+            assert all(job.status == "done" for job in finished)
+            waits = [job.wait_s for job in finished]
+            runs = [job.run_s for job in finished]
+            print(f"{workers:>8} {elapsed:>8.2f} {EMAIL_COUNT / elapsed:>9.1f} {statistics.median(waits):>9.2f} "
+                  f"{max(waits):>9.2f} {statistics.median(runs):>8.2f}")
+        
+        # A burst beyond the queue depth is rejected at once instead of piling up
+        jobs = JobQueue(workers=4, max_pending=MAX_PENDING)
+        accepted, rejected = [], 0
+        for i in range(BURST):
+            try:
+                accepted.append(jobs.submit("summarize", _process, crew, emails[i % EMAIL_COUNT]))
+            except queue.Full:
+                rejected += 1
+        
+        # Cancelling the queued jobs saves their LLM calls
+        calls_before = fake.calls
+        cancelled = sum(jobs.cancel(job_id) for job_id in accepted[8:])
+        for job_id in accepted:
+            jobs.wait(job_id)
+        jobs.shutdown()
+        print(f"\nburst of {BURST} with max_pending={MAX_PENDING}: {len(accepted)} accepted, {rejected} rejected")
+        print(f"cancelled {cancelled} of {len(accepted)} jobs; LLM calls from then on: {fake.calls - calls_before} "
+              f"(about 2 per kept job, {len(accepted) - cancelled} kept)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+LLM Client Connection Pooling Benchmark
+Sends real LiteLLM requests to a local Gemini-compatible stand-in server and
+compares per-call latency when every call opens a new connection with the
+shared LLMClient's keep-alive pool.
+
+The stand-in charges CONNECT_DELAY for every new connection to stand in for
+the TCP and TLS handshakes that a remote API costs.
+"""
+
+import contextlib
+import io
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.llm_client import LLMClient
+
+
+CONNECT_DELAY = 0.03
+RESPONSE_DELAY = 0.02
+CALLS = 48
+CONCURRENCY_LEVELS = [1, 8]
+
+GEMINI_RESPONSE = json.dumps({
+    "candidates": [{"content": {"parts": [{"text": "MAIN TOPIC: stand-in summary"}], "role": "model"}, "finishReason": "STOP"}],
+    "usageMetadata": {"promptTokenCount": 40, "candidatesTokenCount": 6, "totalTokenCount": 46}
+}).encode("utf-8")
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = 0
+    lock = threading.Lock()
+    
+    def setup(self):
+        with _StandInHandler.lock:
+            _StandInHandler.connections += 1
+        time.sleep(CONNECT_DELAY)
+        super().setup()
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(RESPONSE_DELAY)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(GEMINI_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(GEMINI_RESPONSE)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def _measure(call, concurrency):
+    latencies = []
+    
+    def timed(_):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    
+    _StandInHandler.connections = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, range(CALLS)))
+    return statistics.mean(latencies), sorted(latencies)[int(0.95 * len(latencies)) - 1], _StandInHandler.connections
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_base = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ.setdefault("GEMINI_API_KEY", "stand-in")
+    
+    pooled = LLMClient(api_base=api_base)
+    
+    def fresh_connection_call():
+        client = LLMClient(api_base=api_base)
+        client.complete("Summarize: the budget review moved to Friday.", "summary")
+        client._sync_http_client().close()
+    
+    def pooled_call():
+        pooled.complete("Summarize: the budget review moved to Friday.", "summary")
+    
+    # Warm up LiteLLM's lazy imports so they do not count against either side
+    with contextlib.redirect_stdout(io.StringIO()):
+        pooled_call()
+    
+    print(f"{'client':>16} {'conc':>5} {'mean ms':>8} {'p95 ms':>8} {'connections':>12}")
+    for concurrency in CONCURRENCY_LEVELS:
+        for label, call in (("new connection", fresh_connection_call), ("pooled", pooled_call)):
+            mean, p95, connections = _measure(call, concurrency)
+            print(f"{label:>16} {concurrency:>5} {mean * 1000:>8.1f} {p95 * 1000:>8.1f} {connections:>12}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Pipeline Mode Benchmark
+Reports LLM calls, prompt tokens and latency per email for the full CrewAI
+agent loop (mode="crew"), the direct two-call tool pipeline (mode="fast"),
+the single structured call (mode="combined") and the offline extractive
+summarizer (mode="local").
+
+The fake agent LLM takes the shortest path through the ReAct loop, so the
+crew-mode numbers are a lower bound; real models often use more iterations.
+"""
+
+import contextlib
+import io
+import statistics
+import time
+
+from benchmarks.fake_llm import FakeLLM, patched_agents, patched_tools
+from main import EmailSummarizerCrew
+
+
+EMAIL_COUNT = 10
+LLM_LATENCY = 0.2
+
+
+def _measure(crew, fake, emails):
+    latencies = []
+    calls_before, tokens_before = fake.calls, fake.prompt_tokens
+    for email_content in emails:
+        start = time.perf_counter()
+        # The crew prints verbose agent traces; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = crew.process_email(email_content)
+        latencies.append(time.perf_counter() - start)
+        assert result["status"] == "success", result
+    calls = (fake.calls - calls_before) / len(emails)
+    tokens = (fake.prompt_tokens - tokens_before) / len(emails)
+    return calls, tokens, latencies
+
+
+def main():
+    paragraph = "The vendor confirmed the revised delivery schedule and asked us to sign off on the updated statement of work. "
+    emails = [
+        f"Subject: Status {i}\n\n" + paragraph * 8 + f"\n\nPlease send the status report for project {i} by Thursday."
+        for i in range(EMAIL_COUNT)
+    ]
+    fake = FakeLLM(latency=LLM_LATENCY)
+    
+    print(f"{'mode':>9} {'LLM calls/email':>16} {'prompt words/email':>19} {'mean s':>8} {'p95 s':>8}")
+    for mode in ("crew", "fast", "combined", "local"):
+        crew = EmailSummarizerCrew(mode=mode)
+        with patched_tools(fake), patched_agents(crew, fake):
+            calls, tokens, latencies = _measure(crew, fake, emails)
+        p95 = sorted(latencies)[int(0.95 * (len(latencies) - 1))]
+        print(f"{mode:>9} {calls:>16.1f} {tokens:>19.0f} {statistics.mean(latencies):>8.3f} {p95:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
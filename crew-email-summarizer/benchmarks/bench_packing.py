@@ -0,0 +1,56 @@
+"""
+Request Packing Benchmark
+Processes a batch of short emails with process_batch against the fake LLM
+backend, with packing off (one summary request per email) and on (several
+emails per summary request), and reports effective emails per second, LLM
+calls and summary tokens per email. A run in which the fake drops some
+entries from packed responses shows the per-email fallback at work.
+"""
+
+import time
+
+from benchmarks.corpus import generate_email
+from benchmarks.fake_llm import FakeLLM, patched_tools
+from main import EmailSummarizerCrew
+from utils.metrics import get_metrics
+
+
+EMAIL_COUNT = 96
+MAX_CONCURRENCY = 8
+# A fixed overhead per request (round trip, provider queueing) plus a cost per prompt token
+LLM_LATENCY = 0.4
+PER_PROMPT_TOKEN_LATENCY = 0.0002
+SUMMARY_STAGES = ("summarize", "summarize_packed")
+
+
+def _run(label, crew, emails, packing, packed_drop_rate=0.0):
+    crew.summarizer.tool.packing = packing
+    fake = FakeLLM(latency=LLM_LATENCY, per_prompt_token_latency=PER_PROMPT_TOKEN_LATENCY, packed_drop_rate=packed_drop_rate)
+    get_metrics().reset()
+    with patched_tools(fake):
+        start = time.perf_counter()
+        results = crew.process_batch(emails, max_concurrency=MAX_CONCURRENCY)
+        elapsed = time.perf_counter() - start
+    assert all(result["status"] == "success" and not result["fallback"] for result in results)
+    
+    rows = {row["stage"]: row for row in get_metrics().snapshot()}
+    summary_rows = [rows[stage] for stage in SUMMARY_STAGES if stage in rows]
+    summary_tokens = sum(row["prompt_tokens"] + row["completion_tokens"] for row in summary_rows)
+    unpacked = rows["summarize"]["calls"] if "summarize" in rows else 0
+    print(f"{label:<22} {len(emails) / elapsed:>9.1f} {fake.calls:>9} {sum(row['calls'] for row in summary_rows):>13} "
+          f"{unpacked:>11} {summary_tokens / len(emails):>15.0f} {fake.prompt_tokens / len(emails):>14.0f}")
+
+
+def main():
+    emails = [generate_email(words=40 + 10 * (i % 6), seed=i) for i in range(EMAIL_COUNT)]
+    crew = EmailSummarizerCrew(mode="fast")
+    
+    print(f"{'run':<22} {'emails/s':>9} {'LLM calls':>9} {'summary calls':>13} {'individual':>11} "
+          f"{'summary tok/em':>15} {'prompt words/em':>14}")
+    _run("unpacked", crew, emails, packing=False)
+    _run("packed", crew, emails, packing=True)
+    _run("packed, 20% dropped", crew, emails, packing=True, packed_drop_rate=0.2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+process_many Throughput Benchmark
+Checks that EmailSummarizerCrew.process_many scales near-linearly up to its
+concurrency limit when the LLM is replaced by a fixed-latency fake.
+"""
+
+import sys
+import time
+from unittest.mock import patch
+
+from benchmarks.fake_llm import FakeLLM, patched_tools
+from main import EmailSummarizerCrew
+
+
+EMAIL_COUNT = 32
+LLM_LATENCY = 0.05
+CONCURRENCY_LEVELS = [1, 2, 4, 8, 16]
+MIN_EFFICIENCY = 0.8
+
+
+def _stub_process_email(self, email_content):
+    """Summarize-then-review through the real tools, without the agent loop."""
+    summary = self.summarizer.tool._run(email_content)
+    review = self.reviewer.tool._run(email_content, summary)
+    return {"summary": summary, "review": review, "status": "success"}
+
+
+def main():
+    emails = [f"Subject: Report {i}\n\nPlease review item {i} by Friday." for i in range(EMAIL_COUNT)]
+    crew = EmailSummarizerCrew()
+    
+    baseline = None
+    failed = False
+    print(f"{'concurrency':>12} {'seconds':>9} {'emails/s':>9} {'speedup':>8} {'efficiency':>10}")
+    
+    # Patched for this benchmark only: run_suite runs others in the same process
+    with patched_tools(FakeLLM(latency=LLM_LATENCY)), patch.object(EmailSummarizerCrew, "process_email", _stub_process_email):
+        # Warm up so one-time import and initialization costs are not timed
+        list(crew.process_many(emails[:max(CONCURRENCY_LEVELS)], max_concurrency=max(CONCURRENCY_LEVELS)))
+        
+        for concurrency in CONCURRENCY_LEVELS:
+            start = time.perf_counter()
+            results = dict(crew.process_many(emails, max_concurrency=concurrency))
+            elapsed = time.perf_counter() - start
+            
+            assert sorted(results) == list(range(EMAIL_COUNT))
+            assert all(r["status"] == "success" for r in results.values())
+            
+            throughput = EMAIL_COUNT / elapsed
+            baseline = baseline or throughput
+            speedup = throughput / baseline
+            efficiency = speedup / concurrency
+            failed = failed or efficiency < MIN_EFFICIENCY
+            print(f"{concurrency:>12} {elapsed:>9.3f} {throughput:>9.1f} {speedup:>8.2f} {efficiency:>10.2f}")
+    
+    if failed:
+        print(f"FAIL: scaling efficiency dropped below {MIN_EFFICIENCY}")
+        sys.exit(1)
+    print("OK: near-linear scaling up to the concurrency limit")
+
+
+if __name__ == "__main__":
+    main()
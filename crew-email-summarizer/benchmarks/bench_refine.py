@@ -0,0 +1,123 @@
+"""
+Refinement Benchmark
+Runs several refinement rounds on a long email and compares re-sending the
+full email, summary and review every round (a full rewrite prompt + full
+review, the approach refine_summary_rounds replaced) with its delta rounds,
+in prompt words and latency per round.
+
+The fake LLM is scripted so every review keeps listing improvements and
+every round runs.
+"""
+
+import contextlib
+import io
+import time
+
+from benchmarks.corpus import generate_email
+from benchmarks.fake_llm import FakeLLM, patched_tools
+from main import EmailSummarizerCrew
+from utils.llm_client import get_llm_client
+
+
+ROUNDS = 4
+EMAIL_WORDS = 2000
+PER_PROMPT_TOKEN_LATENCY = 0.0002
+
+SUMMARY = """MAIN TOPIC: Q4 planning and launch readiness
+KEY POINTS:
+- Departmental goals use the new template
+- Product launch moves ahead in November
+ACTION ITEMS:
+- Submit goals by October 15th
+DECISIONS NEEDED:
+- Approve the revised budget allocations
+IMPORTANT DATES:
+- October 20th board meeting
+TONE/URGENCY: Busy month, firm deadlines"""
+
+FULL_REFINE_PROMPT = """You are an expert email summarizer. Improve the summary below using the reviewer's feedback.
+
+EMAIL CONTENT:
+{email_content}
+
+INITIAL SUMMARY:
+{initial_summary}
+
+REVIEWER FEEDBACK:
+{feedback}
+
+Rewrite the summary so that it addresses every feedback point, keeping these sections:
+1. MAIN TOPIC: (one line)
+2. KEY POINTS: (bullet points)
+3. ACTION ITEMS: (if any, with deadlines)
+4. DECISIONS NEEDED: (if any)
+5. IMPORTANT DATES: (if any)
+6. TONE/URGENCY: (brief assessment)
+
+Keep the summary concise but comprehensive."""
+
+REVIEW = """QUALITY SCORE: 6
+IMPROVEMENTS:
+- Name the owner of each action item
+- Add the deadline for the testing phase
+SUGGESTED REVISIONS:
+- Mention the budget review in the key points"""
+
+
+class ScriptedLLM(FakeLLM):
+    """FakeLLM whose replies follow the summary and review formats."""
+    
+    def _response(self, model, messages, response_format=None):
+        response = super()._response(model, messages, response_format)
+        prompt = messages[-1]["content"]
+        filler = " ".join(["detail"] * (self.completion_tokens // 4))
+        if "SECTIONS TO REVISE:" in prompt:
+            # Revised sections keep their size, like a real rewrite would
+            content = prompt.split("SECTIONS TO REVISE:\n", 1)[1].split("\n\nREVIEWER POINTS:", 1)[0]
+        elif "SUMMARY TO REVIEW:" in prompt or "REVISED SECTIONS:" in prompt:
+            content = REVIEW
+        else:
+            content = f"{SUMMARY} {filler}"
+        response.choices[0].message.content = content
+        return response
+
+
+def _full_refine(email_content, summary, review):
+    """Rewrite the whole summary from the full email, summary and review."""
+    prompt = FULL_REFINE_PROMPT.format(email_content=email_content, initial_summary=summary, feedback=review)
+    return get_llm_client().complete(prompt, "summary")
+
+
+def _full_rounds(crew, email_content, fake):
+    """Previous behaviour: every round re-sends the email, summary and whole review."""
+    rows = []
+    summary, review = SUMMARY, REVIEW
+    for _ in range(ROUNDS):
+        words = fake.prompt_tokens
+        start = time.perf_counter()
+        summary = _full_refine(email_content, summary, review)
+        review = crew.reviewer.tool._run(email_content, summary)
+        rows.append((fake.prompt_tokens - words, time.perf_counter() - start))
+    return rows
+
+
+def main():
+    email_content = generate_email(EMAIL_WORDS, seed=7)
+    crew = EmailSummarizerCrew(mode="fast")
+    fake = ScriptedLLM(latency=0.02, per_prompt_token_latency=PER_PROMPT_TOKEN_LATENCY)
+    with patched_tools(fake), contextlib.redirect_stdout(io.StringIO()):
+        # Warm up one-time imports and the tokenizer
+        _full_refine(email_content, SUMMARY, REVIEW)
+        full = _full_rounds(crew, crew._compact(email_content)[0], fake)
+        delta = crew.refine_summary_rounds(email_content, SUMMARY, REVIEW, max_rounds=ROUNDS)["rounds"]
+    
+    print(f"{'round':>5} {'full words':>11} {'full s':>7} {'delta words':>12} {'delta s':>8} {'sections':<30}")
+    for (full_words, full_s), row in zip(full, delta):
+        print(f"{row['round']:>5} {full_words:>11} {full_s:>7.3f} {row['prompt_tokens']:>12} {row['latency_s']:>8.3f} "
+              f"{', '.join(row['sections']):<30}")
+    print(f"{'total':>5} {sum(w for w, _ in full):>11} {sum(s for _, s in full):>7.2f} "
+          f"{sum(r['prompt_tokens'] for r in delta):>12} {sum(r['latency_s'] for r in delta):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Retry Benchmark
+Injects 429 errors into a share of fake LLM calls and compares how many
+process_email results end up with fallback text with and without retries.
+"""
+
+import contextlib
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fake_llm import FakeLLM, patched_tools
+from main import EmailSummarizerCrew
+from utils import rate_limit
+
+
+FAILURE_RATES = [0.1, 0.3, 0.5]
+EMAILS = 64
+CONCURRENCY = 8
+
+
+def _run(failure_rate, max_retries):
+    # Short delays keep the benchmark quick; the backoff shape is unchanged
+    rate_limit._default_policy = rate_limit.RetryPolicy(max_retries=max_retries, base_delay=0.01, max_delay=0.1)
+    fake = FakeLLM(latency=0.01, failure_rate=failure_rate, seed=7)
+    crew = EmailSummarizerCrew(mode="fast")
+    emails = generate_corpus(EMAILS, "small", seed=3)
+    
+    start = time.perf_counter()
+    with patched_tools(fake), contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+            results = list(executor.map(crew.process_email, emails))
+    elapsed = time.perf_counter() - start
+    
+    fallbacks = sum(1 for r in results if r["fallback"])
+    return fallbacks, fake.failures, elapsed
+
+
+def main():
+    print(f"{'429 rate':>8} {'retries':>8} {'fallback results':>17} {'429s seen':>10} {'seconds':>8}")
+    for failure_rate in FAILURE_RATES:
+        for max_retries in (0, 3):
+            fallbacks, failures, elapsed = _run(failure_rate, max_retries)
+            print(f"{failure_rate:>8.0%} {max_retries:>8} {fallbacks:>10}/{EMAILS:<6} {failures:>10} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Model Routing Benchmark
+Runs a mixed corpus (mostly short emails, some medium and long ones) through
+process_email against a local stand-in with a fast, cheap model and a slower,
+stronger one, and compares sending everything to the strong model with
+size/complexity routing, with and without escalation on low review scores.
+Reports latency, estimated cost and the tier mix of each policy.
+
+The stand-in's fast model reviews harder emails with a low score, so
+escalation has something to catch.
+"""
+
+import contextlib
+import io
+import statistics
+import time
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fake_llm import FakeLLM, patched_tools
+from main import EmailSummarizerCrew
+from utils.llm_client import get_llm_client
+from utils.routing import FAST, STRONG, ModelRouter
+
+
+FAST_MODEL = "gemini/gemini-2.5-flash-lite"
+STRONG_MODEL = "gemini/gemini-2.5-pro"
+
+# Seconds per call and per prompt word for each stand-in model
+PROFILES = {
+    FAST_MODEL: (0.01, 0.00002),
+    STRONG_MODEL: (0.04, 0.0001)
+}
+# The fast model's reviews score emails this complex below the escalation threshold
+HARD_COMPLEXITY = 4
+
+CORPUS = [("small", 36), ("medium", 9), ("large", 3)]
+
+
+class TieredLLM(FakeLLM):
+    """FakeLLM whose latency depends on the model, and whose reviews carry a quality score."""
+    
+    def __call__(self, model, messages, **kwargs):
+        self.latency, self.per_prompt_token_latency = PROFILES[model]
+        return super().__call__(model, messages, **kwargs)
+    
+    def _response(self, model, messages, response_format=None):
+        response = super()._response(model, messages, response_format)
+        prompt = messages[-1]["content"]
+        if "SUMMARY TO REVIEW:" in prompt:
+            hard = ModelRouter.complexity(prompt.split("SUMMARY TO REVIEW:", 1)[0]) >= HARD_COMPLEXITY
+            score = 4 if model == FAST_MODEL and hard else 8
+            response.choices[0].message.content = f"QUALITY SCORE: {score}/10\n{response.choices[0].message.content}"
+        return response
+
+
+def _run(emails, router):
+    client = get_llm_client()
+    original = client.router
+    client.router = router
+    crew = EmailSummarizerCrew(mode="fast")
+    latencies = []
+    try:
+        with patched_tools(TieredLLM(completion_tokens=120)), contextlib.redirect_stdout(io.StringIO()):
+            for email_content in emails:
+                start = time.perf_counter()
+                crew.process_email(email_content)
+                latencies.append(time.perf_counter() - start)
+    finally:
+        client.router = original
+    return latencies, router.snapshot()
+
+
+def main():
+    emails = [email for size, count in CORPUS for email in generate_corpus(count, size, seed=3)]
+    policies = [
+        ("all strong", ModelRouter(STRONG_MODEL, FAST_MODEL, enabled=False)),
+        ("routed", ModelRouter(STRONG_MODEL, FAST_MODEL, escalate_below=0)),
+        ("routed+escalate", ModelRouter(STRONG_MODEL, FAST_MODEL, escalate_below=6))
+    ]
+    
+    # Warm up one-time imports and the tokenizer
+    _run(emails[:1], ModelRouter(STRONG_MODEL, FAST_MODEL))
+    
+    print(f"{len(emails)} emails: " + ", ".join(f"{count} {size}" for size, count in CORPUS))
+    print(f"{'policy':>16} {'mean s':>7} {'p95 s':>7} {'total s':>8} {'cost $':>9} {'fast':>5} {'strong':>7} {'escalated':>10}")
+    for label, router in policies:
+        latencies, snapshot = _run(emails, router)
+        decisions = snapshot["decisions"]
+        fast = sum(count for key, count in decisions.items() if key.startswith(f"{FAST}:"))
+        strong = sum(count for key, count in decisions.items() if key.startswith(f"{STRONG}:"))
+        cost = sum(tier["cost_usd"] for tier in snapshot["tiers"].values())
+        p95 = sorted(latencies)[int(0.95 * len(latencies)) - 1]
+        print(f"{label:>16} {statistics.mean(latencies):>7.3f} {p95:>7.3f} {sum(latencies):>8.2f} {cost:>9.5f} "
+              f"{fast:>5} {strong:>7} {snapshot['escalations']:>10}")
+
+
+if __name__ == "__main__":
+    main()
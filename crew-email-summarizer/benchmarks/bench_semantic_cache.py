@@ -0,0 +1,136 @@
+"""
+Semantic Cache Benchmark
+Replays a stream of templated email (CI notifications, monitoring alerts,
+newsletters, meeting reminders) mixed with one-off emails through the
+semantic cache, and reports hit rate and precision per similarity threshold.
+A hit is correct when the reused, adapted summary is exactly what the
+summarizer produces for the new email; the local extractive summarizer is
+the summarizer here, so the check is exact and needs no LLM.
+"""
+
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from benchmarks.corpus import generate_email
+from tools.schemas import EmailSummary
+from utils.extractive import extract_summary
+from utils.semantic_cache import SemanticCache
+
+
+EMAILS = 400
+THRESHOLDS = (0.85, 0.90, 0.93, 0.95, 0.98)
+MODEL = "benchmark-model"
+REVIEW = "QUALITY SCORE: 8/10\nThe summary covers the email."
+
+_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+_TESTS = ["test_checkout_flow", "test_login_redirect", "test_invoice_totals"]
+_TOPICS = ["roadmap", "hiring", "security review"]
+
+
+def _ci(rng):
+    n, sha = rng.randint(1000, 9999), "%07x" % rng.getrandbits(28)
+    return (f"Subject: [CI] Build #{n} failed on main\n\n"
+            f"Pipeline build-{n} for commit {sha} failed at {rng.randint(0, 23)}:{rng.randint(10, 59)} on {rng.choice(_DAYS)}. "
+            f"The failing test is {rng.choice(_TESTS)} in the payments suite. "
+            f"Please fix the build before merging further changes. Logs: https://ci.example.com/builds/{n}")
+
+
+def _alert(rng):
+    host, value = rng.randint(1, 40), rng.randint(85, 99)
+    state = rng.choice(["FIRING", "RESOLVED"])
+    return (f"Subject: [{state}] CPU usage {value}% on web-{host}\n\n"
+            f"Alert HighCPU is {state.lower()} for host web-{host} in region eu-west-{rng.randint(1, 3)}. "
+            f"CPU usage has been above {value}% for {rng.randint(5, 30)} minutes. "
+            + ("Please check the host and scale out if the load persists." if state == "FIRING" else
+               "No action is needed; the alert cleared on its own."))
+
+
+def _newsletter(rng):
+    issue = rng.randint(100, 300)
+    return (f"Subject: Engineering Weekly - Issue {issue}\n\n"
+            f"This week we shipped {rng.randint(10, 60)} pull requests and closed {rng.randint(5, 40)} incidents. "
+            f"The platform team finished the database migration and the mobile team released version {rng.randint(3, 9)}.{rng.randint(0, 9)}. "
+            f"Read the full issue at https://news.example.com/issues/{issue}. "
+            f"Submit items for the next issue by {rng.choice(_DAYS)}.")
+
+
+def _reminder(rng):
+    return (f"Subject: Reminder: {rng.choice(_TOPICS)} sync on {rng.choice(_DAYS)}\n\n"
+            f"This is a reminder that the {rng.choice(_TOPICS)} sync is on {rng.choice(_DAYS)} at {rng.randint(9, 16)}:00 in room {rng.randint(100, 500)}. "
+            f"Please add agenda items to the shared document by {rng.choice(_DAYS)}. "
+            f"Dial-in: https://meet.example.com/{rng.getrandbits(32):x}")
+
+
+def _stream():
+    rng = random.Random(7)
+    templates = [_ci, _alert, _newsletter, _reminder]
+    emails = []
+    for i in range(EMAILS):
+        # A quarter of the traffic is one-off email
+        emails.append(generate_email(words=rng.randint(60, 200), seed=i) if rng.random() < 0.25 else rng.choice(templates)(rng))
+    return emails
+
+
+def _summarize(email_content):
+    return EmailSummary(**extract_summary(email_content)).to_text()
+
+
+def _replay(cache, emails):
+    hits = correct = 0
+    lookups, adds = [], []
+    for email_content in emails:
+        start = time.perf_counter()
+        hit = cache.lookup(email_content, [MODEL])
+        lookups.append(time.perf_counter() - start)
+        if hit is not None:
+            hits += 1
+            correct += hit.summary == _summarize(email_content) and hit.review == REVIEW
+            continue
+        summary = _summarize(email_content)
+        start = time.perf_counter()
+        cache.add(email_content, MODEL, summary, REVIEW)
+        adds.append(time.perf_counter() - start)
+    return hits, correct, lookups, adds
+
+
+def main():
+    emails = _stream()
+    print(f"Stream: {len(emails)} emails, about 75% from four templates with changing IDs, numbers, days and states")
+    
+    for embedder in ("hashing", "minilm"):
+        print(f"\n{embedder} embeddings")
+        print(f"{'threshold':>10} {'hit rate':>9} {'precision':>10} {'rejected':>9} {'lookup ms':>10} {'add ms':>8}")
+        for threshold in THRESHOLDS:
+            directory = tempfile.mkdtemp()
+            try:
+                cache = SemanticCache(path=directory, threshold=threshold, embedder=embedder)
+                if cache.embedder_name != embedder:
+                    print(f"{'':>10} skipped: the model is not available offline")
+                    break
+                hits, correct, lookups, adds = _replay(cache, emails)
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+            precision = correct / hits if hits else 1.0
+            print(f"{threshold:>10.2f} {hits / len(emails):>9.1%} {precision:>10.1%} {cache.stats()['rejected']:>9} "
+                  f"{statistics.mean(lookups) * 1000:>10.2f} {statistics.mean(adds) * 1000:>8.2f}")
+    
+    # The index survives restarts and stays within max_entries
+    directory = tempfile.mkdtemp()
+    try:
+        cache = SemanticCache(path=directory, max_entries=100, embedder="hashing")
+        for email_content in emails[:300]:
+            cache.add(email_content, MODEL, _summarize(email_content), REVIEW)
+        evictions = cache.stats()["evictions"]
+        del cache
+        reopened = SemanticCache(path=directory, max_entries=100, embedder="hashing")
+        print(f"\nPersistent index (max_entries=100) after 300 adds: {evictions} evicted, "
+              f"{reopened.stats()['entries']} entries after reopening")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+HTTP Service Load Test
+Starts server.py's service in-process against the fake LLM backend and
+drives POST /summarize from many keep-alive clients, reporting requests per
+second, p50/p99 latency, 429 rejections and LLM calls. Compares batching off
+and on for unique emails and for a gateway-like mix where the same message
+reaches many recipients, then overloads a small queue to show backpressure.
+"""
+
+import http.client
+import json
+import statistics
+import threading
+import time
+
+from benchmarks.fake_llm import FakeLLM, patched_tools
+from main import EmailSummarizerCrew
+from server import SummarizerServer, SummarizerService
+
+
+LLM_LATENCY = 0.1
+REQUESTS_PER_CLIENT = 8
+
+
+def _client(port, emails, latencies, statuses, lock):
+    """Send emails one after another over one keep-alive connection."""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    for email in emails:
+        body = json.dumps({"email": email})
+        start = time.perf_counter()
+        connection.request("POST", "/summarize", body=body, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        response.read()
+        elapsed = time.perf_counter() - start
+        with lock:
+            statuses.append(response.status)
+            if response.status == 200:
+                latencies.append(elapsed)
+    connection.close()
+
+
+def _load(service, clients, email_for):
+    """Run clients concurrent closed-loop clients and return (seconds, latencies, statuses)."""
+    server = SummarizerServer(("127.0.0.1", 0), service)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    
+    latencies, statuses, lock = [], [], threading.Lock()
+    threads = [
+        threading.Thread(target=_client, args=(port, [email_for(c, i) for i in range(REQUESTS_PER_CLIENT)], latencies, statuses, lock))
+        for c in range(clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    server.server_close()
+    return elapsed, latencies, statuses
+
+
+def _report(label, service, fake, clients, email_for):
+    calls_before = fake.calls
+    elapsed, latencies, statuses = _load(service, clients, email_for)
+    stats = service.batcher.stats()
+    service.close()
+    latencies.sort()
+    p99 = latencies[int(0.99 * (len(latencies) - 1))] if latencies else 0.0
+    p50 = statistics.median(latencies) if latencies else 0.0
+    print(f"{label:<24} {clients:>7} {len(statuses) / elapsed:>8.1f} {statuses.count(200) / elapsed:>7.1f} {p50:>7.3f} {p99:>7.3f} {statuses.count(429):>6} "
+          f"{stats['mean_batch_size']:>6.1f} {fake.calls - calls_before:>9}")
+
+
+def main():
+    crew = EmailSummarizerCrew(mode="fast")
+    unique = lambda c, i: f"Subject: Ticket {c}-{i}\n\nPlease triage ticket {c}-{i} before the standup."
+    # A gateway delivering 8 distinct messages to many recipients at once
+    fan_out = lambda c, i: f"Subject: Announcement {i}\n\nThe office closes early on Friday for maintenance {i}."
+    
+    with patched_tools(FakeLLM(latency=LLM_LATENCY)) as fake:
+        crew.process_email(unique(0, 0))
+        print(f"{'scenario':<24} {'clients':>7} {'req/s':>8} {'ok/s':>7} {'p50 s':>7} {'p99 s':>7} {'429s':>6} {'batch':>6} {'LLM calls':>9}")
+        for clients in (16, 64):
+            _report("unique, no batching", SummarizerService(crew, workers=64, max_batch_size=1, max_wait_s=0, max_pending=256), fake, clients, unique)
+            _report("unique, batching", SummarizerService(crew, workers=64, max_pending=256), fake, clients, unique)
+            _report("fan-out, no batching", SummarizerService(crew, workers=64, max_batch_size=1, max_wait_s=0, max_pending=256), fake, clients, fan_out)
+            _report("fan-out, batching", SummarizerService(crew, workers=64, max_pending=256), fake, clients, fan_out)
+        
+        # Overload: 128 clients against 16 workers; without a bound every request queues
+        _report("overload, unbounded", SummarizerService(crew, workers=16, max_batch_size=1, max_wait_s=0, max_pending=100000), fake, 128, unique)
+        _report("overload, max_pending=32", SummarizerService(crew, workers=16, max_batch_size=1, max_wait_s=0, max_pending=32), fake, 128, unique)
+
+
+if __name__ == "__main__":
+    main()
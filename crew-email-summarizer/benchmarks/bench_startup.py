@@ -0,0 +1,68 @@
+"""
+Cold Start Benchmark
+Measures, each in a fresh interpreter, how long the Streamlit app takes to
+import and render its first page, which heavy modules that first render
+pulls in, and what the first summarization then pays to build the crew.
+"""
+
+import os
+import subprocess
+import sys
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["crewai", "litellm", "main"]
+RUNS = 3
+
+# Each probe prints one "<seconds> <loaded heavy modules>" line
+FIRST_RENDER_PROBE = """
+import sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("streamlit_app.py", default_timeout=120).run()
+assert not app.exception, app.exception
+print(time.perf_counter() - start, ",".join(m for m in {heavy} if m in sys.modules))
+"""
+
+FIRST_CREW_PROBE = """
+import sys, time
+start = time.perf_counter()
+from main import EmailSummarizerCrew
+EmailSummarizerCrew()
+print(time.perf_counter() - start, ",".join(m for m in {heavy} if m in sys.modules))
+"""
+
+
+def _probe(code):
+    """Run a probe in a fresh interpreter and return (seconds, loaded modules), or None if it failed."""
+    completed = subprocess.run(
+        [sys.executable, "-c", code.format(heavy=HEAVY_MODULES)],
+        cwd=PROJECT_DIR, capture_output=True, text=True
+    )
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        error = completed.stderr.strip().splitlines()
+        print(f"  probe failed: {error[-1] if error else completed.returncode}")
+        return None
+    seconds, _, modules = lines[-1].partition(" ")
+    return float(seconds), modules or "-"
+
+
+def _report(label, code):
+    results = [_probe(code) for _ in range(RUNS)]
+    results = [r for r in results if r is not None]
+    if not results:
+        print(f"{label:>22} {'n/a':>9}")
+        return
+    best = min(seconds for seconds, _ in results)
+    print(f"{label:>22} {best:>9.2f} {results[-1][1]}")
+
+
+def main():
+    print(f"{'stage':>22} {'best s':>9} heavy modules loaded")
+    _report("first render", FIRST_RENDER_PROBE)
+    _report("first crew build", FIRST_CREW_PROBE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Thread Summarization Benchmark
+Grows a thread one reply at a time and compares re-summarizing the whole
+thread through process_email with updating its rolling summary through
+process_thread_message, in prompt words and latency per new reply.
+
+The whole-thread baseline runs without compaction, which would otherwise
+treat the earlier messages as quoted history and drop them.
+"""
+
+import contextlib
+import io
+import os
+import time
+
+from benchmarks.corpus import generate_email
+from benchmarks.fake_llm import FakeLLM, patched_tools
+from main import EmailSummarizerCrew
+from utils.ingestion import ParsedEmail
+
+
+MESSAGES = 12
+WORDS_PER_MESSAGE = 150
+PER_PROMPT_TOKEN_LATENCY = 0.0002
+
+
+def _thread():
+    messages = []
+    for i in range(MESSAGES):
+        ids = [f"<msg{j}@example.com>" for j in range(i)]
+        messages.append(ParsedEmail(
+            message_id=f"<msg{i}@example.com>",
+            subject="RE: Q4 planning" if i else "Q4 planning",
+            sender=f"person{i % 4}@example.com",
+            date=f"Mon, {7 + i} Oct 2024 09:00:00 +0000",
+            in_reply_to=ids[-1] if ids else "",
+            references=ids,
+            body=generate_email(WORDS_PER_MESSAGE, seed=i).split("\n\n", 1)[1]
+        ))
+    return messages
+
+
+def _measure(fake, call):
+    words = fake.prompt_tokens
+    start = time.perf_counter()
+    call()
+    return fake.prompt_tokens - words, time.perf_counter() - start
+
+
+def main():
+    # Keep thread state in memory so every run starts from an empty store
+    os.environ["EMAIL_THREAD_DB"] = ""
+    os.environ["EMAIL_COMPACTION"] = "0"
+    full_crew = EmailSummarizerCrew(mode="fast")
+    os.environ["EMAIL_COMPACTION"] = "1"
+    thread_crew = EmailSummarizerCrew(mode="fast")
+    
+    fake = FakeLLM(latency=0.02, per_prompt_token_latency=PER_PROMPT_TOKEN_LATENCY)
+    messages = _thread()
+    rows = []
+    with patched_tools(fake), contextlib.redirect_stdout(io.StringIO()):
+        # Warm up one-time imports and the tokenizer
+        full_crew.process_email(messages[0].to_text())
+        for i, message in enumerate(messages):
+            thread_text = "\n\n".join(m.to_text() for m in messages[:i + 1])
+            rows.append(
+                _measure(fake, lambda: full_crew.process_email(thread_text)) +
+                _measure(fake, lambda: thread_crew.process_thread_message(message))
+            )
+    
+    print(f"{'reply':>5} {'full words':>11} {'full s':>7} {'incr words':>11} {'incr s':>7}")
+    for i, (full_words, full_s, incr_words, incr_s) in enumerate(rows, 1):
+        print(f"{i:>5} {full_words:>11} {full_s:>7.3f} {incr_words:>11} {incr_s:>7.3f}")
+    totals = [sum(column) for column in zip(*rows)]
+    print(f"{'total':>5} {totals[0]:>11} {totals[1]:>7.2f} {totals[2]:>11} {totals[3]:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark Comparison
+Compares two run_suite result files case by case and flags regressions.
+
+Usage:
+    python -m benchmarks.compare BASELINE.json CANDIDATE.json [--threshold 0.1]
+
+Exits with status 1 if any case regressed by more than the threshold.
+"""
+
+import argparse
+import json
+import sys
+
+
+def _key(case):
+    return case["target"], case["size"], case["concurrency"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed relative slowdown (0.1 = 10%%)")
+    args = parser.parse_args()
+    
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    with open(args.candidate) as handle:
+        candidate = json.load(handle)
+    
+    baseline_cases = {_key(c): c for c in baseline["cases"]}
+    regressions = 0
+    print(f"{baseline['commit']} -> {candidate['commit']}")
+    print(f"{'target':>15} {'size':>7} {'conc':>5} {'rps':>16} {'p99 s':>16} {'change':>8}")
+    
+    for case in candidate["cases"]:
+        before = baseline_cases.get(_key(case))
+        if before is None:
+            continue
+        change = case["p99_s"] / before["p99_s"] - 1 if before["p99_s"] else 0.0
+        throughput_drop = 1 - case["throughput_rps"] / before["throughput_rps"] if before["throughput_rps"] else 0.0
+        regressed = change > args.threshold or throughput_drop > args.threshold
+        regressions += int(regressed)
+        print(f"{case['target']:>15} {case['size']:>7} {case['concurrency']:>5} "
+              f"{before['throughput_rps']:>7.1f} -> {case['throughput_rps']:<6.1f} "
+              f"{before['p99_s']:>7.3f} -> {case['p99_s']:<6.3f} {change:>+7.1%}{' !' if regressed else ''}")
+    
+    if regressions:
+        print(f"\n{regressions} case(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Fake LLM Backend
+A deterministic local stand-in for litellm.completion and litellm.acompletion
+used by the benchmarks.
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Any, Iterator, Optional, Union
+
+from crewai.llms.base_llm import BaseLLM
+
+from utils.llm_client import get_llm_client
+
+
+# Canned response for JSON-mode (response_format) requests
+STRUCTURED_RESPONSE = {
+    "summary": {
+        "main_topic": "Status update and requests",
+        "key_points": ["Project is on track", "Budget review pending"],
+        "action_items": ["Send status report (team, Thursday)"],
+        "decisions_needed": [],
+        "important_dates": ["Thursday"],
+        "tone_urgency": "Neutral, moderate urgency"
+    },
+    "review": {
+        "score": 8,
+        "strengths": ["Captures the deadline"],
+        "improvements": ["Name the owner of each action item"]
+    }
+}
+
+
+# Email blocks of a packed summary prompt
+PACKED_EMAIL_ID = re.compile(r'<email id="([^"]+)">')
+
+
+class FakeRateLimitError(Exception):
+    """Mimics the status_code of litellm.RateLimitError."""
+    
+    status_code = 429
+
+
+class FakeLLM:
+    """Callable that mimics litellm.completion with a deterministic latency and canned output."""
+    
+    def __init__(self, latency: float = 0.05, completion_tokens: int = 120, per_prompt_token_latency: float = 0.0,
+                 failure_rate: float = 0.0, packed_drop_rate: float = 0.0, seed: int = 0):
+        """
+        Args:
+            latency: Fixed seconds per call
+            completion_tokens: Number of tokens in every completion
+            per_prompt_token_latency: Extra seconds per prompt token, so that
+                longer prompts take longer like they do on a real provider
+            failure_rate: Fraction of calls that fail with a 429 error
+            packed_drop_rate: Fraction of the emails of a packed request
+                whose summary is left out of the response
+            seed: Seed for the failure sequence
+        """
+        self.latency = latency
+        self.completion_tokens = completion_tokens
+        self.per_prompt_token_latency = per_prompt_token_latency
+        self.failure_rate = failure_rate
+        self.packed_drop_rate = packed_drop_rate
+        self.calls = 0
+        self.failures = 0
+        self.prompt_tokens = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    def record_call(self, prompt: str = "") -> None:
+        """Count a call, raising FakeRateLimitError for the configured share of calls."""
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += len(prompt.split())
+            if self._random.random() < self.failure_rate:
+                self.failures += 1
+                raise FakeRateLimitError("429 Resource has been exhausted")
+    
+    def __call__(self, model: str, messages: list, stream: bool = False,
+                 response_format: Optional[Any] = None, **kwargs) -> Union[SimpleNamespace, Iterator]:
+        self.record_call(messages[-1]["content"])
+        if stream:
+            return self._stream(messages)
+        time.sleep(self._latency_for(messages))
+        return self._response(model, messages, response_format)
+    
+    async def acompletion(self, model: str, messages: list,
+                          response_format: Optional[Any] = None, **kwargs) -> SimpleNamespace:
+        """Async counterpart of __call__, sleeping on the event loop instead of the thread."""
+        self.record_call(messages[-1]["content"])
+        await asyncio.sleep(self._latency_for(messages))
+        return self._response(model, messages, response_format)
+    
+    def _latency_for(self, messages: list) -> float:
+        return self.latency + self.per_prompt_token_latency * len(messages[-1]["content"].split())
+    
+    def _stream(self, messages: list) -> Iterator[SimpleNamespace]:
+        """Yield one delta chunk per token, with the first chunk after half the latency."""
+        latency = self._latency_for(messages)
+        time.sleep(latency / 2)
+        per_token = latency / 2 / self.completion_tokens
+        for i in range(self.completion_tokens):
+            if i:
+                time.sleep(per_token)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="summary "))])
+    
+    def _response(self, model: str, messages: list, response_format: Optional[Any] = None) -> SimpleNamespace:
+        """Build a litellm-shaped response for the given prompt."""
+        prompt = messages[-1]["content"]
+        completion_tokens = self.completion_tokens
+        packed_ids = PACKED_EMAIL_ID.findall(prompt)
+        if response_format is not None and packed_ids:
+            with self._lock:
+                kept = [email_id for email_id in packed_ids if self._random.random() >= self.packed_drop_rate]
+            content = json.dumps({"summaries": [dict(STRUCTURED_RESPONSE["summary"], id=email_id) for email_id in kept]})
+            completion_tokens = self.completion_tokens * len(kept)
+        elif response_format is not None:
+            content = json.dumps(STRUCTURED_RESPONSE)
+        else:
+            content = " ".join(["summary"] * self.completion_tokens)
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(
+                prompt_tokens=len(prompt.split()),
+                completion_tokens=completion_tokens,
+                total_tokens=len(prompt.split()) + completion_tokens
+            )
+        )
+
+
+# Prompts CrewAI sends once a tool result is available or iterations run out
+FINAL_ANSWER_MARKERS = ("Observation", "Analyze the tool result", "MUST give your absolute best final answer")
+
+
+class FakeAgentLLM(BaseLLM):
+    """
+    Stand-in for the agents' LLM. It drives the shortest possible ReAct loop
+    (call the agent's tool once, then give a final answer) and counts its
+    calls on the shared FakeLLM backend.
+    """
+    
+    backend: Any = None
+    
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None, **kwargs) -> str:
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        transcript = json.dumps(messages)
+        last = str(messages[-1].get("content", ""))
+        
+        self.backend.record_call(" ".join(str(m.get("content", "")) for m in messages))
+        time.sleep(self.backend.latency)
+        
+        if any(marker in last for marker in FINAL_ANSWER_MARKERS):
+            return "Thought: I now know the final answer\nFinal Answer: " + " ".join(["summary"] * self.backend.completion_tokens)
+        if "summary_feedback_analyzer" in transcript:
+            arguments = {"original_email": "the email", "summary": "the summary"}
+            return "Thought: I should review the summary\nAction: summary_feedback_analyzer\nAction Input: " + json.dumps(arguments)
+        arguments = {"email_content": "the email"}
+        return "Thought: I should summarize the email\nAction: email_summarizer\nAction Input: " + json.dumps(arguments)
+
+
+@contextmanager
+def patched_agents(crew: Any, fake: FakeLLM) -> Iterator[FakeLLM]:
+    """Point a crew's agents at a FakeAgentLLM backed by fake for the duration of the block."""
+    agents = (crew.summarizer_agent, crew.reviewer_agent)
+    originals = [agent.llm for agent in agents]
+    agent_llm = FakeAgentLLM(model="fake/agent", backend=fake)
+    for agent in agents:
+        agent.llm = agent_llm
+    try:
+        yield fake
+    finally:
+        for agent, llm in zip(agents, originals):
+            agent.llm = llm
+
+
+@contextmanager
+def patched_tools(fake: FakeLLM, use_cache: bool = False) -> Iterator[FakeLLM]:
+    """
+    Route the tools' LLM calls to the fake backend for the duration of the block.
+    
+    The summary cache is disabled unless use_cache is set, so repeated
+    benchmark rounds measure real (fake) LLM calls.
+    """
+    client = get_llm_client()
+    originals = (client.completion, client.acompletion)
+    previous_key = os.environ.get("GEMINI_API_KEY")
+    previous_cache_flag = os.environ.get("EMAIL_CACHE_DISABLED")
+    
+    client.completion = fake
+    client.acompletion = fake.acompletion
+    os.environ["GEMINI_API_KEY"] = previous_key or "fake-key"
+    if not use_cache:
+        os.environ["EMAIL_CACHE_DISABLED"] = "1"
+    try:
+        yield fake
+    finally:
+        client.completion, client.acompletion = originals
+        if previous_key is None:
+            os.environ.pop("GEMINI_API_KEY", None)
+        if previous_cache_flag is None:
+            os.environ.pop("EMAIL_CACHE_DISABLED", None)
+        else:
+            os.environ["EMAIL_CACHE_DISABLED"] = previous_cache_flag
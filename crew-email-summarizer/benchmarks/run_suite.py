@@ -0,0 +1,162 @@
+"""
+Offline Benchmark Suite
+Measures throughput and latency of the tools, process_email, refine_summary,
+the Streamlit-facing streaming path and the local extractive summarizer
+against the fake LLM backend, across
+email sizes and concurrency levels, and writes the results as JSON so runs
+can be compared across commits with benchmarks.compare.
+
+Usage:
+    python -m benchmarks.run_suite [--quick] [--output PATH]
+
+Crew mode is not part of the matrix: its cost is dominated by the agent loop
+and is reported separately by benchmarks.bench_modes.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+from benchmarks.corpus import SIZES, corpus_stats, generate_corpus
+from benchmarks.fake_llm import FakeLLM, patched_tools
+from main import EmailSummarizerCrew
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def _targets(crew: EmailSummarizerCrew) -> Dict[str, Callable[[str], Any]]:
+    """Named callables that each process one email."""
+    def streamlit_path(email_content):
+        start = time.perf_counter()
+        first_token = None
+        summary = ""
+        for chunk in crew.stream_summary(email_content):
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            summary += chunk
+        crew.review_summary(email_content, summary)
+        return first_token
+    
+    return {
+        "tool_summarize": lambda e: crew.summarizer.tool._run(e),
+        "tool_review": lambda e: crew.reviewer.tool._run(e, "MAIN TOPIC: placeholder summary"),
+        "process_email": lambda e: crew.process_email(e),
+        "refine_summary": lambda e: crew.refine_summary(
+            e, "MAIN TOPIC: placeholder", "QUALITY SCORE: 6/10\nIMPROVEMENTS:\n- Add the deadlines"
+        ),
+        "streamlit_path": streamlit_path,
+        "summarize_local": lambda e: crew.summarize_local(e)
+    }
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))]
+
+
+def _run_case(target: Callable[[str], Any], emails: List[str], concurrency: int, fake: FakeLLM) -> Dict[str, Any]:
+    latencies: List[float] = []
+    first_tokens: List[float] = []
+    
+    def timed(email_content):
+        start = time.perf_counter()
+        value = target(email_content)
+        latencies.append(time.perf_counter() - start)
+        if isinstance(value, float):
+            first_tokens.append(value)
+    
+    calls_before, tokens_before = fake.calls, fake.prompt_tokens
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, emails))
+    wall = time.perf_counter() - start
+    
+    result = {
+        "requests": len(emails),
+        "wall_s": wall,
+        "throughput_rps": len(emails) / wall,
+        "mean_s": statistics.mean(latencies),
+        "p50_s": _percentile(latencies, 0.5),
+        "p95_s": _percentile(latencies, 0.95),
+        "p99_s": _percentile(latencies, 0.99),
+        "llm_calls_per_request": (fake.calls - calls_before) / len(emails),
+        "prompt_words_per_request": (fake.prompt_tokens - tokens_before) / len(emails)
+    }
+    if first_tokens:
+        result["time_to_first_token_p50_s"] = _percentile(first_tokens, 0.5)
+    return result
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(__file__), text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quick", action="store_true", help="small matrix for a fast smoke run")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake LLM seconds per call")
+    parser.add_argument("--completion-tokens", type=int, default=120)
+    parser.add_argument("--per-prompt-token-latency", type=float, default=0.00002)
+    parser.add_argument("--output", help="where to write the JSON results")
+    args = parser.parse_args()
+    
+    sizes = ["small", "large"] if args.quick else list(SIZES)
+    concurrency_levels = [1, 8] if args.quick else [1, 4, 16]
+    fake = FakeLLM(args.latency, args.completion_tokens, args.per_prompt_token_latency)
+    crew = EmailSummarizerCrew(mode="fast")
+    targets = _targets(crew)
+    
+    cases = []
+    with patched_tools(fake), contextlib.redirect_stdout(io.StringIO()):
+        # Warm up one-time imports and the tokenizer so the first case is not charged for them
+        crew.process_email(generate_corpus(1, "small")[0])
+    print(f"{'target':>15} {'size':>7} {'conc':>5} {'rps':>8} {'p50 s':>7} {'p99 s':>7} {'calls':>6}")
+    with patched_tools(fake), contextlib.redirect_stderr(io.StringIO()):
+        for size in sizes:
+            for concurrency in concurrency_levels:
+                emails = generate_corpus(max(8, concurrency * 2), size, seed=concurrency)
+                for name, target in targets.items():
+                    result = _run_case(target, emails, concurrency, fake)
+                    result.update({"target": name, "size": size, "concurrency": concurrency, "corpus": corpus_stats(emails)})
+                    cases.append(result)
+                    print(f"{name:>15} {size:>7} {concurrency:>5} {result['throughput_rps']:>8.1f} "
+                          f"{result['p50_s']:>7.3f} {result['p99_s']:>7.3f} {result['llm_calls_per_request']:>6.1f}")
+    
+    commit = _git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "fake_llm": {
+            "latency_s": args.latency,
+            "completion_tokens": args.completion_tokens,
+            "per_prompt_token_latency_s": args.per_prompt_token_latency
+        },
+        "cases": cases
+    }
+    
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,19 +6,61 @@ This module handles the coordination between the summarizer and reviewer agents.
 from crewai import Crew, Task, Process
 from agents.summarizer_agent import SummarizerAgent
 from agents.reviewer_agent import ReviewerAgent
+from tools.combined_tool import COMBINED_PROMPT_TEMPLATE, SummaryReviewTool
+from tools.feedback_tool import FEEDBACK_PROMPT_TEMPLATE
+from tools.schemas import SummaryReviewResult
+from utils.budget import BudgetExceeded, get_token_budget
+from utils.compaction import compact_email
+from utils.hints import extract_hints
+from utils.ingestion import ParsedEmail, iter_emails
+from utils.llm_client import get_llm_client
+from utils.metrics import CallRecord, estimate_cost, get_metrics
+from utils.refinement import actionable_points, affected_sections, apply_revision, join_sections, select_excerpts, split_sections
+from utils.routing import STRONG, TIERS
+from utils.semantic_cache import get_semantic_cache
+from utils.threads import get_thread_store
+from utils.tokens import count_tokens, get_tokenizer
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+import contextvars
 import os
-from typing import Dict, Any, Optional
+import threading
+import time
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Sequence, Tuple
 
 
-# Load environment variables
-load_dotenv()
+MODES = ("crew", "fast", "combined", "local")
+
+LOCAL_REVIEW = """QUALITY SCORE: N/A
+
+Local mode: this summary was extracted from the email without an AI model (key points ranked with TextRank, dates, deadlines and action items matched with patterns), so no AI review was run."""
 
 
 class EmailSummarizerCrew:
     """Orchestrates the email summarization and review process using CrewAI."""
     
-    def __init__(self):
+    def __init__(self, mode: str = "crew"):
+        """
+        Args:
+            mode: "crew" runs the full CrewAI agent loop; "fast" calls the
+                summarizer and reviewer tools directly in a fixed two-call
+                pipeline; "combined" summarizes and reviews in a single
+                structured-output call; "local" summarizes with the offline
+                extractive summarizer in milliseconds, without any LLM call.
+                All modes return the same result dictionary
+        
+        Emails are compacted (quoted history, signatures, disclaimers and
+        markup removed) before any prompt is built unless EMAIL_COMPACTION=0.
+        """
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        self.mode = mode
+        self.compact = os.getenv("EMAIL_COMPACTION", "1") != "0"
+        
+        # Load the tokenizer now rather than in the first budgeted call
+        get_tokenizer()
+        
         # Initialize agents
         self.summarizer = SummarizerAgent()
         self.reviewer = ReviewerAgent()
@@ -26,6 +68,13 @@ class EmailSummarizerCrew:
         # Create agent instances
         self.summarizer_agent = self.summarizer.create_agent()
         self.reviewer_agent = self.reviewer.create_agent()
+        
+        # Single-call summarize+review tool used by the combined mode
+        self.combined_tool = SummaryReviewTool()
+        
+        # Idle crews handed out by checkout() (agents are not thread-safe)
+        self._idle: List["EmailSummarizerCrew"] = []
+        self._idle_lock = threading.Lock()
     
     def process_email(self, email_content: str) -> Dict[str, Any]:
         """
@@ -35,9 +84,238 @@ class EmailSummarizerCrew:
             email_content: The email text to process
             
         Returns:
-            Dictionary containing summary and review results
+            Dictionary containing summary and review results. "fallback" is
+            True when a stage gave up after its retries and returned
+            fallback text; "fallback_stages" then names those stages.
+            "compaction" reports the bytes and tokens removed before prompting.
+            "model_tier" names the model tier that produced the result and
+            "escalated" is True when a low review score moved it to the
+            strong tier. "extracted" holds the dates, deadlines, action
+            items and reader questions found locally (utils.hints).
+            "semantic_cache" reports the similarity and the model that
+            produced it when the result of a near-identical email was
+            reused (model_tier "cache").
+            "estimate" holds the tokens and cost estimated before sending;
+            an email over the size limit or the user's token budget is
+            refused before any call, with status "error" and "rejected"
+            naming the limit ("email" or "user")
+        """
+        if self.mode == "local":
+            return self.summarize_local(email_content)
+        
+        with get_metrics().track("process_email") as call:
+            email_content, compaction = self._compact(email_content)
+            return self._process_compacted(call, email_content, compaction)
+    
+    def _process_compacted(self, call: CallRecord, email_content: str, compaction: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        The part of process_email after compaction.
+        
+        Args:
+            call: The enclosing process_email metrics record
+            email_content: The compacted email
+            compaction: Compaction statistics, if the email was compacted
+        """
+        email_content, compaction = self._fit(email_content, compaction)
+        return self._process_admitted(call, email_content, compaction, *self._admit(email_content))
+    
+    def _process_admitted(self, call: CallRecord, email_content: str, compaction: Optional[Dict[str, Any]],
+                          result: Optional[Dict[str, Any]], estimate: Optional[Dict[str, Any]],
+                          summary: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Run the pipeline for an email _admit let through, then finish the result.
+        
+        Args:
+            call: The enclosing process_email metrics record
+            email_content: The compacted email
+            compaction: Compaction statistics, if the email was compacted
+            result, estimate: What _admit returned for the email
+            summary: A summary already generated for the email (by a packed
+                request); only the review then runs, unless it escalates
+        """
+        if result is None:
+            router = get_llm_client().router
+            with router.route(email_content) as tier:
+                result = self._process_email(email_content, summary)
+            if result["status"] == "success" and router.should_escalate(tier, result["review"]):
+                with get_metrics().track("escalate"), router.escalated() as tier:
+                    result = self._process_email(email_content)
+                result["escalated"] = True
+            result["model_tier"] = tier
+        return self._finish(call, email_content, compaction, result, estimate)
+    
+    def _fit(self, email_content: str, compaction: Optional[Dict[str, Any]]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Compact an email over the size limit even with compaction off, so it is judged at its compacted size."""
+        max_email_tokens = get_token_budget().max_email_tokens
+        if compaction is not None or not max_email_tokens or count_tokens(email_content) <= max_email_tokens:
+            return email_content, compaction
+        with get_metrics().track("compact"):
+            compacted = compact_email(email_content)
+        return compacted.text, compacted.stats()
+    
+    def _admit(self, email_content: str, committed: int = 0) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Decide, before any LLM call, whether an email needs the pipeline.
+        
+        Args:
+            email_content: The compacted email
+            committed: Tokens already estimated for earlier emails of the
+                same batch, which the user's budget must also cover
+            
+        Returns:
+            (result, estimate): result is a semantic cache hit or a budget
+            rejection, or None when the pipeline should run; estimate is
+            None for a cache hit
+        """
+        result = self._semantic_result(email_content)
+        if result is not None:
+            return result, None
+        budget = get_token_budget()
+        estimate = self.estimate(email_content)
+        try:
+            budget.check_email(count_tokens(email_content))
+            budget.check(estimate["total_tokens"] + committed)
+        except BudgetExceeded as e:
+            return self._error_result(e), estimate
+        return None, estimate
+    
+    def _finish(self, call: CallRecord, email_content: str, compaction: Optional[Dict[str, Any]],
+                result: Dict[str, Any], estimate: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Attach the estimate, extracted facts and compaction statistics to a result, then mark and remember it."""
+        if estimate is not None:
+            result["estimate"] = estimate
+        result["extracted"] = extract_hints(email_content).to_dict()
+        call.error = result["status"] == "error"
+        if compaction is not None:
+            result["compaction"] = compaction
+        result = self._mark_fallbacks(result, call)
+        self._remember_result(email_content, result)
+        return result
+    
+    def estimate(self, email_content: str) -> Dict[str, Any]:
+        """
+        Estimate the tokens and cost of processing an email, before anything is sent.
+        
+        Counts the prompts of the calls the fast pipeline (or the combined
+        call) makes for the email and assumes each uses its whole max_tokens,
+        so the cost is an upper bound for those modes; crew mode's agent loop
+        sends prompts of its own on top.
+        
+        Args:
+            email_content: The email as it will be prompted (compacted)
+            
+        Returns:
+            Dictionary with the number of "calls", "prompt_tokens",
+            "max_completion_tokens", "total_tokens", the "model" the email
+            routes to and its worst-case "cost_usd"
+        """
+        llm = get_llm_client()
+        email_tokens = count_tokens(email_content)
+        if self.mode == "local":
+            calls = []
+        elif self.mode == "combined":
+            calls = [("summary_review", count_tokens(COMBINED_PROMPT_TEMPLATE) + email_tokens)]
+        else:
+            calls = self.summarizer.tool.planned_calls(email_content)
+            # Long emails are reviewed against the chunk summaries, short ones against the email
+            source_tokens = sum(llm.max_tokens(*call) for call in calls[:-1]) if len(calls) > 1 else email_tokens
+            calls.append(("review", count_tokens(FEEDBACK_PROMPT_TEMPLATE) + source_tokens + llm.max_tokens(*calls[-1])))
+        
+        prompt_tokens = sum(tokens for _, tokens in calls)
+        completion_tokens = sum(llm.max_tokens(*call) for call in calls)
+        model = llm.router.model(llm.router.choose(email_content)[0])
+        return {
+            "calls": len(calls),
+            "prompt_tokens": prompt_tokens,
+            "max_completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "model": model,
+            "cost_usd": estimate_cost(model, prompt_tokens, completion_tokens)
+        }
+    
+    def summarize_local(self, email_content: str) -> Dict[str, Any]:
+        """
+        Summarize an email with the local extractive summarizer only.
+        
+        Nothing is sent to an LLM, so this works without an API key and
+        returns in milliseconds, for when LLM latency is unacceptable.
+        
+        Args:
+            email_content: The email text to process
+            
+        Returns:
+            Dictionary in the same format as process_email, with
+            model_tier "local"
         """
+        with get_metrics().track("process_email_local"):
+            email_content, compaction = self._compact(email_content)
+            result = {
+                "summary": self.summarizer.tool.summarize_local(email_content),
+                "review": LOCAL_REVIEW,
+                "status": "success",
+                "fallback": False,
+                "model_tier": "local",
+                "extracted": extract_hints(email_content).to_dict()
+            }
+            if compaction is not None:
+                result["compaction"] = compaction
+            return result
+    
+    def _semantic_result(self, email_content: str) -> Optional[Dict[str, Any]]:
+        """Reuse the result of a near-identical email when the semantic cache is enabled."""
+        semantic = get_semantic_cache()
+        if semantic is None:
+            return None
+        # A result of the tier the email routes to, or of the strong tier, is good enough
+        router = get_llm_client().router
+        models = {router.model(router.choose(email_content)[0]), router.model(STRONG)}
+        with get_metrics().track("semantic_lookup") as lookup:
+            hit = semantic.lookup(email_content, models)
+            lookup.cache_hit = hit is not None
+        if hit is None:
+            return None
+        return {
+            "summary": hit.summary,
+            "review": hit.review,
+            "status": "success",
+            "model_tier": "cache",
+            "semantic_cache": {"similarity": round(hit.similarity, 4), "adapted": hit.adapted, "model": hit.model}
+        }
+    
+    @staticmethod
+    def _remember_result(email_content: str, result: Dict[str, Any]) -> None:
+        """Index a fresh, successful result for reuse by near-identical emails, under the model that produced it."""
+        semantic = get_semantic_cache()
+        if semantic is None or result["status"] != "success" or result["fallback"] or "semantic_cache" in result:
+            return
+        if result.get("model_tier") not in TIERS:
+            return
+        with get_metrics().track("semantic_store"):
+            semantic.add(email_content, get_llm_client().router.model(result["model_tier"]), result["summary"], result["review"])
+    
+    def _compact(self, email_content: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Return the email as it should be prompted, with compaction statistics if it was compacted."""
+        if not self.compact:
+            return email_content, None
+        with get_metrics().track("compact"):
+            compacted = compact_email(email_content)
+        return compacted.text, compacted.stats()
+    
+    def _process_email(self, email_content: str, summary: Optional[str] = None) -> Dict[str, Any]:
+        """Run the pipeline for the configured mode, turning failures into an error result."""
         try:
+            if self.mode == "fast":
+                return self._process_fast(email_content, summary)
+            if self.mode == "combined":
+                return self._process_combined(email_content)
+            
+            # Long emails would overflow the agent prompts, so they are
+            # summarized with chunked map-reduce instead
+            if self.summarizer.tool.needs_map_reduce(email_content):
+                summary, partials = self.summarizer.tool.map_reduce(email_content)
+                review = self.reviewer.tool._run(self._review_source(email_content, partials), summary)
+                return self._long_email_result(summary, review, partials)
+            
             # Task 1: Summarize the email
             summarization_task = Task(
                 description=f"""Analyze and summarize the following email. 
@@ -72,31 +350,442 @@ class EmailSummarizerCrew:
             )
             
             # Execute the crew
-            result = crew.kickoff()
-            
-            # Parse results
-            if isinstance(result, dict):
-                return {
-                    "summary": result.get("task_outputs", {}).get(0, "No summary generated"),
-                    "review": result.get("task_outputs", {}).get(1, "No review generated"),
-                    "status": "success"
-                }
-            else:
-                # Handle string or other return types
-                outputs = str(result).split("\n\n---\n\n")
-                return {
-                    "summary": outputs[0] if len(outputs) > 0 else str(result),
-                    "review": outputs[1] if len(outputs) > 1 else "Review pending...",
-                    "status": "success"
-                }
+            with get_metrics().track("crew_kickoff"):
+                result = crew.kickoff()
+            
+            # Parse results from the typed per-task outputs
+            outputs = [task_output.raw for task_output in result.tasks_output]
+            return {
+                "summary": outputs[0] if len(outputs) > 0 else "No summary generated",
+                "review": outputs[1] if len(outputs) > 1 else "No review generated",
+                "status": "success"
+            }
                 
         except Exception as e:
+            return self._error_result(e)
+    
+    def process_many(self, emails: Iterable[str], max_concurrency: int = 4) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Process many emails concurrently over a bounded worker pool.
+        
+        Emails are pulled from the iterable lazily, so at most max_concurrency
+        emails are in flight at any time, even for very large backlogs.
+        
+        Args:
+            emails: Iterable of email texts to process
+            max_concurrency: Maximum number of emails processed at the same time
+            
+        Yields:
+            (index, result) tuples in completion order, where index is the
+            position of the email in the input and result is the same
+            dictionary returned by process_email
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        
+        email_iter = enumerate(emails)
+        pending: Dict[Future, int] = {}
+        
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="email-worker") as executor:
+            def submit_next() -> bool:
+                try:
+                    index, email_content = next(email_iter)
+                except StopIteration:
+                    return False
+                # Workers run in a copy of the caller's context so its token budget user applies
+                pending[executor.submit(contextvars.copy_context().run, self._process_in_worker, email_content)] = index
+                return True
+            
+            # Fill the pool, then top it up as each email finishes
+            for _ in range(max_concurrency):
+                if not submit_next():
+                    break
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = self._error_result(e)
+                    submit_next()
+                    yield index, result
+    
+    def process_batch(self, emails: Sequence[str], max_concurrency: int = 4,
+                      users: Optional[Sequence[Optional[str]]] = None) -> List[Dict[str, Any]]:
+        """
+        Process a batch of emails, packing the short ones into shared summary requests.
+        
+        In fast mode, emails short enough to pack (see
+        EmailSummarizerTool.summarize_packed) are summarized several per LLM
+        request and then each reviewed on its own. Longer emails, and any
+        email the packed response left out or garbled, are summarized on
+        their own as in process_email. Cache hits and emails the size limit
+        or the user's token budget refuse (the batch's estimates counted
+        together) are settled before packing, so no packed request pays
+        for them. Other modes, or EMAIL_PACKING=0, process every email with
+        process_many.
+        
+        Args:
+            emails: The email texts to process
+            max_concurrency: Maximum number of emails reviewed (or processed)
+                at the same time
+            users: Whose token budget each email is charged to (default:
+                the current user for all); packs may mix users, see
+                EmailSummarizerTool.summarize_packed
+            
+        Returns:
+            One result per email, in input order, as returned by process_email
+        """
+        budget = get_token_budget()
+        
+        def user(index: int) -> Optional[str]:
+            return users[index] if users is not None else budget.current_user()
+        
+        if self.mode != "fast" or not self.summarizer.tool.packing:
+            if users is None:
+                results: List[Optional[Dict[str, Any]]] = [None] * len(emails)
+                for index, result in self.process_many(emails, max_concurrency=max_concurrency):
+                    results[index] = result
+                return results
+            
+            def process_one(index: int) -> Dict[str, Any]:
+                with budget.user(user(index)):
+                    return self._process_in_worker(emails[index])
+            
+            with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(emails))), thread_name_prefix="email-worker") as executor:
+                futures = [executor.submit(contextvars.copy_context().run, process_one, index) for index in range(len(emails))]
+                return [future.result() for future in futures]
+        
+        prepared = [self._fit(*self._compact(email_content)) for email_content in emails]
+        admitted = []
+        # Each user's budget must cover the estimates of all of their emails in the batch
+        committed: Dict[Optional[str], int] = {}
+        for index, (email_content, _) in enumerate(prepared):
+            with budget.user(user(index)) as user_id:
+                result, estimate = self._admit(email_content, committed.get(user_id, 0))
+            if result is None:
+                committed[user_id] = committed.get(user_id, 0) + estimate["total_tokens"]
+            admitted.append((result, estimate))
+        
+        summaries: List[Optional[str]] = [None] * len(emails)
+        to_pack = [index for index, (result, _) in enumerate(admitted) if result is None]
+        packed = self.summarizer.tool.summarize_packed(
+            [prepared[index][0] for index in to_pack],
+            users=[user(index) for index in to_pack] if users is not None else None
+        )
+        for index, summary in zip(to_pack, packed):
+            summaries[index] = summary
+        
+        def process(index: int) -> Dict[str, Any]:
+            with get_metrics().track("process_email") as call, budget.user(user(index)):
+                return self._process_admitted(call, *prepared[index], *admitted[index], summaries[index])
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(emails))), thread_name_prefix="email-worker") as executor:
+            futures = [executor.submit(contextvars.copy_context().run, process, index) for index in range(len(emails))]
+            return [future.result() for future in futures]
+    
+    def _process_fast(self, email_content: str, summary: Optional[str] = None) -> Dict[str, Any]:
+        """Summarize (unless a summary is given) then review with direct tool calls, skipping the agent loop."""
+        if summary is None and self.summarizer.tool.needs_map_reduce(email_content):
+            summary, partials = self.summarizer.tool.map_reduce(email_content)
+            review = self.reviewer.tool._run(self._review_source(email_content, partials), summary)
+            return self._long_email_result(summary, review, partials)
+        
+        if summary is None:
+            summary = self.summarizer.tool._run(email_content)
+        review = self.reviewer.tool._run(email_content, summary)
+        return {
+            "summary": summary,
+            "review": review,
+            "status": "success"
+        }
+    
+    def _process_combined(self, email_content: str) -> Dict[str, Any]:
+        """Summarize and review in one structured call, falling back to the two-call pipeline."""
+        if self.summarizer.tool.needs_map_reduce(email_content):
+            return self._process_fast(email_content)
+        
+        structured = self.combined_tool.analyze(email_content)
+        if structured is None:
+            return self._process_fast(email_content)
+        return self._structured_result(structured)
+    
+    @staticmethod
+    def _structured_result(structured: SummaryReviewResult) -> Dict[str, Any]:
+        """Build the result dictionary for a combined-mode run, keeping the typed objects."""
+        return {
+            "summary": structured.summary.to_text(),
+            "review": structured.review.to_text(),
+            "status": "success",
+            "summary_sections": structured.summary,
+            "review_details": structured.review
+        }
+    
+    async def process_email_async(self, email_content: str) -> Dict[str, Any]:
+        """
+        Process an email through summarization and review without blocking.
+        
+        The CrewAI agent loop is synchronous, so the async pipeline awaits the
+        agents' tools directly: one summarization call followed by one review
+        call, letting a single event loop keep many emails in flight. In
+        combined mode a single structured call is tried first.
+        
+        Args:
+            email_content: The email text to process
+            
+        Returns:
+            Dictionary containing summary and review results, as returned
+            by process_email (token budgets are enforced the same way)
+        """
+        # The local summarizer takes milliseconds, so it runs inline
+        if self.mode == "local":
+            return self.summarize_local(email_content)
+        
+        with get_metrics().track("process_email") as call:
+            email_content, compaction = self._fit(*self._compact(email_content))
+            result, estimate = self._admit(email_content)
+            if result is None:
+                router = get_llm_client().router
+                with router.route(email_content) as tier:
+                    result = await self._process_email_async(email_content)
+                if result["status"] == "success" and router.should_escalate(tier, result["review"]):
+                    with get_metrics().track("escalate"), router.escalated() as tier:
+                        result = await self._process_email_async(email_content)
+                    result["escalated"] = True
+                result["model_tier"] = tier
+            return self._finish(call, email_content, compaction, result, estimate)
+    
+    async def _process_email_async(self, email_content: str) -> Dict[str, Any]:
+        """Async pipeline behind process_email_async, turning failures into an error result."""
+        try:
+            if self.mode == "combined" and not self.summarizer.tool.needs_map_reduce(email_content):
+                structured = await self.combined_tool.aanalyze(email_content)
+                if structured is not None:
+                    return self._structured_result(structured)
+            
+            if self.summarizer.tool.needs_map_reduce(email_content):
+                summary, partials = await self.summarizer.tool.amap_reduce(email_content)
+                review = await self.reviewer.tool._arun(self._review_source(email_content, partials), summary)
+                return self._long_email_result(summary, review, partials)
+            
+            summary = await self.summarizer.tool._arun(email_content)
+            review = await self.reviewer.tool._arun(email_content, summary)
             return {
-                "summary": f"Error processing email: {str(e)}",
-                "review": "Unable to review due to processing error",
-                "status": "error",
-                "error": str(e)
+                "summary": summary,
+                "review": review,
+                "status": "success"
             }
+        except Exception as e:
+            return self._error_result(e)
+    
+    def stream_summary(self, email_content: str) -> Iterator[str]:
+        """
+        Stream the summary of an email chunk by chunk.
+        
+        Streaming goes straight to the summarizer tool, since the agent loop
+        only returns once the whole task is done.
+        
+        Args:
+            email_content: The email text to summarize
+            
+        Returns:
+            Generator of summary text chunks
+        """
+        return self.summarizer.tool.stream(self._compact(email_content)[0])
+    
+    def review_summary(self, email_content: str, summary: str) -> str:
+        """
+        Review a finished summary with the reviewer's tool.
+        
+        Args:
+            email_content: The original email text
+            summary: The summary to review
+            
+        Returns:
+            Detailed feedback on the summary quality
+        """
+        return self.reviewer.tool._run(self._compact(email_content)[0], summary)
+    
+    def process_mailbox(self, path: str, max_concurrency: int = 4) -> Iterator[Tuple[ParsedEmail, Dict[str, Any]]]:
+        """
+        Stream every email in an mbox file, Maildir or .eml file through the crew.
+        
+        Messages are read lazily and only those in flight are kept in memory,
+        so arbitrarily large mailboxes can be processed.
+        
+        Args:
+            path: Path to an mbox file, Maildir directory, .eml file or
+                directory of .eml files
+            max_concurrency: Maximum number of emails processed at the same time
+            
+        Yields:
+            (email, result) tuples in completion order
+        """
+        in_flight: Dict[int, ParsedEmail] = {}
+        
+        def email_texts() -> Iterator[str]:
+            for index, message in enumerate(iter_emails(path)):
+                in_flight[index] = message
+                yield message.to_text()
+        
+        for index, result in self.process_many(email_texts(), max_concurrency=max_concurrency):
+            yield in_flight.pop(index), result
+    
+    def process_thread_message(self, message: ParsedEmail) -> Dict[str, Any]:
+        """
+        Summarize a message as part of its thread.
+        
+        Messages are grouped by Message-ID, In-Reply-To and References. The
+        first message of a thread is summarized as usual; each later one only
+        sends the previous thread summary and the new message (compacted,
+        so without its quoted history) to the LLM. Thread summaries are
+        produced with the tools directly, whatever the crew's mode.
+        
+        Args:
+            message: A parsed email, e.g. from iter_emails
+            
+        Returns:
+            Dictionary containing the updated thread summary and its review,
+            plus "thread_id", "thread_messages" (messages summarized so far)
+            and "incremental" (True if an earlier summary was reused)
+        """
+        store = get_thread_store()
+        with get_metrics().track("process_thread_message") as call:
+            thread_id = store.resolve(message)
+            with store.locked(thread_id):
+                previous = store.get(thread_id)
+                if previous is not None and store.contains(message):
+                    return {
+                        "summary": previous.summary,
+                        "review": "Message already included in the thread summary",
+                        "status": "success",
+                        "fallback": False,
+                        "thread_id": thread_id,
+                        "thread_messages": previous.message_count,
+                        "incremental": True
+                    }
+                
+                new_message, compaction = self._compact(message.to_text())
+                try:
+                    if previous is None:
+                        summary = self.summarizer.tool._run(new_message)
+                        review_source = new_message
+                    else:
+                        summary = self.summarizer.tool.update_thread(previous.summary, new_message)
+                        review_source = f"PREVIOUS THREAD SUMMARY:\n{previous.summary}\n\nNEW MESSAGE:\n{new_message}"
+                    review = self.reviewer.tool._run(review_source, summary)
+                    result = {"summary": summary, "review": review, "status": "success"}
+                except Exception as e:
+                    result = self._error_result(e)
+                call.error = result["status"] == "error"
+                result = self._mark_fallbacks(result, call)
+                
+                # Fallback text would be carried into every later update, so it is not stored
+                state = previous
+                if result["status"] == "success" and not result["fallback"]:
+                    state = store.record(thread_id, message, summary)
+                
+                result.update({
+                    "thread_id": thread_id,
+                    "thread_messages": state.message_count if state is not None else 0,
+                    "incremental": previous is not None
+                })
+                if compaction is not None:
+                    result["compaction"] = compaction
+                return result
+    
+    def process_mailbox_threads(self, path: str) -> Iterator[Tuple[ParsedEmail, Dict[str, Any]]]:
+        """
+        Stream a mailbox through process_thread_message, updating thread summaries.
+        
+        Messages are handled one at a time in mailbox order, since each
+        update builds on the previous summary of its thread.
+        
+        Args:
+            path: Path to an mbox file, Maildir directory, .eml file or
+                directory of .eml files
+            
+        Yields:
+            (email, result) tuples
+        """
+        for message in iter_emails(path):
+            yield message, self.process_thread_message(message)
+    
+    def _process_in_worker(self, email_content: str) -> Dict[str, Any]:
+        """Run process_email on a crew checked out for the current worker."""
+        with self.checkout() as crew:
+            return crew.process_email(email_content)
+    
+    @contextmanager
+    def checkout(self) -> Iterator["EmailSummarizerCrew"]:
+        """
+        Borrow a crew that no other thread is using.
+        
+        A single EmailSummarizerCrew can be shared by many threads (e.g. all
+        Streamlit sessions of a process) as long as each call goes through
+        checkout. Idle crews are reused, so at most one crew per concurrent
+        caller is ever built.
+        
+        Yields:
+            This crew in fast mode, whose tools are stateless; otherwise an
+            idle crew of the same mode
+        """
+        if self.mode == "fast":
+            yield self
+            return
+        
+        with self._idle_lock:
+            crew = self._idle.pop() if self._idle else None
+        if crew is None:
+            crew = EmailSummarizerCrew(mode=self.mode)
+        try:
+            yield crew
+        finally:
+            with self._idle_lock:
+                self._idle.append(crew)
+    
+    @staticmethod
+    def _review_source(email_content: str, partials: list) -> str:
+        """Text the reviewer checks a map-reduce summary against: the chunk summaries."""
+        if not partials:
+            return email_content
+        return "\n\n".join(f"PART {i} SUMMARY:\n{p}" for i, p in enumerate(partials, 1))
+    
+    @staticmethod
+    def _long_email_result(summary: str, review: str, partials: list) -> Dict[str, Any]:
+        """Build the result dictionary for an email summarized with map-reduce."""
+        return {
+            "summary": summary,
+            "review": review,
+            "status": "success",
+            "chunks": len(partials)
+        }
+    
+    @staticmethod
+    def _mark_fallbacks(result: Dict[str, Any], call: CallRecord) -> Dict[str, Any]:
+        """Flag results that contain fallback text because a stage ran out of retries."""
+        # The combined mode recovers from a failed structured call with the fast pipeline
+        stages = sorted(set(call.fallback_stages) - {"summarize_review"})
+        call.fallback = bool(stages)
+        result["fallback"] = bool(stages)
+        if stages:
+            result["fallback_stages"] = stages
+        return result
+    
+    @staticmethod
+    def _error_result(error: Exception) -> Dict[str, Any]:
+        """Build the result dictionary for an email that failed to process; a budget refusal also names its limit under "rejected"."""
+        result = {
+            "summary": f"Error processing email: {str(error)}",
+            "review": "Unable to review due to processing error",
+            "status": "error",
+            "error": str(error)
+        }
+        if isinstance(error, BudgetExceeded):
+            result["rejected"] = error.reason
+        return result
     
     def refine_summary(self, email_content: str, initial_summary: str, feedback: str) -> str:
         """
@@ -110,33 +799,147 @@ class EmailSummarizerCrew:
         Returns:
             Refined summary
         """
-        refinement_task = Task(
-            description=f"""Based on the feedback provided, create an improved summary of the email.
+        # A single round; the follow-up review is only needed to continue refining
+        return self.refine_summary_rounds(email_content, initial_summary, feedback, max_rounds=1, final_review=False)["summary"]
+    
+    def refine_summary_rounds(self, email_content: str, initial_summary: str, feedback: str,
+                              max_rounds: Optional[int] = None, final_review: bool = True) -> Dict[str, Any]:
+        """
+        Refine a summary section by section over a bounded number of rounds.
+        
+        Each round sends only the actionable review points, the summary
+        sections they affect and the email excerpts those points refer to.
+        The revised sections are then reviewed on their own, and another round
+        runs only while that review still lists improvements, so the prompt
+        does not grow from one round to the next.
+        
+        Args:
+            email_content: Original email
+            initial_summary: The summary to refine
+            feedback: Review feedback on initial_summary
+            max_rounds: Upper bound on rounds (default EMAIL_REFINE_ROUNDS, or 2)
+            final_review: Review the sections revised in the last round too, so
+                the returned review reflects the refined summary
             
-            Original email:
-            {email_content}
+        Returns:
+            Dictionary with the refined summary, the last review, per-round
+            tokens, cost and latency under "rounds", and status. A round
+            refused by the token budget ends the refinement with status
+            "error" and "rejected" naming the limit, keeping earlier rounds
+        """
+        max_rounds = max_rounds or int(os.getenv("EMAIL_REFINE_ROUNDS", "2"))
+        with get_metrics().track("refine_summary") as call:
+            email_content = self._compact(email_content)[0]
+            sections = split_sections(initial_summary)
+            review = feedback
+            rounds: List[Dict[str, Any]] = []
+            rejected: Optional[BudgetExceeded] = None
+            for number in range(1, max_rounds + 1):
+                points = actionable_points(review)
+                if not points:
+                    break
+                targets = affected_sections(points, sections)
+                try:
+                    with get_metrics().track("refine_round") as round_call:
+                        start = time.perf_counter()
+                        current, point_text, excerpts = self._round_prompt(email_content, sections, targets, points)
+                        revision = self.summarizer.tool.refine_sections(current, point_text, excerpts)
+                        if not round_call.fallback_stages:
+                            sections = apply_revision(sections, targets, revision)
+                        if not round_call.fallback_stages and (final_review or number < max_rounds):
+                            review = self.reviewer.tool.review_sections(self._pick(sections, targets), excerpts)
+                except BudgetExceeded as e:
+                    rejected = e
+                    break
+                rounds.append(self._round_stats(number, points, targets, round_call, time.perf_counter() - start))
+                if round_call.fallback_stages:
+                    break
             
-            Initial summary:
-            {initial_summary}
+            result = {"summary": join_sections(sections), "review": review, "rounds": rounds, "status": "success"}
+            if rejected is not None:
+                call.error = True
+                result.update(status="error", error=str(rejected), rejected=rejected.reason)
+            return self._mark_fallbacks(result, call)
+    
+    async def refine_summary_async(self, email_content: str, initial_summary: str, feedback: str) -> str:
+        """
+        Refine a summary based on feedback without blocking the event loop.
+        
+        Args:
+            email_content: Original email
+            initial_summary: The first summary attempt
+            feedback: Review feedback
             
-            Feedback received:
-            {feedback}
+        Returns:
+            Refined summary
+        """
+        return (await self.refine_summary_rounds_async(
+            email_content, initial_summary, feedback, max_rounds=1, final_review=False
+        ))["summary"]
+    
+    async def refine_summary_rounds_async(self, email_content: str, initial_summary: str, feedback: str,
+                                          max_rounds: Optional[int] = None, final_review: bool = True) -> Dict[str, Any]:
+        """Async variant of refine_summary_rounds."""
+        max_rounds = max_rounds or int(os.getenv("EMAIL_REFINE_ROUNDS", "2"))
+        with get_metrics().track("refine_summary") as call:
+            email_content = self._compact(email_content)[0]
+            sections = split_sections(initial_summary)
+            review = feedback
+            rounds: List[Dict[str, Any]] = []
+            rejected: Optional[BudgetExceeded] = None
+            for number in range(1, max_rounds + 1):
+                points = actionable_points(review)
+                if not points:
+                    break
+                targets = affected_sections(points, sections)
+                try:
+                    with get_metrics().track("refine_round") as round_call:
+                        start = time.perf_counter()
+                        current, point_text, excerpts = self._round_prompt(email_content, sections, targets, points)
+                        revision = await self.summarizer.tool.arefine_sections(current, point_text, excerpts)
+                        if not round_call.fallback_stages:
+                            sections = apply_revision(sections, targets, revision)
+                        if not round_call.fallback_stages and (final_review or number < max_rounds):
+                            review = await self.reviewer.tool.areview_sections(self._pick(sections, targets), excerpts)
+                except BudgetExceeded as e:
+                    rejected = e
+                    break
+                rounds.append(self._round_stats(number, points, targets, round_call, time.perf_counter() - start))
+                if round_call.fallback_stages:
+                    break
             
-            Create a revised summary that addresses all the feedback points.""",
-            agent=self.summarizer_agent,
-            expected_output="An improved email summary that incorporates all feedback"
-        )
-        
-        # Single agent crew for refinement
-        crew = Crew(
-            agents=[self.summarizer_agent],
-            tasks=[refinement_task],
-            process=Process.sequential,
-            verbose=False
-        )
-        
-        result = crew.kickoff()
-        return str(result)
+            result = {"summary": join_sections(sections), "review": review, "rounds": rounds, "status": "success"}
+            if rejected is not None:
+                call.error = True
+                result.update(status="error", error=str(rejected), rejected=rejected.reason)
+            return self._mark_fallbacks(result, call)
+    
+    @staticmethod
+    def _pick(sections: Dict[str, str], names: List[str]) -> str:
+        """Join the named sections only."""
+        return join_sections({name: sections[name] for name in names})
+    
+    def _round_prompt(self, email_content: str, sections: Dict[str, str], targets: List[str],
+                      points: List[str]) -> Tuple[str, str, str]:
+        """Build the (sections, points, excerpts) inputs of one refinement round."""
+        current = self._pick(sections, targets)
+        point_text = "\n".join(f"- {point}" for point in points)
+        excerpts = select_excerpts(email_content, f"{point_text}\n{current}")
+        return current, point_text, excerpts
+    
+    @staticmethod
+    def _round_stats(number: int, points: List[str], targets: List[str], call: CallRecord, seconds: float) -> Dict[str, Any]:
+        """Report the token usage, cost and latency of one refinement round."""
+        return {
+            "round": number,
+            "points": len(points),
+            "sections": targets,
+            "prompt_tokens": call.total_prompt_tokens,
+            "completion_tokens": call.total_completion_tokens,
+            "cost": call.total_cost,
+            "latency_s": seconds,
+            "fallback": bool(call.fallback_stages)
+        }
 
 
 # Convenience function for testing
@@ -174,4 +977,6 @@ John
 
 
 if __name__ == "__main__":
+    # Load environment variables
+    load_dotenv()
     test_crew()
\ No newline at end of file
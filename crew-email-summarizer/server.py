@@ -0,0 +1,279 @@
+"""
+Email Summarizer HTTP Service
+A headless JSON API over EmailSummarizerCrew for other systems, such as a
+mail gateway. Concurrent requests are coalesced into micro-batches (identical
+ones answered once) and a bounded queue answers 429 under overload instead of
+letting latency grow without limit.
+
+Endpoints:
+    POST /summarize  {"email": ...}                         -> process_email result
+    POST /review     {"email": ..., "summary": ...}         -> {"review": ...}
+    POST /refine     {"email": ..., "summary": ..., "review": ..., "max_rounds": 2}
+                                                            -> refine_summary_rounds result
+    GET  /health                                            -> queue and batch statistics
+
+Token budgets are charged per caller: the client address, or the X-User-Id
+header when the request comes from a trusted proxy (addresses listed in
+EMAIL_SERVER_TRUST_USER_HEADER), since anyone else could pick a fresh id per
+request. An email over the size limit gets a 413 and a caller out of budget
+a 429, before anything is sent to the AI service.
+Identical requests are still coalesced across callers: the work is done
+once and charged to the caller with the most budget left.
+
+Run with: python server.py [--host 127.0.0.1] [--port 8080] [--mode fast]
+"""
+
+import argparse
+import json
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+from main import EmailSummarizerCrew
+from utils.batching import MicroBatcher
+from utils.budget import EMAIL, REQUEST, USER, BudgetExceeded, get_token_budget
+
+
+# Required fields of each endpoint's request body
+ENDPOINTS = {
+    "summarize": ("email",),
+    "review": ("email", "summary"),
+    "refine": ("email", "summary", "review")
+}
+
+MAX_BODY_BYTES = 1_000_000
+
+# HTTP status of a result refused by a token budget, by the limit it hit
+REJECTED_STATUS = {USER: 429, EMAIL: 413, REQUEST: 413}
+
+
+class SummarizerService:
+    """Runs summarize, review and refine requests through a micro-batcher over one crew."""
+    
+    def __init__(self, crew: Optional[EmailSummarizerCrew] = None, workers: Optional[int] = None,
+                 max_batch_size: Optional[int] = None, max_wait_s: Optional[float] = None,
+                 max_pending: Optional[int] = None, timeout_s: Optional[float] = None,
+                 trusted_proxies: Optional[Sequence[str]] = None):
+        """
+        Unset arguments are read from EMAIL_SERVER_MODE (crew mode, default
+        "fast"), EMAIL_SERVER_WORKERS, EMAIL_SERVER_BATCH_SIZE,
+        EMAIL_SERVER_BATCH_WAIT_MS, EMAIL_SERVER_MAX_PENDING,
+        EMAIL_SERVER_TIMEOUT and EMAIL_SERVER_TRUST_USER_HEADER (comma-separated);
+        a refine request may ask for at most EMAIL_REFINE_MAX_ROUNDS rounds.
+        
+        Args:
+            crew: The crew to serve; requests borrow it through checkout()
+            workers: Number of requests processed at the same time
+            max_batch_size: Maximum number of requests coalesced into a batch
+            max_wait_s: How long a batch waits for more requests
+            max_pending: Requests queued or running before new ones get a 429
+            timeout_s: Seconds a request may take before it gets a 504
+            trusted_proxies: Client addresses whose X-User-Id header names
+                the caller; by default the header is ignored
+        """
+        self.crew = crew or EmailSummarizerCrew(mode=os.getenv("EMAIL_SERVER_MODE", "fast"))
+        workers = workers or int(os.getenv("EMAIL_SERVER_WORKERS", "16"))
+        self.timeout_s = timeout_s or float(os.getenv("EMAIL_SERVER_TIMEOUT", "120"))
+        if trusted_proxies is None:
+            trusted_proxies = [a.strip() for a in os.getenv("EMAIL_SERVER_TRUST_USER_HEADER", "").split(",") if a.strip()]
+        self.trusted_proxies = frozenset(trusted_proxies)
+        self.max_refine_rounds = int(os.getenv("EMAIL_REFINE_MAX_ROUNDS", "5"))
+        self._workers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="email-request")
+        self.batcher = MicroBatcher(
+            self.process_batch,
+            max_batch_size=max_batch_size or int(os.getenv("EMAIL_SERVER_BATCH_SIZE", "16")),
+            max_wait_s=max_wait_s if max_wait_s is not None else float(os.getenv("EMAIL_SERVER_BATCH_WAIT_MS", "5")) / 1000,
+            max_pending=max_pending or int(os.getenv("EMAIL_SERVER_MAX_PENDING", "64")),
+            concurrency=workers
+        )
+    
+    def process_batch(self, kind: str, payloads: List[Dict[str, Any]], owners: List[List[Optional[str]]]) -> List[Any]:
+        """
+        Process the distinct requests of one batch concurrently.
+        
+        Summarize batches go through EmailSummarizerCrew.process_batch, which
+        packs short emails into shared summary requests; review and refine
+        requests run one by one on the worker pool. Each distinct request is
+        charged to one of the callers coalesced into it (see payer).
+        """
+        payers = [self.payer(users) for users in owners]
+        if kind == "summarize":
+            return self.crew.process_batch(
+                [payload["email"] for payload in payloads], max_concurrency=len(payloads), users=payers
+            )
+        
+        futures = [self._workers.submit(self.handle, kind, payload, user) for payload, user in zip(payloads, payers)]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+    
+    @staticmethod
+    def payer(users: List[Optional[str]]) -> Optional[str]:
+        """Pick whose budget pays for a request coalesced from several callers: the one with the most left."""
+        budget = get_token_budget()
+        
+        def left(user: Optional[str]) -> float:
+            remaining = budget.remaining(user) if user is not None else None
+            return float("inf") if remaining is None else remaining
+        
+        return max(users, key=left) if users else None
+    
+    def caller(self, address: str, user_header: Optional[str]) -> str:
+        """Name the caller whose budget pays: X-User-Id from a trusted proxy, otherwise the client address."""
+        if user_header and address in self.trusted_proxies:
+            return user_header
+        return address
+    
+    def handle(self, kind: str, payload: Dict[str, Any], user: Optional[str] = None) -> Dict[str, Any]:
+        """Run one request against an idle crew, charged to user."""
+        with self.crew.checkout() as crew, get_token_budget().user(user):
+            if kind == "summarize":
+                return crew.process_email(payload["email"])
+            if kind == "review":
+                return {"review": crew.review_summary(payload["email"], payload["summary"])}
+            return crew.refine_summary_rounds(
+                payload["email"], payload["summary"], payload["review"],
+                max_rounds=payload.get("max_rounds")
+            )
+    
+    def request(self, kind: str, payload: Dict[str, Any], user: Optional[str] = None) -> Tuple[int, Dict[str, Any]]:
+        """
+        Answer one request.
+        
+        Args:
+            kind: The endpoint, a key of ENDPOINTS
+            payload: The request body
+            user: Whose token budget the request is charged to (None: no budget)
+            
+        Returns:
+            (HTTP status, JSON body) tuple
+        """
+        missing = [name for name in ENDPOINTS[kind] if not isinstance(payload.get(name), str) or not payload[name].strip()]
+        if missing:
+            return 400, {"error": f"missing or empty fields: {', '.join(missing)}"}
+        if kind == "refine" and "max_rounds" in payload:
+            rounds = payload["max_rounds"]
+            if not isinstance(rounds, int) or isinstance(rounds, bool) or not 1 <= rounds <= self.max_refine_rounds:
+                return 400, {"error": f"max_rounds must be an integer from 1 to {self.max_refine_rounds}"}
+        
+        try:
+            future = self.batcher.submit(kind, payload, owner=user)
+        except queue.Full:
+            return 429, {"error": "too many requests in flight, retry shortly"}
+        
+        try:
+            result = future.result(timeout=self.timeout_s)
+        except TimeoutError:
+            return 504, {"error": f"no result within {self.timeout_s:g}s"}
+        except BudgetExceeded as e:
+            return REJECTED_STATUS.get(e.reason, 413), {"error": str(e), "rejected": e.reason}
+        except Exception as e:
+            print(f"Error in {kind} request: {str(e)}")
+            return 500, {"error": str(e)}
+        if result.get("rejected"):
+            return REJECTED_STATUS.get(result["rejected"], 413), result
+        # The AI service failed even after retries
+        if result.get("status") == "error":
+            return 502, result
+        return 200, result
+    
+    def health(self) -> Dict[str, Any]:
+        return {"status": "ok", "mode": self.crew.mode, "batching": self.batcher.stats()}
+    
+    def close(self) -> None:
+        self.batcher.close()
+        self._workers.shutdown(wait=True)
+
+
+class _ServiceHandler(BaseHTTPRequestHandler):
+    """JSON request handler; the service is attached to the server."""
+    
+    protocol_version = "HTTP/1.1"
+    
+    def do_GET(self):
+        if self.path.rstrip("/") == "/health":
+            self._reply(200, self.server.service.health())
+        else:
+            self._reply(404, {"error": "not found"})
+    
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self._reply(413, {"error": f"request body exceeds {MAX_BODY_BYTES} bytes"})
+            self.close_connection = True
+            return
+        # Read the body even for unknown paths so the keep-alive connection stays in sync
+        body = self.rfile.read(length)
+        kind = self.path.strip("/")
+        if kind not in ENDPOINTS:
+            self._reply(404, {"error": "not found"})
+            return
+        
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            self._reply(400, {"error": "request body is not valid JSON"})
+            return
+        if not isinstance(payload, dict):
+            self._reply(400, {"error": "request body must be a JSON object"})
+            return
+        
+        user = self.server.service.caller(self.client_address[0], self.headers.get("X-User-Id"))
+        status, body = self.server.service.request(kind, payload, user=user)
+        self._reply(status, body)
+    
+    def _reply(self, status: int, body: Dict[str, Any]):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class SummarizerServer(ThreadingHTTPServer):
+    """Threaded HTTP server bound to a SummarizerService."""
+    
+    daemon_threads = True
+    request_queue_size = 256
+    
+    def __init__(self, address: Tuple[str, int], service: SummarizerService):
+        self.service = service
+        super().__init__(address, _ServiceHandler)
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Serve the email summarizer over HTTP.")
+    parser.add_argument("--host", default=os.getenv("EMAIL_SERVER_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("EMAIL_SERVER_PORT", "8080")))
+    parser.add_argument("--mode", default=os.getenv("EMAIL_SERVER_MODE", "fast"), help="crew mode, see EmailSummarizerCrew")
+    args = parser.parse_args()
+    
+    service = SummarizerService(crew=EmailSummarizerCrew(mode=args.mode))
+    server = SummarizerServer((args.host, args.port), service)
+    print(f"Email summarizer listening on http://{args.host}:{args.port} ({args.mode} mode)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
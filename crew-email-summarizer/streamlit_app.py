@@ -16,9 +16,16 @@ STYLING UPDATES APPLIED:
 """
 
 import streamlit as st
-from main import EmailSummarizerCrew
+from utils.budget import BudgetExceeded, get_token_budget
+from utils.history import get_history_store
+from utils.jobs import get_job_queue
+from utils.llm_client import get_llm_client
+from utils.metrics import get_metrics, start_metrics_server
 from dotenv import load_dotenv
 import os
+import queue
+import time
+import uuid
 from datetime import datetime
 
 # Load environment variables
@@ -339,11 +346,89 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize session state
-if 'crew' not in st.session_state:
-    st.session_state.crew = EmailSummarizerCrew()
-if 'processing_history' not in st.session_state:
-    st.session_state.processing_history = []
+
+@st.cache_resource(show_spinner="Loading AI agents...")
+def get_crew():
+    """
+    Build the crew once per process and share it across sessions.
+    
+    main pulls in CrewAI and LiteLLM, so it is imported here rather than at
+    the top of the module: the page renders without them and the import is
+    paid on the first summarization only.
+    """
+    from main import EmailSummarizerCrew
+    return EmailSummarizerCrew()
+
+
+# Initialize session state; the history itself lives in SQLite, so session memory stays flat
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if 'pending_jobs' not in st.session_state:
+    st.session_state.pending_jobs = {}
+history = get_history_store()
+job_queue = get_job_queue()
+token_budget = get_token_budget()
+
+HISTORY_PAGE_SIZE = 5
+
+
+def process_job(crew, email: str, session_id: str):
+    """Run the crew on one email on a job worker and record it in the history."""
+    start = time.perf_counter()
+    with crew.checkout() as idle_crew, token_budget.user(session_id):
+        result = idle_crew.process_email(email)
+    history.add(session_id, email, result, latency_s=time.perf_counter() - start)
+    return result
+
+
+def refine_job(crew, email: str, summary: str, review: str, max_rounds: int, session_id: str):
+    """Run the refinement rounds on a job worker, against the session's token budget."""
+    with crew.checkout() as idle_crew, token_budget.user(session_id):
+        return idle_crew.refine_summary_rounds(email, summary, review, max_rounds=max_rounds)
+
+
+def submit_job(kind: str, function, *args, email: str) -> bool:
+    """
+    Queue a job for this session; the Jobs panel picks up its result.
+    
+    Returns:
+        False if the queue was full and the job was not submitted
+    """
+    try:
+        job_id = job_queue.submit(kind, function, *args, owner=st.session_state.session_id)
+    except queue.Full:
+        st.warning("⏳ Too many emails are being processed right now. Please try again in a moment.")
+        return False
+    st.session_state.pending_jobs[job_id] = {"kind": kind, "email": email}
+    return True
+
+
+def collect_finished_jobs() -> bool:
+    """
+    Move the results of this session's finished jobs into the session state.
+    
+    Returns:
+        True if any pending job finished
+    """
+    changed = False
+    for job_id, pending in list(st.session_state.pending_jobs.items()):
+        job = job_queue.get(job_id)
+        if job is not None and not job.finished:
+            continue
+        del st.session_state.pending_jobs[job_id]
+        changed = True
+        if job is None or job.status != "done":
+            continue
+        if pending["kind"] == "summarize":
+            st.session_state.last_result = job.result
+            st.session_state.last_email = pending["email"]
+            st.session_state.pop('last_refinement', None)
+        elif pending["email"] == st.session_state.get('last_email'):
+            st.session_state.last_refinement = job.result
+    return changed
+
+# Prometheus endpoint (started once per process)
+metrics_server = start_metrics_server()
 
 # Header
 st.title("🤖 AI Email Summarizer with CrewAI")
@@ -375,6 +460,32 @@ with st.sidebar:
         st.error("❌ Gemini API Key Missing")
         st.info("Add GEMINI_API_KEY to your .env file")
     
+    st.header("⚙️ Settings")
+    local_mode = st.checkbox(
+        "Local summary (instant, no AI)",
+        value=False,
+        help="Summarize on this machine in milliseconds with an extractive summarizer; no API key or network needed"
+    )
+    background_mode = st.checkbox(
+        "Run in the background",
+        value=True,
+        help="Queue summaries and refinements as jobs so the page stays responsive; results appear when they are ready"
+    )
+    # Streaming toggle
+    stream_mode = st.checkbox(
+        "Stream summary as it is generated",
+        value=True,
+        disabled=background_mode,
+        help="Show the summary token by token and start the review as soon as it finishes (when not running in the background)"
+    )
+    refine_rounds = st.slider(
+        "Refinement rounds",
+        min_value=1,
+        max_value=4,
+        value=2,
+        help="Maximum review-and-revise rounds per Refine click; each round only resends the sections that need changes"
+    )
+    
     # Sample email loader
     st.header("📝 Load Sample Email")
     if st.button("Load Example Email"):
@@ -412,21 +523,100 @@ email_input = st.text_area(
 process_button = st.button("🚀 Summarize Email", type="primary", use_container_width=True)
 
 # Process email when button is clicked
-if process_button and email_input:
-    with st.spinner("🤖 CrewAI agents are analyzing your email..."):
-        # Process the email
-        result = st.session_state.crew.process_email(email_input)
+if process_button and email_input and background_mode and not local_mode:
+    # Returns at once; the worker records the result in the history
+    submit_job("summarize", process_job, get_crew(), email_input, st.session_state.session_id, email=email_input)
+elif process_button and email_input:
+    process_start = time.perf_counter()
+    if local_mode:
+        result = get_crew().summarize_local(email_input)
+    elif stream_mode:
+        # Render the summary as tokens arrive, then review the finished summary
+        st.header("📊 AI Analysis Results")
+        st.subheader("📝 Summary")
+        summary_placeholder = st.empty()
         
-        # Store in session state
-        st.session_state.last_result = result
-        st.session_state.last_email = email_input
+        with get_metrics().track("process_email_stream") as call, token_budget.user(st.session_state.session_id):
+            start_time = time.perf_counter()
+            time_to_first_token = None
+            summary = ""
+            rejected = None
+            try:
+                for chunk in get_crew().stream_summary(email_input):
+                    if time_to_first_token is None:
+                        time_to_first_token = time.perf_counter() - start_time
+                    summary += chunk
+                    summary_placeholder.markdown(f'<div class="summary-box">{summary}</div>', unsafe_allow_html=True)
+                
+                with st.spinner("🔍 Reviewer agent is checking the summary..."):
+                    review = get_crew().review_summary(email_input, summary)
+            except BudgetExceeded as e:
+                rejected = e
         
-        # Add to history
-        st.session_state.processing_history.append({
-            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            'email_preview': email_input[:100] + "...",
-            'result': result
-        })
+        result = {
+            "summary": summary,
+            "review": review,
+            "status": "success",
+            "fallback": bool(call.fallback_stages),
+            "fallback_stages": sorted(set(call.fallback_stages)),
+            "time_to_first_token": time_to_first_token
+        } if rejected is None else {
+            "summary": summary or f"Error processing email: {rejected}",
+            "review": "Unable to review due to processing error",
+            "status": "error",
+            "fallback": False,
+            "error": str(rejected),
+            "rejected": rejected.reason,
+            "time_to_first_token": time_to_first_token
+        }
+    else:
+        with st.spinner("🤖 CrewAI agents are analyzing your email..."):
+            # Process the email
+            with get_crew().checkout() as crew, token_budget.user(st.session_state.session_id):
+                result = crew.process_email(email_input)
+    
+    # Store in session state
+    st.session_state.last_result = result
+    st.session_state.last_email = email_input
+    st.session_state.pop('last_refinement', None)
+    
+    # Add to history
+    history.add(st.session_state.session_id, email_input, result, latency_s=time.perf_counter() - process_start)
+    
+    # Re-run so the streamed output is replaced by the regular results view
+    if stream_mode and not local_mode:
+        st.rerun()
+
+
+# Jobs panel: polls while this session has jobs in flight, then re-runs the page to show their results
+@st.fragment(run_every=1 if st.session_state.pending_jobs else None)
+def jobs_panel():
+    if collect_finished_jobs():
+        st.rerun()
+    session_jobs = job_queue.jobs(owner=st.session_state.session_id)
+    if not session_jobs:
+        return
+    
+    with st.expander("🗂️ Background Jobs", expanded=bool(st.session_state.pending_jobs)):
+        st.dataframe([
+            {
+                "Job": job.job_id,
+                "Kind": job.kind,
+                "Status": job.status,
+                "Submitted": datetime.fromtimestamp(job.submitted_at).strftime("%H:%M:%S"),
+                "Queued (s)": round(job.wait_s, 2),
+                "Running (s)": round(job.run_s, 2) if job.run_s is not None else None,
+                "Error": job.error or ""
+            }
+            for job in session_jobs
+        ], use_container_width=True, hide_index=True)
+        for job in session_jobs:
+            if not job.finished and st.button(f"Cancel {job.kind} job {job.job_id}", key=f"cancel_{job.job_id}"):
+                job_queue.cancel(job.job_id)
+                st.rerun()
+
+
+jobs_panel()
 
 # Display results - AI Analysis Results Section
 if 'last_result' in st.session_state:
@@ -435,50 +625,201 @@ if 'last_result' in st.session_state:
     # AI Analysis Results
     st.header("📊 AI Analysis Results")
     
+    if result.get("rejected"):
+        st.error(
+            "This email was not sent to the AI service: "
+            + ("your token budget for now is used up." if result["rejected"] == "user" else "it is too long to summarize.")
+        )
+    
+    if result.get("fallback"):
+        st.warning(
+            "The AI service could not be reached after several retries, so these stages show fallback output: "
+            + ", ".join(result.get("fallback_stages", []))
+        )
+    
+    if result.get("model_tier"):
+        st.caption(
+            f"Model tier: {result['model_tier']}"
+            + (" (escalated after a low review score)" if result.get("escalated") else "")
+        )
+    
+    if result.get("semantic_cache"):
+        st.caption(
+            f"Reused the result of a near-identical email (similarity {result['semantic_cache']['similarity']:.3f}"
+            + (", IDs, numbers and dates updated)" if result["semantic_cache"]["adapted"] else ")")
+        )
+    
+    if result.get("compaction"):
+        compaction = result["compaction"]
+        st.caption(
+            f"Quoted history, signatures and markup removed before prompting: "
+            f"{compaction['tokens_removed']} of {compaction['original_tokens']} tokens"
+        )
+    
+    if result.get("estimate") and not result.get("rejected"):
+        estimate = result["estimate"]
+        st.caption(
+            f"Estimated before sending: {estimate['calls']} calls, up to {estimate['total_tokens']:,} tokens, "
+            f"at most ${estimate['cost_usd']:.5f} on {estimate['model']}"
+        )
+    
     # Summary section
     st.subheader("📝 Summary")
     with st.container():
         st.markdown(f'<div class="summary-box">{result["summary"]}</div>', unsafe_allow_html=True)
     
+    # Facts extracted locally before prompting
+    extracted = result.get("extracted")
+    if extracted and extracted["action_items"]:
+        with st.expander("🗓️ Extracted Action Items"):
+            st.dataframe([
+                {"Owner": item["owner"] or "", "Task": item["task"], "Due": item["due"] or item["due_text"] or ""}
+                for item in extracted["action_items"]
+            ], use_container_width=True, hide_index=True)
+            if extracted["reference_date"]:
+                st.caption(f"Relative dates resolved against the email's date, {extracted['reference_date']}")
+    
     # Quality Review as separate main section
     st.header("🔍 Quality Review")
     with st.container():
         st.markdown(f'<div class="review-box">{result["review"]}</div>', unsafe_allow_html=True)
     
-    # Refinement option
-    if st.button("🔄 Refine Summary", use_container_width=True):
-        with st.spinner("Refining summary based on feedback..."):
-            refined_summary = st.session_state.crew.refine_summary(
-                st.session_state.last_email,
-                result["summary"],
-                result["review"]
-            )
-            st.subheader("✨ Refined Summary")
-            st.markdown(f'<div class="refined-summary-box">{refined_summary}</div>', unsafe_allow_html=True)
+    # Refinement option (needs the AI service)
+    if result.get("model_tier") != "local" and st.button("🔄 Refine Summary", use_container_width=True):
+        # Further clicks continue from the last refinement instead of starting over
+        previous = st.session_state.get('last_refinement', result)
+        if background_mode:
+            # Re-run so the Jobs panel above starts polling for the new job
+            if submit_job(
+                "refine", refine_job, get_crew(), st.session_state.last_email,
+                previous["summary"], previous["review"], refine_rounds, st.session_state.session_id,
+                email=st.session_state.last_email
+            ):
+                st.rerun()
+        else:
+            with st.spinner("Refining summary based on feedback..."):
+                with get_crew().checkout() as crew, token_budget.user(st.session_state.session_id):
+                    st.session_state.last_refinement = crew.refine_summary_rounds(
+                        st.session_state.last_email,
+                        previous["summary"],
+                        previous["review"],
+                        max_rounds=refine_rounds
+                    )
+    
+    if 'last_refinement' in st.session_state:
+        refinement = st.session_state.last_refinement
+        st.subheader("✨ Refined Summary")
+        if refinement.get("rejected"):
+            st.error("Refinement stopped: your token budget for now is used up." if refinement["rejected"] == "user"
+                     else "Refinement stopped: the request is too long.")
+        st.markdown(f'<div class="refined-summary-box">{refinement["summary"]}</div>', unsafe_allow_html=True)
+        if refinement["rounds"]:
+            st.dataframe([
+                {
+                    "Round": r["round"],
+                    "Points": r["points"],
+                    "Sections": ", ".join(r["sections"]),
+                    "Prompt Tokens": r["prompt_tokens"],
+                    "Completion Tokens": r["completion_tokens"],
+                    "Est. Cost ($)": round(r["cost"], 5),
+                    "Latency (s)": round(r["latency_s"], 2)
+                }
+                for r in refinement["rounds"]
+            ], use_container_width=True, hide_index=True)
+        else:
+            st.caption("The review had no actionable points left, so the summary was not changed.")
 
 # Metrics section - Processing Metrics
-if 'processing_history' in st.session_state and st.session_state.processing_history:
+latest_entry = history.latest(session_id=st.session_state.session_id)
+if latest_entry is not None:
     st.header("📈 Processing Metrics")
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Emails Processed", len(st.session_state.processing_history))
+        st.metric("Total Emails Processed", history.count(session_id=st.session_state.session_id))
     
     with col2:
-        success_count = sum(1 for h in st.session_state.processing_history if h['result']['status'] == 'success')
+        success_count = history.count(session_id=st.session_state.session_id, status="success")
         st.metric("Successful Summaries", success_count)
     
     with col3:
-        if st.session_state.processing_history:
-            st.metric("Last Processed", st.session_state.processing_history[-1]['timestamp'])
+        st.metric("Last Processed", datetime.fromtimestamp(latest_entry.created_at).strftime("%Y-%m-%d %H:%M:%S"))
+    
+    with col4:
+        ttft = latest_entry.time_to_first_token
+        st.metric("Time to First Token", f"{ttft:.2f}s" if ttft is not None else "N/A")
+    
+    budget_left = token_budget.remaining(st.session_state.session_id)
+    if budget_left is not None:
+        st.caption(f"Token budget left in this window: {budget_left:,} tokens")
+    
+    # Per-stage latency, token and cost breakdown
+    stage_rows = get_metrics().snapshot()
+    if stage_rows:
+        st.subheader("⏱️ Stage Breakdown")
+        st.dataframe([
+            {
+                "Stage": row["stage"],
+                "Calls": row["calls"],
+                "p50 (s)": round(row["p50_s"], 3),
+                "p95 (s)": round(row["p95_s"], 3),
+                "p99 (s)": round(row["p99_s"], 3),
+                "Prompt Tokens": row["prompt_tokens"],
+                "Completion Tokens": row["completion_tokens"],
+                "Est. Cost ($)": round(row["cost_usd"], 5),
+                "Cache Hits": row["cache_hits"],
+                "Fallbacks": row["fallbacks"]
+            }
+            for row in stage_rows
+        ], use_container_width=True, hide_index=True)
+    
+    # Model routing mix: how many emails each tier took and what it cost
+    routing = get_llm_client().router.snapshot()
+    if any(tier["calls"] for tier in routing["tiers"].values()):
+        st.subheader("🧭 Model Routing")
+        st.dataframe([
+            {
+                "Tier": tier,
+                "Model": routing["models"][tier],
+                "Routing Decisions": sum(count for key, count in routing["decisions"].items() if key.startswith(f"{tier}:")),
+                "LLM Calls": stats["calls"],
+                "Prompt Tokens": stats["prompt_tokens"],
+                "Completion Tokens": stats["completion_tokens"],
+                "Est. Cost ($)": round(stats["cost_usd"], 5),
+                "Mean Latency (s)": round(stats["latency_s"] / stats["calls"], 3) if stats["calls"] else 0.0
+            }
+            for tier, stats in routing["tiers"].items()
+        ], use_container_width=True, hide_index=True)
+        st.caption(f"Escalations after a low review score: {routing['escalations']}")
+    
+    if metrics_server is not None:
+        host, port = metrics_server.server_address[:2]
+        st.caption(f"Prometheus metrics: http://{host}:{port}/metrics")
 
 # History expander
 with st.expander("📜 Processing History"):
-    for i, hist in enumerate(reversed(st.session_state.processing_history[-5:])):  # Show last 5
-        st.write(f"**{hist['timestamp']}** - {hist['email_preview']}")
-        if st.button(f"View Details", key=f"hist_{i}"):
-            st.write("Summary:", hist['result']['summary'])
-            st.write("Review:", hist['result']['review'])
+    # Only this session's entries: the store is shared by every visitor
+    status_filter = st.selectbox("Status", ["All", "success", "error"])
+    history_filters = {
+        "session_id": st.session_state.session_id,
+        "status": None if status_filter == "All" else status_filter
+    }
+    
+    total_entries = history.count(**history_filters)
+    page_count = max(1, -(-total_entries // HISTORY_PAGE_SIZE))
+    page_number = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+    st.caption(f"{total_entries} entries, page {page_number} of {page_count}")
+    
+    # Only the compact rows of one page are read; texts load when an entry is opened
+    for entry in history.page(page=page_number - 1, page_size=HISTORY_PAGE_SIZE, **history_filters):
+        timestamp = datetime.fromtimestamp(entry.created_at).strftime("%Y-%m-%d %H:%M:%S")
+        latency = f", {entry.latency_s:.2f}s" if entry.latency_s is not None else ""
+        st.write(f"**{timestamp}** - {entry.preview}... ({entry.status}{latency})")
+        if st.button(f"View Details", key=f"hist_{entry.entry_id}"):
+            texts = history.texts(entry.entry_id, session_id=st.session_state.session_id)
+            if texts is not None:
+                st.write("Summary:", texts['summary'])
+                st.write("Review:", texts['review'])
 
 # Footer
 st.markdown("---")
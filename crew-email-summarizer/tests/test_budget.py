@@ -0,0 +1,20 @@
+"""
+Tests for utils.budget: users without usage in the window are forgotten.
+"""
+
+from utils import budget as budget_module
+from utils.budget import TokenBudget
+
+
+def test_idle_users_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(budget_module.time, "monotonic", lambda: now[0])
+    budget = TokenBudget(user_tokens=1000, window_s=10)
+    for user_id in ("a", "b", "c"):
+        budget.charge(user_id, 100)
+    
+    now[0] += 11
+    budget.charge("d", 100)
+    
+    assert set(budget._users) == {"d"}
+    assert budget.remaining("a") == 1000
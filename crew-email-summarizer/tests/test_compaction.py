@@ -0,0 +1,111 @@
+"""
+Tests for utils.compaction: quoted history is removed, the email itself is not.
+"""
+
+from utils.compaction import compact_email
+from utils.ingestion import ParsedEmail
+
+
+BODY = "Hi team,\n\nThe budget review moved to Friday. Please send your numbers by Thursday.\n\nThanks,\nAnn"
+
+
+def test_parsed_email_without_to_keeps_body():
+    email = ParsedEmail(subject="Budget", sender="Ann Lee <ann@example.com>", date="Mon, 1 Jan 2024 10:00:00", body=BODY)
+    
+    compacted = compact_email(email.to_text()).text
+    
+    assert "Subject: Budget" in compacted
+    assert "The budget review moved to Friday." in compacted
+
+
+def test_outlook_pasted_email_keeps_body():
+    email = (
+        "From: Ann Lee\nSent: Monday, January 1, 2024 10:00 AM\nTo: Bob Stone\nSubject: Budget\n\n" + BODY
+    )
+    
+    compacted = compact_email(email).text
+    
+    assert compacted.startswith("From: Ann Lee")
+    assert "Please send your numbers by Thursday." in compacted
+
+
+def test_outlook_pasted_email_after_subject_keeps_body():
+    email = "Subject: Budget\nFrom: Ann Lee\nSent: Monday, January 1, 2024 10:00 AM\n\n" + BODY
+    
+    assert "The budget review moved to Friday." in compact_email(email).text
+
+
+def test_reply_history_after_body_is_removed():
+    email = (
+        "Subject: Re: Budget\n\nSounds good, I will send mine today.\n\n"
+        "From: Ann Lee\nSent: Monday, January 1, 2024 10:00 AM\nTo: Bob Stone\nSubject: Budget\n\n" + BODY
+    )
+    
+    compacted = compact_email(email).text
+    
+    assert "I will send mine today." in compacted
+    assert "The budget review moved to Friday." not in compacted
+
+
+def test_unsubscribe_request_is_kept():
+    email = "Hi Bob,\n\nPlease unsubscribe the old alias from the vendor list by Friday.\n\nThanks,\nAnn"
+    
+    assert "Please unsubscribe the old alias" in compact_email(email).text
+
+
+def test_unsubscribe_footer_is_removed():
+    email = BODY + "\n\nYou are receiving this email because you signed up. Click here to unsubscribe."
+    
+    compacted = compact_email(email).text
+    
+    assert "Click here to unsubscribe" not in compacted
+    assert "The budget review moved to Friday." in compacted
+
+
+def test_forwarded_message_is_kept():
+    email = (
+        "Subject: Fwd: Budget\n\nSee below.\n\n---------- Forwarded message ---------\n"
+        "From: Ann Lee\nDate: Mon, 1 Jan 2024 10:00:00\nSubject: Budget\n\n" + BODY
+    )
+    
+    assert "The budget review moved to Friday." in compact_email(email).text
+
+
+def test_leading_blank_lines_do_not_backtrack():
+    email = "\n" * 200 + "Subject: Budget\n\n" + BODY
+    
+    assert "The budget review moved to Friday." in compact_email(email).text
+
+
+def test_confidential_body_paragraph_is_kept():
+    email = (
+        "Hi Bob,\n\nPlease keep this confidential information internal and send me the Q3 numbers by Friday."
+        "\n\nThanks,\nAnn"
+    )
+    
+    assert "send me the Q3 numbers by Friday" in compact_email(email).text
+
+
+def test_confidentiality_footer_is_removed():
+    email = BODY + "\n\nCONFIDENTIALITY NOTICE: This email is confidential.\n\nSent from my iPhone"
+    
+    compacted = compact_email(email).text
+    
+    assert "CONFIDENTIALITY NOTICE" not in compacted
+    assert "The budget review moved to Friday." in compacted
+
+
+def test_section_divider_is_not_a_signature():
+    email = "Hi Bob,\n\nItem A done\n--\nItem B pending, need approval by Friday\n\nThanks,\nAnn"
+    
+    assert "need approval by Friday" in compact_email(email).text
+
+
+def test_signature_after_delimiter_is_removed():
+    email = BODY + "\n-- \nAnn Lee | Operations\n+1 555 0100 | www.example.com"
+    
+    compacted = compact_email(email).text
+    
+    assert "+1 555 0100" not in compacted
+    assert "Please send your numbers by Thursday." in compacted
+
@@ -0,0 +1,22 @@
+"""
+Tests for utils.hints: action items get due dates that are still ahead.
+"""
+
+from utils.hints import extract_hints
+
+
+SENT = "Date: Mon, 29 Sep 2025 09:00:00 +0000\nSubject: Report\n\n"
+
+
+def test_past_reference_is_not_a_due_date():
+    hints = extract_hints(SENT + "Hi Bob,\n\nAs discussed last Tuesday, please send the report.\n\nThanks,\nAnn")
+    
+    assert len(hints.action_items) == 1
+    assert hints.action_items[0].due is None
+
+
+def test_deadline_after_past_reference_is_the_due_date():
+    hints = extract_hints(SENT + "Hi Bob,\n\nAs discussed last Tuesday, please send the report by Friday.\n\nThanks,\nAnn")
+    
+    assert hints.action_items[0].due == "2025-10-03"
+    assert hints.action_items[0].due_text == "Friday"
@@ -4,5 +4,10 @@ Tools package for CrewAI email summarizer.
 
 from .summarizer_tool import EmailSummarizerTool
 from .feedback_tool import FeedbackTool
+from .combined_tool import SummaryReviewTool
+from .schemas import EmailSummary, SummaryReview, SummaryReviewResult
 
-__all__ = ['EmailSummarizerTool', 'FeedbackTool']
\ No newline at end of file
+__all__ = [
+    'EmailSummarizerTool', 'FeedbackTool', 'SummaryReviewTool',
+    'EmailSummary', 'SummaryReview', 'SummaryReviewResult'
+]
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""
+Combined Summary and Review Tool
+This tool summarizes an email and reviews the summary in one structured-output
+LLM call, sending the email only once.
+"""
+
+from crewai.tools import BaseTool
+from typing import Optional
+from tools.schemas import SummaryReviewResult, parse_structured
+from utils.budget import BudgetExceeded
+from utils.llm_client import get_llm_client
+from utils.metrics import get_metrics
+
+# JSON mode keeps the response parseable
+RESPONSE_FORMAT = {"type": "json_object"}
+
+COMBINED_PROMPT_TEMPLATE = """You are an expert email summarizer and editor. Summarize the following email, then critically review your own summary.
+
+EMAIL CONTENT:
+{email_content}
+
+Respond with a single JSON object of this shape and nothing else:
+{{
+  "summary": {{
+    "main_topic": "one line",
+    "key_points": ["..."],
+    "action_items": ["task (owner, deadline)"],
+    "decisions_needed": ["..."],
+    "important_dates": ["..."],
+    "tone_urgency": "brief assessment"
+  }},
+  "review": {{
+    "score": 1-10,
+    "strengths": ["..."],
+    "improvements": ["..."]
+  }}
+}}
+
+Keep the summary concise but comprehensive, and be specific in the review."""
+
+
+class SummaryReviewTool(BaseTool):
+    name: str = "Email Summary and Review"
+    description: str = "Summarizes an email and reviews the summary in a single structured call"
+    
+    def _run(self, email_content: str) -> str:
+        """
+        Summarize and review an email in one call.
+        
+        Args:
+            email_content: The full email text to summarize
+            
+        Returns:
+            The validated summary and review as JSON text
+        """
+        result = self.analyze(email_content)
+        if result is None:
+            return "Unable to produce a structured summary and review"
+        return result.model_dump_json(indent=2)
+    
+    def analyze(self, email_content: str) -> Optional[SummaryReviewResult]:
+        """
+        Summarize and review an email, returning typed objects.
+        
+        Args:
+            email_content: The full email text to summarize
+            
+        Returns:
+            The validated result, or None if the API is unavailable or the
+            response did not match the schema
+        """
+        llm = get_llm_client()
+        with get_metrics().track("summarize_review") as call, llm.router.route(email_content):
+            try:
+                # Check if API key is available
+                if not llm.available:
+                    call.fallback = True
+                    return None
+                
+                cache, cache_key, cached = llm.lookup(COMBINED_PROMPT_TEMPLATE, "summary_review", email_content)
+                if cached is not None:
+                    call.cache_hit = True
+                    return SummaryReviewResult.model_validate_json(cached)
+                
+                prompt = COMBINED_PROMPT_TEMPLATE.format(email_content=email_content)
+                result = parse_structured(llm.complete(prompt, "summary_review", record=call, response_format=RESPONSE_FORMAT))
+                # Only validated results are cached
+                llm.store(cache, cache_key, result.model_dump_json())
+                return result
+                
+            except BudgetExceeded:
+                raise
+            except Exception as e:
+                print(f"Error in combined summary and review: {str(e)}")
+                call.fallback = True
+                return None
+    
+    async def aanalyze(self, email_content: str) -> Optional[SummaryReviewResult]:
+        """Async variant of analyze using litellm.acompletion."""
+        llm = get_llm_client()
+        with get_metrics().track("summarize_review") as call, llm.router.route(email_content):
+            try:
+                if not llm.available:
+                    call.fallback = True
+                    return None
+                
+                cache, cache_key, cached = llm.lookup(COMBINED_PROMPT_TEMPLATE, "summary_review", email_content)
+                if cached is not None:
+                    call.cache_hit = True
+                    return SummaryReviewResult.model_validate_json(cached)
+                
+                prompt = COMBINED_PROMPT_TEMPLATE.format(email_content=email_content)
+                result = parse_structured(await llm.acomplete(prompt, "summary_review", record=call, response_format=RESPONSE_FORMAT))
+                llm.store(cache, cache_key, result.model_dump_json())
+                return result
+                
+            except BudgetExceeded:
+                raise
+            except Exception as e:
+                print(f"Error in combined summary and review: {str(e)}")
+                call.fallback = True
+                return None
@@ -4,34 +4,12 @@ This tool provides quality assessment and feedback on email summaries.
 """
 
 from crewai.tools import BaseTool
-from litellm import completion
-import os
-from typing import Dict, Any
+from utils.budget import BudgetExceeded
+from utils.llm_client import get_llm_client
+from utils.metrics import get_metrics
 
 
-class FeedbackTool(BaseTool):
-    name: str = "Summary Feedback Analyzer"
-    description: str = "Analyzes email summaries and provides quality feedback"
-    
-    def _run(self, original_email: str, summary: str) -> str:
-        """
-        Analyze a summary and provide feedback.
-        
-        Args:
-            original_email: The original email text
-            summary: The summary to review
-            
-        Returns:
-            Detailed feedback on the summary quality
-        """
-        try:
-            # Check if API key is available
-            api_key = os.getenv("GEMINI_API_KEY")
-            if not api_key:
-                return self._get_fallback_feedback()
-            
-            # Prepare the review prompt
-            prompt = f"""You are an expert editor reviewing an email summary. 
+FEEDBACK_PROMPT_TEMPLATE = """You are an expert editor reviewing an email summary. 
 
 ORIGINAL EMAIL:
 {original_email}
@@ -51,40 +29,145 @@ Please provide a detailed review including:
 
 Be constructive and specific in your feedback."""
 
-            # Use LiteLLM with Gemini
-            response = completion(
-                model="gemini/gemini-pro",
-                messages=[{"role": "user", "content": prompt}],
-                api_key=api_key,
-                temperature=0.4,
-                max_tokens=600
-            )
+SECTIONS_REVIEW_PROMPT_TEMPLATE = """You are an expert editor checking revised sections of an email summary.
+
+EMAIL EXCERPTS:
+{original_email}
+
+REVISED SECTIONS:
+{summary}
+
+List any remaining problems as short bullet points under the heading IMPROVEMENTS:, one actionable fix per line.
+If nothing needs fixing, reply with exactly: IMPROVEMENTS: NONE"""
+
+# Metrics stage name for each prompt
+STAGES = {
+    FEEDBACK_PROMPT_TEMPLATE: "review",
+    SECTIONS_REVIEW_PROMPT_TEMPLATE: "review_sections"
+}
+
+# LLM client task (temperature and output budget) for each prompt
+TASKS = {
+    FEEDBACK_PROMPT_TEMPLATE: "review",
+    SECTIONS_REVIEW_PROMPT_TEMPLATE: "review_sections"
+}
+
+
+class FeedbackTool(BaseTool):
+    name: str = "Summary Feedback Analyzer"
+    description: str = "Analyzes email summaries and provides quality feedback"
+    
+    def _run(self, original_email: str, summary: str) -> str:
+        """
+        Analyze a summary and provide feedback.
+        
+        Args:
+            original_email: The original email text
+            summary: The summary to review
             
-            return response.choices[0].message.content
+        Returns:
+            Detailed feedback on the summary quality
+        """
+        return self._generate(FEEDBACK_PROMPT_TEMPLATE, original_email=original_email, summary=summary)
+    
+    async def _arun(self, original_email: str, summary: str) -> str:
+        """
+        Analyze a summary and provide feedback without blocking the event loop.
+        
+        Args:
+            original_email: The original email text
+            summary: The summary to review
             
-        except Exception as e:
-            print(f"Error in feedback generation: {str(e)}")
-            return self._get_fallback_feedback()
+        Returns:
+            Detailed feedback on the summary quality
+        """
+        return await self._agenerate(FEEDBACK_PROMPT_TEMPLATE, original_email=original_email, summary=summary)
+    
+    def review_sections(self, sections: str, excerpts: str) -> str:
+        """
+        Check revised summary sections against the relevant email excerpts.
+        
+        Args:
+            sections: The revised sections, with their headings
+            excerpts: The parts of the email the sections are based on
+            
+        Returns:
+            Remaining problems under an IMPROVEMENTS heading (NONE if none)
+        """
+        return self._generate(SECTIONS_REVIEW_PROMPT_TEMPLATE, original_email=excerpts, summary=sections)
+    
+    async def areview_sections(self, sections: str, excerpts: str) -> str:
+        """Async variant of review_sections."""
+        return await self._agenerate(SECTIONS_REVIEW_PROMPT_TEMPLATE, original_email=excerpts, summary=sections)
+    
+    def _generate(self, template: str, **fields: str) -> str:
+        """Render template with fields and complete it, using the cache when possible."""
+        llm = get_llm_client()
+        task = TASKS[template]
+        with get_metrics().track(STAGES[template]) as call, llm.router.route(fields["original_email"]):
+            try:
+                # Check if API key is available
+                if not llm.available:
+                    call.fallback = True
+                    return self._get_fallback_feedback()
+                
+                cache, cache_key, cached = llm.lookup(template, task, *fields.values())
+                if cached is not None:
+                    call.cache_hit = True
+                    return cached
+                
+                # Use the shared LLM client, which retries rate limits and transient errors
+                return llm.store(cache, cache_key, llm.complete(template.format(**fields), task, record=call))
+                
+            except BudgetExceeded:
+                # A budget refusal is the caller's to report, not a reason for fallback feedback
+                raise
+            except Exception as e:
+                print(f"Error in feedback generation: {str(e)}")
+                call.fallback = True
+                return self._get_fallback_feedback()
+    
+    async def _agenerate(self, template: str, **fields: str) -> str:
+        """Async variant of _generate."""
+        llm = get_llm_client()
+        task = TASKS[template]
+        with get_metrics().track(STAGES[template]) as call, llm.router.route(fields["original_email"]):
+            try:
+                if not llm.available:
+                    call.fallback = True
+                    return self._get_fallback_feedback()
+                
+                cache, cache_key, cached = llm.lookup(template, task, *fields.values())
+                if cached is not None:
+                    call.cache_hit = True
+                    return cached
+                
+                return llm.store(cache, cache_key, await llm.acomplete(template.format(**fields), task, record=call))
+                
+            except BudgetExceeded:
+                # A budget refusal is the caller's to report, not a reason for fallback feedback
+                raise
+            except Exception as e:
+                print(f"Error in feedback generation: {str(e)}")
+                call.fallback = True
+                return self._get_fallback_feedback()
     
     def _get_fallback_feedback(self) -> str:
         """
-        Provide basic feedback when API is unavailable.
+        Provide basic feedback when the AI service is unavailable: no API
+        key, or the call failed after its retries (e.g. rate limits).
         
         Returns:
             Basic feedback message
         """
-        return """**FALLBACK FEEDBACK (API Key Missing)**
+        return """**FALLBACK FEEDBACK (AI service unavailable)**
 
 QUALITY SCORE: N/A
 
 FEEDBACK:
-• Unable to provide AI-powered feedback without API access
-• Please configure your GEMINI_API_KEY in the .env file
-• Once configured, you'll receive detailed quality assessments
+• The AI reviewer could not be reached, so no quality assessment was made
+• This happens when no GEMINI_API_KEY is configured, or when the service kept failing or rate limiting after several retries
 
 SUGGESTED ACTION:
-1. Create a .env file based on .env.example
-2. Add your Gemini API key
-3. Restart the application
-
-Note: AI-powered review features require a valid Gemini API key."""
\ No newline at end of file
+1. If no key is configured, add your Gemini API key to the .env file (see .env.example) and restart the application
+2. Otherwise, retry the review in a moment"""
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""
+Structured Output Schemas
+Pydantic models for summaries and reviews returned as structured JSON.
+"""
+
+import json
+import re
+from typing import Dict, List
+
+from pydantic import BaseModel, Field, ValidationError
+
+
+def _bullets(items: List[str]) -> str:
+    return "\n".join(f"• {item}" for item in items) if items else "• None"
+
+
+class EmailSummary(BaseModel):
+    """The six summary sections, as typed fields."""
+    
+    main_topic: str
+    key_points: List[str] = Field(default_factory=list)
+    action_items: List[str] = Field(default_factory=list)
+    decisions_needed: List[str] = Field(default_factory=list)
+    important_dates: List[str] = Field(default_factory=list)
+    tone_urgency: str = ""
+    
+    def to_text(self) -> str:
+        """Render the summary in the same six-section text format as the summarizer tool."""
+        return f"""MAIN TOPIC: {self.main_topic}
+
+KEY POINTS:
+{_bullets(self.key_points)}
+
+ACTION ITEMS:
+{_bullets(self.action_items)}
+
+DECISIONS NEEDED:
+{_bullets(self.decisions_needed)}
+
+IMPORTANT DATES:
+{_bullets(self.important_dates)}
+
+TONE/URGENCY: {self.tone_urgency}"""
+
+
+class SummaryReview(BaseModel):
+    """Quality assessment of a summary."""
+    
+    score: int = Field(ge=1, le=10)
+    strengths: List[str] = Field(default_factory=list)
+    improvements: List[str] = Field(default_factory=list)
+    
+    def to_text(self) -> str:
+        """Render the review in the same text register as the feedback tool."""
+        return f"""QUALITY SCORE: {self.score}/10
+
+STRENGTHS:
+{_bullets(self.strengths)}
+
+IMPROVEMENTS:
+{_bullets(self.improvements)}"""
+
+
+class PackedSummary(EmailSummary):
+    """One email's summary in a packed response, with the ID the email was sent under."""
+    
+    id: str
+
+
+class SummaryReviewResult(BaseModel):
+    """A summary and its review, produced by a single LLM call."""
+    
+    summary: EmailSummary
+    review: SummaryReview
+
+
+def parse_structured(raw: str) -> SummaryReviewResult:
+    """
+    Validate an LLM response against SummaryReviewResult.
+    
+    Args:
+        raw: Response text; may be wrapped in a ```json code fence
+        
+    Returns:
+        The validated result
+        
+    Raises:
+        pydantic.ValidationError or ValueError if the response does not match
+    """
+    return SummaryReviewResult.model_validate(json.loads(_json_text(raw)))
+
+
+def parse_packed(raw: str) -> Dict[str, PackedSummary]:
+    """
+    Extract the per-email summaries from a packed response.
+    
+    Entries that do not match the schema, have no main topic or repeat an
+    ID are skipped, so the caller can summarize those emails on their own.
+    
+    Args:
+        raw: Response text; may be wrapped in a ```json code fence
+        
+    Returns:
+        The valid summaries by email ID
+        
+    Raises:
+        ValueError if the response is not a JSON object with a "summaries" list
+    """
+    data = json.loads(_json_text(raw))
+    entries = data.get("summaries") if isinstance(data, dict) else None
+    if not isinstance(entries, list):
+        raise ValueError("packed response has no summaries list")
+    
+    summaries: Dict[str, PackedSummary] = {}
+    for entry in entries:
+        try:
+            summary = PackedSummary.model_validate(entry)
+        except ValidationError:
+            continue
+        if summary.main_topic.strip():
+            summaries.setdefault(summary.id.strip(), summary)
+    return summaries
+
+
+def _json_text(raw: str) -> str:
+    """Strip whitespace and a ```json code fence around a JSON response."""
+    text = raw.strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    return text
@@ -4,15 +4,176 @@ This tool handles the actual summarization logic using LiteLLM.
 """
 
 from crewai.tools import BaseTool
-from litellm import completion
+from pydantic import Field
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
 import os
-from typing import Dict, Any
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from tools.combined_tool import RESPONSE_FORMAT
+from tools.schemas import EmailSummary, parse_packed
+from utils.chunking import chunk_email
+from utils.budget import BudgetExceeded, get_token_budget
+from utils.extractive import extract_summary
+from utils.hints import extract_hints
+from utils.llm_client import get_llm_client
+from utils.metrics import get_metrics
+from utils.packing import email_block, pack_groups
+from utils.refinement import split_sections
+from utils.tokens import count_tokens
+
+SUMMARY_PROMPT_TEMPLATE = """You are an expert email summarizer. Please analyze the following email and provide a structured summary.
+
+EMAIL CONTENT:
+{email_content}
+
+Provide a summary with these sections:
+1. MAIN TOPIC: (one line)
+2. KEY POINTS: (bullet points)
+3. ACTION ITEMS: (if any, with deadlines)
+4. DECISIONS NEEDED: (if any)
+5. IMPORTANT DATES: (if any)
+6. TONE/URGENCY: (brief assessment)
+
+Keep the summary concise but comprehensive."""
+
+SUMMARY_HINTED_PROMPT_TEMPLATE = """You are an expert email summarizer. Please analyze the following email and provide a structured summary.
+
+EMAIL CONTENT:
+{email_content}
+
+FACTS EXTRACTED FROM THE EMAIL (dates resolved against the date it was sent; correct anything the email contradicts):
+{hints}
+
+Provide a summary with these sections:
+1. MAIN TOPIC: (one line)
+2. KEY POINTS: (bullet points)
+3. ACTION ITEMS: (one short line each: owner, task, due date)
+4. DECISIONS NEEDED: (if any)
+5. IMPORTANT DATES: (one short line each: date, what happens)
+6. TONE/URGENCY: (brief assessment)
+
+Build ACTION ITEMS and IMPORTANT DATES from the extracted facts rather than restating the email.
+Keep the summary concise."""
+
+REFINE_SECTIONS_PROMPT_TEMPLATE = """You are an expert email summarizer. Revise only the summary sections below using the reviewer's points.
+
+SECTIONS TO REVISE:
+{sections}
+
+REVIEWER POINTS:
+{points}
+
+RELEVANT EMAIL EXCERPTS:
+{email_content}
+
+Return only the revised sections, each starting with its heading exactly as given (e.g. "KEY POINTS:").
+Do not add facts that are not in the excerpts."""
+
+CHUNK_PROMPT_TEMPLATE = """You are an expert email summarizer. The following is part {part} of {total} of a long email or thread.
+
+EMAIL PART:
+{email_content}
+
+List the key points, action items (with owners and deadlines), decisions needed and dates that appear in this part.
+Be brief and do not add anything that is not in the text."""
+
+REDUCE_PROMPT_TEMPLATE = """You are an expert email summarizer. A long email was split into {total} parts and each part was summarized below, in order.
+
+PART SUMMARIES:
+{partial_summaries}
+
+Combine them into a single structured summary with these sections:
+1. MAIN TOPIC: (one line)
+2. KEY POINTS: (bullet points)
+3. ACTION ITEMS: (if any, with deadlines)
+4. DECISIONS NEEDED: (if any)
+5. IMPORTANT DATES: (if any)
+6. TONE/URGENCY: (brief assessment)
+
+Merge duplicate points and keep the summary concise but comprehensive."""
+
+THREAD_UPDATE_PROMPT_TEMPLATE = """You are an expert email summarizer maintaining a running summary of an email thread.
+
+CURRENT THREAD SUMMARY:
+{thread_summary}
+
+NEW MESSAGE IN THE THREAD:
+{email_content}
+
+Update the thread summary with the new message, keeping these sections:
+1. MAIN TOPIC: (one line)
+2. KEY POINTS: (bullet points)
+3. ACTION ITEMS: (if any, with deadlines)
+4. DECISIONS NEEDED: (if any)
+5. IMPORTANT DATES: (if any)
+6. TONE/URGENCY: (brief assessment)
+
+Add what is new, mark items the new message completes or changes, and drop nothing else.
+Keep the summary concise but comprehensive."""
+
+PACKED_PROMPT_TEMPLATE = """You are an expert email summarizer. Summarize each of the {count} emails below on its own.
+Each email is wrapped in <email id="..."> tags, some with facts extracted from it (dates resolved against the date it was sent).
+
+{emails}
+
+Respond with a single JSON object of this shape and nothing else, with one entry per email under its id:
+{{
+  "summaries": [
+    {{
+      "id": "E1",
+      "main_topic": "one line",
+      "key_points": ["..."],
+      "action_items": ["task (owner, deadline)"],
+      "decisions_needed": ["..."],
+      "important_dates": ["..."],
+      "tone_urgency": "brief assessment"
+    }}
+  ]
+}}
+
+Never mix facts between emails, and keep each summary concise."""
+
+# Completion tokens allowed per email of a packed request
+PACKED_TOKENS_PER_EMAIL = 250
+
+# Metrics stage name for each prompt
+STAGES = {
+    SUMMARY_PROMPT_TEMPLATE: "summarize",
+    SUMMARY_HINTED_PROMPT_TEMPLATE: "summarize",
+    REFINE_SECTIONS_PROMPT_TEMPLATE: "refine_sections",
+    CHUNK_PROMPT_TEMPLATE: "summarize_map",
+    REDUCE_PROMPT_TEMPLATE: "summarize_reduce",
+    THREAD_UPDATE_PROMPT_TEMPLATE: "summarize_thread_update",
+    PACKED_PROMPT_TEMPLATE: "summarize_packed"
+}
+
+# LLM client task for prompts that do not use the default "summary" settings
+TASKS = {
+    SUMMARY_HINTED_PROMPT_TEMPLATE: "summary_hinted",
+    REFINE_SECTIONS_PROMPT_TEMPLATE: "summary_sections"
+}
 
 
 class EmailSummarizerTool(BaseTool):
     name: str = "Email Summarizer"
     description: str = "Summarizes long emails into concise, actionable formats"
     
+    # Emails above map_reduce_threshold tokens are summarized chunk by chunk
+    map_reduce_threshold: int = Field(default_factory=lambda: int(os.getenv("EMAIL_MAP_REDUCE_THRESHOLD", "3000")))
+    chunk_tokens: int = Field(default_factory=lambda: int(os.getenv("EMAIL_CHUNK_TOKENS", "1500")))
+    map_concurrency: int = Field(default_factory=lambda: int(os.getenv("EMAIL_MAP_CONCURRENCY", "4")))
+    
+    # Dates, deadlines and action items are pre-extracted locally and given to the model
+    use_hints: bool = Field(default_factory=lambda: os.getenv("EMAIL_HINTS", "1") != "0")
+    
+    # Short emails processed in a batch are summarized several per LLM request
+    packing: bool = Field(default_factory=lambda: os.getenv("EMAIL_PACKING", "1") != "0")
+    pack_max_email_tokens: int = Field(default_factory=lambda: int(os.getenv("EMAIL_PACK_MAX_EMAIL_TOKENS", "300")))
+    pack_max_tokens: int = Field(default_factory=lambda: int(os.getenv("EMAIL_PACK_MAX_TOKENS", "2000")))
+    pack_max_emails: int = Field(default_factory=lambda: int(os.getenv("EMAIL_PACK_MAX_EMAILS", "8")))
+    
     def _run(self, email_content: str) -> str:
         """
         Execute the email summarization.
@@ -23,70 +184,415 @@ class EmailSummarizerTool(BaseTool):
         Returns:
             A structured summary of the email
         """
-        try:
-            # Check if API key is available
-            api_key = os.getenv("GEMINI_API_KEY")
-            if not api_key:
-                return self._get_fallback_summary(email_content)
+        if self.needs_map_reduce(email_content):
+            return self.map_reduce(email_content)[0]
+        template, fields = self._summary_prompt(email_content)
+        return self._generate(template, **fields)
+    
+    async def _arun(self, email_content: str) -> str:
+        """
+        Execute the email summarization without blocking the event loop.
+        
+        Args:
+            email_content: The full email text to summarize
             
-            # Prepare the summarization prompt
-            prompt = f"""You are an expert email summarizer. Please analyze the following email and provide a structured summary.
-
-EMAIL CONTENT:
-{email_content}
-
-Provide a summary with these sections:
-1. MAIN TOPIC: (one line)
-2. KEY POINTS: (bullet points)
-3. ACTION ITEMS: (if any, with deadlines)
-4. DECISIONS NEEDED: (if any)
-5. IMPORTANT DATES: (if any)
-6. TONE/URGENCY: (brief assessment)
-
-Keep the summary concise but comprehensive."""
-
-            # Use LiteLLM with Gemini
-            response = completion(
-                model="gemini/gemini-pro",
-                messages=[{"role": "user", "content": prompt}],
-                api_key=api_key,
-                temperature=0.3,
-                max_tokens=500
+        Returns:
+            A structured summary of the email
+        """
+        if self.needs_map_reduce(email_content):
+            return (await self.amap_reduce(email_content))[0]
+        template, fields = self._summary_prompt(email_content)
+        return await self._agenerate(template, **fields)
+    
+    def stream(self, email_content: str) -> Iterator[str]:
+        """
+        Stream the email summary as it is generated.
+        
+        Args:
+            email_content: The full email text to summarize
+            
+        Yields:
+            Consecutive chunks of the summary text
+        """
+        metrics = get_metrics()
+        llm = get_llm_client()
+        with metrics.track("summarize_stream") as call, llm.router.route(email_content):
+            if not llm.available:
+                call.fallback = True
+                yield self._get_fallback_summary(email_content)
+                return
+            
+            # Long emails run the map phase first, then stream the reduce step
+            if self.needs_map_reduce(email_content):
+                partials = self._map(email_content)
+                template, fields = REDUCE_PROMPT_TEMPLATE, self._reduce_fields(email_content, partials)
+            else:
+                template, fields = self._summary_prompt(email_content)
+            
+            cache, cache_key, cached = llm.lookup(template, TASKS.get(template, "summary"), *fields.values())
+            if cached is not None:
+                call.cache_hit = True
+                yield cached
+                return
+            
+            chunks = []
+            start = time.perf_counter()
+            try:
+                for text in llm.stream(template.format(**fields), TASKS.get(template, "summary"), record=call):
+                    if not chunks:
+                        metrics.observe("summarize_first_token", time.perf_counter() - start)
+                    chunks.append(text)
+                    yield text
+            except BudgetExceeded:
+                raise
+            except Exception as e:
+                print(f"Error in summarization: {str(e)}")
+                call.fallback = not chunks
+                if not chunks:
+                    yield self._get_fallback_summary(email_content)
+                return
+            
+            # Only complete streams are cached
+            llm.store(cache, cache_key, "".join(chunks))
+    
+    def _summary_prompt(self, email_content: str) -> Tuple[str, Dict[str, str]]:
+        """Return the single-call summary template and its fields, with pre-extracted facts when there are any."""
+        if self.use_hints:
+            with get_metrics().track("extract_hints"):
+                hints = extract_hints(email_content)
+            if hints:
+                return SUMMARY_HINTED_PROMPT_TEMPLATE, {"email_content": email_content, "hints": hints.to_prompt()}
+        return SUMMARY_PROMPT_TEMPLATE, {"email_content": email_content}
+    
+    def needs_map_reduce(self, email_content: str) -> bool:
+        """Return True if the email is long enough to be summarized chunk by chunk."""
+        return count_tokens(email_content) > self.map_reduce_threshold
+    
+    def planned_calls(self, email_content: str) -> List[Tuple[str, int]]:
+        """
+        List the summary calls summarizing an email takes, without sending any.
+        
+        Args:
+            email_content: The email as it will be prompted
+            
+        Returns:
+            (LLM client task, prompt tokens) of each call; chunk, then
+            reduce calls for long emails
+        """
+        llm = get_llm_client()
+        if not self.needs_map_reduce(email_content):
+            template, fields = self._summary_prompt(email_content)
+            return [(TASKS.get(template, "summary"), count_tokens(template.format(**fields)))]
+        
+        calls = [
+            ("summary", count_tokens(CHUNK_PROMPT_TEMPLATE) + count_tokens(chunk))
+            for chunk in chunk_email(email_content, self.chunk_tokens)
+        ]
+        partial_tokens = sum(llm.max_tokens(task, tokens) for task, tokens in calls)
+        calls.append(("summary", count_tokens(REDUCE_PROMPT_TEMPLATE) + partial_tokens))
+        return calls
+    
+    def packable(self, email_content: str) -> bool:
+        """Return True if the email is short enough to share a packed request."""
+        return self.packing and count_tokens(email_content) <= self.pack_max_email_tokens
+    
+    def summarize_packed(self, emails: Sequence[str], users: Optional[Sequence[Optional[str]]] = None) -> List[Optional[str]]:
+        """
+        Summarize many short emails in as few LLM requests as possible.
+        
+        Packable emails routed to the same model tier are packed, in order
+        and up to pack_max_emails emails and pack_max_tokens tokens, into one
+        JSON-mode request in which every email carries an ID. Packs run
+        concurrently and each summary is cached under its own email. An email
+        left alone in its pack is not sent as a pack: a packed request only
+        pays off when it is shared.
+        
+        Args:
+            emails: The email texts to summarize
+            users: Whose token budget each email is charged to. Packs then
+                mix users, so a pack is held against the per-request limit
+                only and each user is charged their emails' share of the
+                tokens it used; without users, packs are reserved against
+                the current user's budget like any other request
+            
+        Returns:
+            One summary per email, or None for emails that are too long to
+            pack, alone in their pack, or whose entry in the response was
+            missing or malformed; the caller summarizes those on their own
+        """
+        summaries: List[Optional[str]] = [None] * len(emails)
+        llm = get_llm_client()
+        if not llm.available:
+            return summaries
+        
+        # (index, block text, cache, cache key) of the emails to pack, by tier
+        by_tier: Dict[str, List[Tuple[int, str, Any, Optional[str]]]] = {}
+        for index, email_content in enumerate(emails):
+            if not self.packable(email_content):
+                continue
+            cache, cache_key, cached = llm.lookup(PACKED_PROMPT_TEMPLATE, "summary_packed", email_content)
+            if cached is not None:
+                summaries[index] = cached
+                continue
+            by_tier.setdefault(llm.router.choose(email_content)[0], []).append(
+                (index, self._packed_text(email_content), cache, cache_key)
             )
+        
+        packs = [
+            (tier, [items[i] for i in group])
+            for tier, items in by_tier.items()
+            for group in pack_groups([count_tokens(item[1]) for item in items], self.pack_max_tokens, self.pack_max_emails)
+            if len(group) > 1
+        ]
+        if not packs:
+            return summaries
+        with ThreadPoolExecutor(max_workers=max(1, min(self.map_concurrency, len(packs)))) as executor:
+            for packed in executor.map(
+                lambda args: args[0].run(self._summarize_pack, *args[1:]),
+                [(contextvars.copy_context(), tier, items, users) for tier, items in packs]
+            ):
+                for index, summary in packed.items():
+                    summaries[index] = summary
+        return summaries
+    
+    def _packed_text(self, email_content: str) -> str:
+        """The email as it goes into a pack, followed by its extracted facts when there are any."""
+        if self.use_hints:
+            hints = extract_hints(email_content)
+            if hints:
+                return f"{email_content}\n\nEXTRACTED FACTS:\n{hints.to_prompt()}"
+        return email_content
+    
+    def _summarize_pack(self, tier: str, items: List[Tuple[int, str, Any, Optional[str]]],
+                        users: Optional[Sequence[Optional[str]]] = None) -> Dict[int, str]:
+        """Send one pack and return the summaries found in the response, by email index."""
+        llm = get_llm_client()
+        budget = get_token_budget()
+        prompt = PACKED_PROMPT_TEMPLATE.format(
+            count=len(items),
+            emails="\n\n".join(email_block(f"E{n}", text) for n, (_, text, _, _) in enumerate(items, 1))
+        )
+        with get_metrics().track("summarize_packed") as call, llm.router.pinned(tier), \
+                budget.user(None if users is not None else budget.current_user()):
+            try:
+                parsed = parse_packed(llm.complete(
+                    prompt, "summary_packed", record=call, response_format=RESPONSE_FORMAT,
+                    max_tokens=min(PACKED_TOKENS_PER_EMAIL * len(items), llm.settings("summary_packed")[1])
+                ))
+            except Exception as e:
+                print(f"Error in packed summarization: {str(e)}")
+                call.error = True
+                parsed = None
+        
+        if users is not None:
+            # Each user pays for the pack in proportion to the size of their emails in it
+            used = call.prompt_tokens + call.completion_tokens
+            weights = [count_tokens(text) for _, text, _, _ in items]
+            for (index, _, _, _), weight in zip(items, weights):
+                budget.charge(users[index], round(used * weight / max(1, sum(weights))))
+        if parsed is None:
+            return {}
+        
+        summaries = {}
+        for n, (index, _, cache, cache_key) in enumerate(items, 1):
+            summary = parsed.get(f"E{n}")
+            if summary is not None:
+                summaries[index] = llm.store(cache, cache_key, summary.to_text())
+        return summaries
+    
+    def map_reduce(self, email_content: str) -> Tuple[str, List[str]]:
+        """
+        Summarize a long email by summarizing token-budgeted chunks in
+        parallel and combining them into the six-section format.
+        
+        Args:
+            email_content: The full email text to summarize
             
-            return response.choices[0].message.content
+        Returns:
+            Tuple of (final summary, per-chunk summaries)
+        """
+        llm = get_llm_client()
+        if not llm.available:
+            return self._get_fallback_summary(email_content), []
+        # The whole email picks the model tier, not each chunk
+        with llm.router.route(email_content):
+            partials = self._map(email_content)
+            summary = self._generate(REDUCE_PROMPT_TEMPLATE, **self._reduce_fields(email_content, partials))
+        return summary, partials
+    
+    async def amap_reduce(self, email_content: str) -> Tuple[str, List[str]]:
+        """Async variant of map_reduce; chunks are summarized concurrently on the event loop."""
+        llm = get_llm_client()
+        if not llm.available:
+            return self._get_fallback_summary(email_content), []
+        with llm.router.route(email_content):
+            return await self._amap_reduce(email_content)
+    
+    async def _amap_reduce(self, email_content: str) -> Tuple[str, List[str]]:
+        """Map and reduce phases of amap_reduce."""
+        chunks = chunk_email(email_content, self.chunk_tokens)
+        semaphore = asyncio.Semaphore(self.map_concurrency)
+        
+        async def summarize_chunk(part: int, chunk: str) -> str:
+            async with semaphore:
+                return await self._agenerate(CHUNK_PROMPT_TEMPLATE, **self._chunk_fields(part, len(chunks), chunk))
+        
+        partials = list(await asyncio.gather(*(summarize_chunk(i, c) for i, c in enumerate(chunks, 1))))
+        summary = await self._agenerate(REDUCE_PROMPT_TEMPLATE, **self._reduce_fields(email_content, partials))
+        return summary, partials
+    
+    def _map(self, email_content: str) -> List[str]:
+        """Summarize each chunk of a long email on a bounded thread pool."""
+        chunks = chunk_email(email_content, self.chunk_tokens)
+        # Each chunk runs in a copy of the caller's context so that fallbacks
+        # are reported to the enclosing metrics call
+        with ThreadPoolExecutor(max_workers=max(1, min(self.map_concurrency, len(chunks)))) as executor:
+            return list(executor.map(
+                lambda args: args[0].run(self._generate, CHUNK_PROMPT_TEMPLATE, **self._chunk_fields(*args[1:])),
+                [(contextvars.copy_context(), i, len(chunks), chunk) for i, chunk in enumerate(chunks, 1)]
+            ))
+    
+    @staticmethod
+    def _chunk_fields(part: int, total: int, chunk: str) -> Dict[str, str]:
+        return {"email_content": chunk, "part": str(part), "total": str(total)}
+    
+    @staticmethod
+    def _reduce_fields(email_content: str, partials: List[str]) -> Dict[str, str]:
+        # The original email is kept so a failed reduce can fall back on it
+        partial_summaries = "\n\n".join(f"PART {i}:\n{p}" for i, p in enumerate(partials, 1))
+        return {"partial_summaries": partial_summaries, "total": str(len(partials)), "email_content": email_content}
+    
+    def refine_sections(self, sections: str, points: str, excerpts: str) -> str:
+        """
+        Revise selected summary sections so that they address review points.
+        
+        Only the affected sections, the actionable points and the matching
+        email excerpts are sent, so the prompt stays small on every round.
+        
+        Args:
+            sections: The sections to revise, with their headings
+            points: The actionable review points, one per line
+            excerpts: The parts of the email relevant to the points
             
-        except Exception as e:
-            print(f"Error in summarization: {str(e)}")
-            return self._get_fallback_summary(email_content)
+        Returns:
+            The revised sections, with their headings
+        """
+        return self._generate(
+            REFINE_SECTIONS_PROMPT_TEMPLATE, required_sections=len(split_sections(sections)),
+            sections=sections, points=points, email_content=excerpts
+        )
+    
+    async def arefine_sections(self, sections: str, points: str, excerpts: str) -> str:
+        """Async variant of refine_sections."""
+        return await self._agenerate(
+            REFINE_SECTIONS_PROMPT_TEMPLATE, required_sections=len(split_sections(sections)),
+            sections=sections, points=points, email_content=excerpts
+        )
+    
+    def update_thread(self, thread_summary: str, new_message: str) -> str:
+        """
+        Fold a new message into a thread's rolling summary.
+        
+        Only the previous summary and the new message are sent, so the cost
+        depends on the size of the new message, not of the whole thread.
+        
+        Args:
+            thread_summary: The current summary of the thread
+            new_message: The new message, without quoted history
+            
+        Returns:
+            The updated thread summary
+        """
+        # A very long new message is condensed first so the update stays bounded
+        if self.needs_map_reduce(new_message):
+            new_message = self.map_reduce(new_message)[0]
+        return self._generate(THREAD_UPDATE_PROMPT_TEMPLATE, thread_summary=thread_summary, email_content=new_message)
+    
+    def _generate(self, template: str, required_sections: Optional[int] = None, **fields: str) -> str:
+        """
+        Render template with fields and complete it, using the cache when
+        possible; required_sections sizes max_tokens when it varies.
+        """
+        llm = get_llm_client()
+        with get_metrics().track(STAGES[template]) as call, llm.router.route(fields["email_content"]):
+            try:
+                # Check if API key is available
+                if not llm.available:
+                    call.fallback = True
+                    return self._get_fallback_summary(fields["email_content"])
+                
+                cache, cache_key, cached = llm.lookup(template, TASKS.get(template, "summary"), *fields.values())
+                if cached is not None:
+                    call.cache_hit = True
+                    return cached
+                
+                # Use the shared LLM client, which retries rate limits and transient errors
+                return llm.store(cache, cache_key, llm.complete(
+                    template.format(**fields), TASKS.get(template, "summary"), record=call, sections=required_sections
+                ))
+                
+            except BudgetExceeded:
+                # A budget refusal is the caller's to report, not a reason for fallback text
+                raise
+            except Exception as e:
+                print(f"Error in summarization: {str(e)}")
+                call.fallback = True
+                return self._get_fallback_summary(fields["email_content"])
+    
+    async def _agenerate(self, template: str, required_sections: Optional[int] = None, **fields: str) -> str:
+        """Async variant of _generate using litellm.acompletion."""
+        llm = get_llm_client()
+        with get_metrics().track(STAGES[template]) as call, llm.router.route(fields["email_content"]):
+            try:
+                if not llm.available:
+                    call.fallback = True
+                    return self._get_fallback_summary(fields["email_content"])
+                
+                cache, cache_key, cached = llm.lookup(template, TASKS.get(template, "summary"), *fields.values())
+                if cached is not None:
+                    call.cache_hit = True
+                    return cached
+                
+                return llm.store(cache, cache_key, await llm.acomplete(
+                    template.format(**fields), TASKS.get(template, "summary"), record=call, sections=required_sections
+                ))
+                
+            except BudgetExceeded:
+                # A budget refusal is the caller's to report, not a reason for fallback text
+                raise
+            except Exception as e:
+                print(f"Error in summarization: {str(e)}")
+                call.fallback = True
+                return self._get_fallback_summary(fields["email_content"])
+    
+    def summarize_local(self, email_content: str) -> str:
+        """
+        Summarize an email locally, without an LLM call.
+        
+        Key points are ranked with TextRank and dates, deadlines, action
+        items and open decisions are matched with patterns, so this takes
+        milliseconds and works offline.
+        
+        Args:
+            email_content: The email text to summarize
+            
+        Returns:
+            A summary in the same six-section format
+        """
+        with get_metrics().track("summarize_local"):
+            return EmailSummary(**extract_summary(email_content)).to_text()
     
     def _get_fallback_summary(self, email_content: str) -> str:
         """
-        Provide a basic summary when API is unavailable.
+        Provide a local extractive summary when the API is unavailable.
         
         Args:
             email_content: The email text
             
         Returns:
-            A basic summary
+            The local summary, marked as such
         """
-        # Simple fallback logic
-        lines = email_content.strip().split('\n')
-        word_count = len(email_content.split())
-        
-        return f"""**FALLBACK SUMMARY (API Key Missing)**
-
-MAIN TOPIC: Email regarding various matters
-
-KEY POINTS:
-• Email contains {word_count} words
-• {len(lines)} lines of text
-• Unable to process with AI - please configure GEMINI_API_KEY
-
-ACTION ITEMS:
-• Configure your Gemini API key in .env file
-• Restart the application
-
-TONE/URGENCY: Unable to assess without API access
+        return f"""**OFFLINE SUMMARY (AI service unavailable)**
+Extracted from the email without AI; add a GEMINI_API_KEY or retry later for an AI summary.
 
-Note: This is a fallback summary. For AI-powered summaries, please add your Gemini API key."""
\ No newline at end of file
+{self.summarize_local(email_content)}"""
\ No newline at end of file
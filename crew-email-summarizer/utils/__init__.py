@@ -0,0 +1,8 @@
+"""
+Utilities package for CrewAI email summarizer.
+"""
+
+from .cache import SummaryCache, get_cache
+from .ingestion import ParsedEmail, iter_emails
+
+__all__ = ['SummaryCache', 'get_cache', 'ParsedEmail', 'iter_emails']
@@ -0,0 +1,154 @@
+"""
+Micro-Batching
+This module coalesces requests that arrive close together into small batches.
+A dispatcher thread collects what arrives within max_wait_s of the first
+request (up to max_batch_size), answers identical requests of a batch once,
+and hands each batch to a process function on a bounded pool. Callers get a
+Future; once max_pending requests are waiting or running, submit raises
+queue.Full so a server can shed load instead of queueing without limit.
+"""
+
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.metrics import get_metrics
+
+
+class MicroBatcher:
+    """Bounded request queue that dispatches requests in coalesced batches."""
+    
+    def __init__(self, process_batch: Callable[[str, List[Any], List[List[Any]]], List[Any]], max_batch_size: int = 16,
+                 max_wait_s: float = 0.005, max_pending: int = 64, concurrency: int = 4):
+        """
+        Args:
+            process_batch: Called as process_batch(kind, payloads, owners)
+                with the distinct payloads of one kind and, for each, the
+                owners of the requests coalesced into it, in arrival order;
+                returns one result per payload, in order. A result that is
+                an Exception fails only its requests
+            max_batch_size: Maximum number of requests collected into a batch
+            max_wait_s: How long to wait after the first request for more;
+                0 takes only what is already queued
+            max_pending: Maximum number of requests queued or being processed
+            concurrency: Number of batches processed at the same time
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_s
+        self.max_pending = max_pending
+        self.concurrency = concurrency
+        
+        self._queue: "queue.Queue[Optional[Tuple[str, str, Any, Any, Future, float]]]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="email-batch")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {"requests": 0, "rejected": 0, "batches": 0, "batched_requests": 0, "coalesced": 0}
+        self._dispatcher = threading.Thread(target=self._dispatch, name="email-batcher", daemon=True)
+        self._dispatcher.start()
+    
+    def submit(self, kind: str, payload: Any, owner: Any = None) -> Future:
+        """
+        Queue one request.
+        
+        Args:
+            kind: Request type; only requests of the same kind share a batch
+            payload: JSON-serializable request body; equal payloads of the
+                same kind in one batch are processed once, whoever sent them
+            owner: Who sent the request (e.g. a user id), passed on to
+                process_batch; not part of what makes requests equal
+            
+        Returns:
+            A Future resolved with the request's result
+            
+        Raises:
+            queue.Full: If max_pending requests are already queued or running
+        """
+        key = json.dumps(payload, sort_keys=True)
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise queue.Full(f"{self._pending} requests are already queued or running")
+            self._pending += 1
+            self._stats["requests"] += 1
+        future: Future = Future()
+        self._queue.put((kind, key, payload, owner, future, time.perf_counter()))
+        return future
+    
+    def _dispatch(self) -> None:
+        """Collect batches from the queue and hand them to the pool until closed."""
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            closing = False
+            deadline = time.perf_counter() + self.max_wait_s
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+            
+            # One batch per kind, with identical requests sharing one entry
+            now = time.perf_counter()
+            groups: Dict[str, Dict[str, Tuple[Any, List[Future], List[Any]]]] = {}
+            for kind, key, payload, owner, future, queued_at in batch:
+                get_metrics().observe("batch_queue_wait", now - queued_at)
+                _, futures, owners = groups.setdefault(kind, {}).setdefault(key, (payload, [], []))
+                futures.append(future)
+                owners.append(owner)
+            for kind, entries in groups.items():
+                self._executor.submit(self._run, kind, list(entries.values()))
+            if closing:
+                return
+    
+    def _run(self, kind: str, entries: List[Tuple[Any, List[Future], List[Any]]]) -> None:
+        """Process one batch and resolve the futures of its requests."""
+        payloads = [payload for payload, _, _ in entries]
+        start = time.perf_counter()
+        try:
+            results = self.process_batch(kind, payloads, [owners for _, _, owners in entries])
+            if len(results) != len(payloads):
+                raise ValueError(f"process_batch returned {len(results)} results for {len(payloads)} requests")
+        except Exception as e:
+            print(f"Error in {kind} batch: {str(e)}")
+            results = [e] * len(payloads)
+        get_metrics().observe(f"batch_{kind}", time.perf_counter() - start)
+        
+        requests = 0
+        for (_, futures, _), result in zip(entries, results):
+            requests += len(futures)
+            for future in futures:
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        with self._lock:
+            self._pending -= requests
+            self._stats["batches"] += 1
+            self._stats["batched_requests"] += requests
+            self._stats["coalesced"] += requests - len(entries)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return request, batch and rejection counts and the current load."""
+        with self._lock:
+            stats = dict(self._stats, pending=self._pending, max_pending=self.max_pending)
+        stats["mean_batch_size"] = stats["batched_requests"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+    
+    def close(self, wait: bool = True) -> None:
+        """Stop the dispatcher; requests already dispatched still finish."""
+        self._queue.put(None)
+        self._dispatcher.join()
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,232 @@
+"""
+Token Budgets
+This module accounts for tokens before requests are sent. Every LLM call
+reserves its prompt tokens plus max_tokens against a per-request limit and,
+inside a user() block, against that user's rolling budget; the reservation
+is settled with the tokens actually used once the call returns. Requests
+that do not fit are refused with BudgetExceeded before anything is sent.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterator, List, Optional
+
+
+REQUEST, USER, EMAIL = "request", "user", "email"
+
+# Longest time between sweeps that drop users without usage in the window
+SWEEP_INTERVAL_S = 60.0
+
+_current_user: ContextVar[Optional[str]] = ContextVar("current_user", default=None)
+
+
+class BudgetExceeded(ValueError):
+    """A request or email does not fit its token budget; nothing was sent."""
+    
+    def __init__(self, message: str, reason: str):
+        """
+        Args:
+            message: What did not fit
+            reason: "request", "user" or "email", the limit that was hit
+        """
+        super().__init__(message)
+        self.reason = reason
+
+
+@dataclass
+class Reservation:
+    """Tokens held for one request; set used to the tokens it actually used."""
+    
+    user: Optional[str]
+    tokens: int
+    used: Optional[int] = None
+
+
+class _UserUsage:
+    """Token usage of one user within the rolling window."""
+    
+    def __init__(self):
+        # [timestamp, tokens] entries; reservations are corrected when settled
+        self.entries: Deque[List[float]] = deque()
+        self.total = 0
+    
+    def prune(self, cutoff: float) -> None:
+        while self.entries and self.entries[0][0] < cutoff:
+            self.total -= self.entries.popleft()[1]
+
+
+class TokenBudget:
+    """Per-request token limit and rolling per-user token budgets."""
+    
+    def __init__(self, max_request_tokens: int = 16000, user_tokens: int = 500000, window_s: float = 3600.0,
+                 max_email_tokens: int = 32000):
+        """
+        Args:
+            max_request_tokens: Largest request (prompt plus max_tokens); 0 = no limit
+            user_tokens: Tokens a user may use per window; 0 = no limit
+            window_s: Length of the rolling window in seconds
+            max_email_tokens: Largest email accepted after compaction; 0 = no limit
+        """
+        self.max_request_tokens = max_request_tokens
+        self.user_tokens = user_tokens
+        self.window_s = window_s
+        self.max_email_tokens = max_email_tokens
+        self._users: Dict[str, _UserUsage] = {}
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+    
+    @staticmethod
+    @contextmanager
+    def user(user_id: Optional[str]) -> Iterator[Optional[str]]:
+        """Charge the LLM calls made in the enclosed block to user_id (None: no user budget)."""
+        token = _current_user.set(user_id)
+        try:
+            yield user_id
+        finally:
+            try:
+                _current_user.reset(token)
+            except ValueError:
+                # A streaming generator closed from another context
+                pass
+    
+    @staticmethod
+    def current_user() -> Optional[str]:
+        return _current_user.get()
+    
+    def used(self, user_id: Optional[str] = None) -> int:
+        """Tokens used and reserved by a user (default: the current one) within the window."""
+        user_id = user_id if user_id is not None else self.current_user()
+        if user_id is None:
+            return 0
+        with self._lock:
+            usage = self._users.get(user_id)
+            if usage is None:
+                return 0
+            usage.prune(time.monotonic() - self.window_s)
+            if not usage.entries:
+                del self._users[user_id]
+            return usage.total
+    
+    def remaining(self, user_id: Optional[str] = None) -> Optional[int]:
+        """Tokens a user (default: the current one) has left, or None without a limit or user."""
+        user_id = user_id if user_id is not None else self.current_user()
+        if user_id is None or not self.user_tokens:
+            return None
+        return max(0, self.user_tokens - self.used(user_id))
+    
+    def check(self, tokens: int) -> None:
+        """
+        Refuse work estimated at tokens that the current user's budget cannot cover.
+        
+        Raises:
+            BudgetExceeded: If the user has fewer than tokens left
+        """
+        remaining = self.remaining()
+        if remaining is not None and tokens > remaining:
+            raise BudgetExceeded(
+                f"needs about {tokens} tokens but only {remaining} of the {self.user_tokens}-token budget are left",
+                USER
+            )
+    
+    @contextmanager
+    def reserve(self, tokens: int) -> Iterator[Reservation]:
+        """
+        Hold tokens for one request for the duration of the block.
+        
+        Set the yielded reservation's used to the tokens the request really
+        used; if it is left unset (e.g. the request failed) nothing is charged.
+        
+        Raises:
+            BudgetExceeded: If the request is over the per-request limit or
+                the current user's remaining budget
+        """
+        if self.max_request_tokens and tokens > self.max_request_tokens:
+            raise BudgetExceeded(f"request of {tokens} tokens is over the {self.max_request_tokens}-token limit", REQUEST)
+        
+        user_id = self.current_user()
+        entry = None
+        if user_id is not None and self.user_tokens:
+            with self._lock:
+                self._sweep()
+                usage = self._users.setdefault(user_id, _UserUsage())
+                usage.prune(time.monotonic() - self.window_s)
+                if usage.total + tokens > self.user_tokens:
+                    raise BudgetExceeded(
+                        f"request of {tokens} tokens is over the {max(0, self.user_tokens - usage.total)} tokens left in the budget",
+                        USER
+                    )
+                entry = [time.monotonic(), tokens]
+                usage.entries.append(entry)
+                usage.total += tokens
+        
+        reservation = Reservation(user=user_id, tokens=tokens)
+        try:
+            yield reservation
+        finally:
+            if entry is not None:
+                used = reservation.used or 0
+                with self._lock:
+                    usage = self._users.get(user_id)
+                    # The entry may have left the window while the request ran
+                    if usage is not None and any(e is entry for e in usage.entries):
+                        usage.total += used - entry[1]
+                        entry[1] = used
+    
+    def charge(self, user_id: Optional[str], tokens: int) -> None:
+        """Charge a user for tokens used outside reserve(), e.g. their share of a request shared with other users."""
+        if user_id is None or not self.user_tokens or tokens <= 0:
+            return
+        with self._lock:
+            self._sweep()
+            usage = self._users.setdefault(user_id, _UserUsage())
+            usage.entries.append([time.monotonic(), tokens])
+            usage.total += tokens
+    
+    def _sweep(self) -> None:
+        """Forget users without usage in the window, so one-off callers do not pile up (call with the lock held)."""
+        now = time.monotonic()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + min(self.window_s, SWEEP_INTERVAL_S)
+        for user_id, usage in list(self._users.items()):
+            usage.prune(now - self.window_s)
+            if not usage.entries:
+                del self._users[user_id]
+    
+    def check_email(self, tokens: int) -> None:
+        """
+        Refuse an email that is too long to process.
+        
+        Raises:
+            BudgetExceeded: If the email is over max_email_tokens
+        """
+        if self.max_email_tokens and tokens > self.max_email_tokens:
+            raise BudgetExceeded(f"email of {tokens} tokens is over the {self.max_email_tokens}-token limit", EMAIL)
+
+
+_default_budget: Optional[TokenBudget] = None
+_default_budget_lock = threading.Lock()
+
+
+def get_token_budget() -> TokenBudget:
+    """
+    Return the process-wide token budget.
+    
+    Configured through EMAIL_MAX_REQUEST_TOKENS, EMAIL_USER_TOKEN_BUDGET,
+    EMAIL_USER_BUDGET_WINDOW (seconds) and EMAIL_MAX_EMAIL_TOKENS (0 = no limit).
+    """
+    global _default_budget
+    with _default_budget_lock:
+        if _default_budget is None:
+            _default_budget = TokenBudget(
+                max_request_tokens=int(os.getenv("EMAIL_MAX_REQUEST_TOKENS", "16000")),
+                user_tokens=int(os.getenv("EMAIL_USER_TOKEN_BUDGET", "500000")),
+                window_s=float(os.getenv("EMAIL_USER_BUDGET_WINDOW", "3600")),
+                max_email_tokens=int(os.getenv("EMAIL_MAX_EMAIL_TOKENS", "32000"))
+            )
+        return _default_budget
@@ -0,0 +1,210 @@
+"""
+Summary Cache
+This module provides a content-addressed cache for LLM outputs, with a bounded
+in-process LRU tier in front of a persistent SQLite tier.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_cache.sqlite3")
+# Writes between evictions of the disk tier; it may exceed max_entries by this many in between
+EVICTION_INTERVAL = 100
+
+
+def normalize_text(text: str) -> str:
+    """Normalize line endings and whitespace so trivially different copies share a key."""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.split("\n")]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+class SummaryCache:
+    """Two-tier (memory LRU + SQLite) cache for summaries and reviews."""
+    
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_CACHE_PATH,
+        memory_size: int = 256,
+        max_entries: int = 10000,
+        ttl_seconds: Optional[float] = 7 * 24 * 3600
+    ):
+        """
+        Args:
+            path: SQLite file for the disk tier, or None for memory only
+            memory_size: Maximum number of entries kept in the in-process LRU
+            max_entries: Maximum number of entries kept on disk
+            ttl_seconds: Entry lifetime in seconds, or None to never expire
+        """
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        # Evict on the first write, in case the limits were lowered since the file was written
+        self._writes_until_eviction = 0
+        
+        self._db = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_created ON llm_cache (created_at)")
+            self._db.commit()
+    
+    @staticmethod
+    def make_key(template: str, model: str, temperature: float, *texts: str) -> str:
+        """
+        Build a content-addressed cache key.
+        
+        Args:
+            template: The prompt template the texts are rendered into
+            model: Model name the request is sent to
+            temperature: Sampling temperature of the request
+            *texts: The variable inputs of the prompt (email, summary, ...)
+            
+        Returns:
+            Hex SHA-256 digest identifying the request
+        """
+        digest = hashlib.sha256()
+        for part in (template, model, repr(float(temperature))) + tuple(normalize_text(t) for t in texts):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+            
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    if not self._expired(created_at, now):
+                        self._db.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember(key, value, created_at)
+                        self._stats["disk_hits"] += 1
+                        return value
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._db.commit()
+            
+            self._stats["misses"] += 1
+            return None
+    
+    def set(self, key: str, value: str) -> None:
+        """Store value under key in both tiers, evicting the oldest entries every EVICTION_INTERVAL writes."""
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self._stats["writes"] += 1
+            
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now)
+                )
+                self._writes_until_eviction -= 1
+                if self._writes_until_eviction <= 0:
+                    self._evict(now)
+                    self._writes_until_eviction = EVICTION_INTERVAL
+                self._db.commit()
+    
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then the least recently used ones over max_entries (call with the lock held)."""
+        if self.ttl_seconds is not None:
+            self._db.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        overflow = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            self._db.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,)
+            )
+            self._stats["evictions"] += overflow
+    
+    def clear(self) -> None:
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+    
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the current hit rate."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+    
+    def _remember(self, key: str, value: str, created_at: float) -> None:
+        """Insert into the memory tier, dropping the least recently used entry when full."""
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+    
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+
+_default_cache: Optional[SummaryCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[SummaryCache]:
+    """
+    Return the process-wide cache shared by all tools.
+    
+    Configured through EMAIL_CACHE_PATH, EMAIL_CACHE_MEMORY_SIZE,
+    EMAIL_CACHE_MAX_ENTRIES and EMAIL_CACHE_TTL (0 = never expire). Set EMAIL_CACHE_DISABLED=1
+    to turn caching off (returns None).
+    """
+    global _default_cache
+    if os.getenv("EMAIL_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            ttl = os.getenv("EMAIL_CACHE_TTL")
+            _default_cache = SummaryCache(
+                path=os.getenv("EMAIL_CACHE_PATH", DEFAULT_CACHE_PATH) or None,
+                memory_size=int(os.getenv("EMAIL_CACHE_MEMORY_SIZE", "256")),
+                max_entries=int(os.getenv("EMAIL_CACHE_MAX_ENTRIES", "10000")),
+                ttl_seconds=(float(ttl) or None) if ttl else 7 * 24 * 3600
+            )
+        return _default_cache
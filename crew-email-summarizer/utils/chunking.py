@@ -0,0 +1,108 @@
+"""
+Email Chunking
+This module splits long emails and threads into token-budgeted chunks along
+paragraph and quoted-reply boundaries for map-reduce summarization.
+"""
+
+import re
+from typing import List
+
+from utils.tokens import count_tokens
+
+
+# Lines that start an earlier message inside a thread
+REPLY_MARKERS = re.compile(
+    r"^(-{2,}\s*Original Message\s*-{2,}"
+    r"|-{2,}\s*Forwarded message\s*-{2,}"
+    r"|On .{1,200} wrote:\s*$"
+    r"|From:\s.+)",
+    re.IGNORECASE
+)
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """
+    Split text into paragraphs, also breaking where quoted ("> ") text starts
+    or stops and where an earlier message of the thread begins.
+    """
+    paragraphs: List[str] = []
+    current: List[str] = []
+    quoted = False
+    
+    def flush():
+        if current:
+            paragraphs.append("\n".join(current).strip())
+            current.clear()
+    
+    for line in text.replace("\r\n", "\n").split("\n"):
+        stripped = line.strip()
+        if not stripped:
+            flush()
+            continue
+        is_quoted = stripped.startswith(">")
+        if is_quoted != quoted or REPLY_MARKERS.match(stripped):
+            flush()
+        quoted = is_quoted
+        current.append(line)
+    flush()
+    return [p for p in paragraphs if p]
+
+
+def _split_oversized(paragraph: str, max_tokens: int) -> List[str]:
+    """Break a paragraph that exceeds the budget on sentence, then word, boundaries."""
+    pieces: List[str] = []
+    current = ""
+    for sentence in SENTENCE_END.split(paragraph):
+        candidate = f"{current} {sentence}".strip()
+        if current and count_tokens(candidate) > max_tokens:
+            pieces.append(current)
+            candidate = sentence
+        current = candidate
+        
+        # A single sentence can still be too long; fall back to words
+        while count_tokens(current) > max_tokens:
+            words = current.split()
+            keep = max(1, len(words) * max_tokens // max(count_tokens(current), 1))
+            pieces.append(" ".join(words[:keep]))
+            current = " ".join(words[keep:])
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_email(text: str, max_tokens: int) -> List[str]:
+    """
+    Split an email into chunks of at most max_tokens tokens.
+    
+    Paragraphs are packed greedily in order. When an earlier message of the
+    thread starts and the current chunk is already half full, a new chunk is
+    started so that chunks line up with messages where possible.
+    
+    Args:
+        text: The email or thread to split
+        max_tokens: Token budget per chunk
+        
+    Returns:
+        List of chunk texts, in original order
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    
+    for paragraph in split_paragraphs(text):
+        starts_message = bool(REPLY_MARKERS.match(paragraph))
+        for piece in _split_oversized(paragraph, max_tokens):
+            piece_tokens = count_tokens(piece)
+            overflow = current_tokens + piece_tokens > max_tokens
+            message_break = starts_message and current_tokens >= max_tokens // 2
+            if current and (overflow or message_break):
+                chunks.append("\n\n".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+            starts_message = False
+    
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
@@ -0,0 +1,204 @@
+"""
+Email Compaction
+This module strips what an LLM does not need from an email before any prompt
+is built: HTML markup and tracking pixels, quoted reply history, signatures,
+legal disclaimers, long tracking links and redundant whitespace. It reports
+how many bytes and tokens each rule removed.
+"""
+
+import html
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Tuple
+
+from utils.extractive import DATE, OBLIGATION
+from utils.tokens import count_tokens
+
+
+HTML_HINT = re.compile(r"<(html|body|div|p|br|table|span|font)\b", re.IGNORECASE)
+TRACKING_PIXEL = re.compile(
+    r"<img\b[^>]*(width=[\"']?[01]px[\"']?[^>]*height=[\"']?[01]|height=[\"']?[01]px[\"']?[^>]*width=[\"']?[01]|display:\s*none)[^>]*>",
+    re.IGNORECASE
+)
+
+# Lines that start the quoted history of a reply (forwarded messages are content, so they are kept).
+# A From/Sent (or Date) header block only counts after body text, see _strip_quoted
+QUOTE_HEADERS = re.compile(
+    r"^(-{2,}\s*Original Message\s*-{2,}"
+    r"|On .{1,200} wrote:\s*$"
+    r"|_{10,}\s*$"
+    r"|(?P<headers>From:\s.+\n(Sent|Date):\s))",
+    re.IGNORECASE | re.MULTILINE
+)
+FORWARD_MARKER = re.compile(r"^\s*(-{2,}\s*Forwarded message\s*-{2,}|Begin forwarded message:)\s*$", re.IGNORECASE)
+# The email's own "Name: value" header lines, e.g. a rendered ParsedEmail or a pasted Outlook message
+LEADING_HEADERS = re.compile(r"\A([ \t]*\n)*([A-Za-z][\w-]*:[^\n]*\n)+")
+QUOTED_LINE = re.compile(r"^\s*>.*$\n?", re.MULTILINE)
+
+# "-- " on its own line starts a signature (RFC 3676) when a few short lines follow it, not when it divides sections;
+# mobile clients add one-line footers
+SIGNATURE_DELIMITER = re.compile(r"^--\s*$", re.MULTILINE)
+SIGNATURE_MAX_LINES = 6
+SIGNATURE_MAX_LINE_CHARS = 80
+MOBILE_FOOTERS = re.compile(
+    r"^\s*(Sent from my \w+.*|Get Outlook for \w+.*|Sent from (Mail|Yahoo Mail|Outlook) for .*)$\n?",
+    re.IGNORECASE | re.MULTILINE
+)
+
+DISCLAIMER = re.compile(
+    r"\b(confidential(ity)? (notice|information)|intended (solely )?(only )?for the (use of the )?(individual|addressee|named recipient)"
+    r"|if you are not the intended recipient|privileged and/or confidential"
+    r"|(click|tap) here to unsubscribe|to unsubscribe from (this|these|our|future)|unsubscribe (here|at any time)"
+    r"|you are receiving this (e-?mail|message) because"
+    r"|consider the environment before printing|this (e-?mail|message) (and any attachments )?(may contain|is confidential))",
+    re.IGNORECASE
+)
+
+LONG_URL = re.compile(r"https?://([^/\s>]+)[^\s>)\]]{60,}")
+
+
+@dataclass
+class CompactionResult:
+    """A compacted email and what was removed from it."""
+    
+    text: str
+    original_bytes: int
+    original_tokens: int
+    compacted_tokens: int
+    removed_bytes: Dict[str, int] = field(default_factory=dict)
+    
+    @property
+    def compacted_bytes(self) -> int:
+        return len(self.text.encode("utf-8"))
+    
+    def stats(self) -> Dict[str, Any]:
+        """Bytes and tokens before and after, plus bytes removed per rule."""
+        return {
+            "original_bytes": self.original_bytes,
+            "compacted_bytes": self.compacted_bytes,
+            "bytes_removed": self.original_bytes - self.compacted_bytes,
+            "original_tokens": self.original_tokens,
+            "compacted_tokens": self.compacted_tokens,
+            "tokens_removed": self.original_tokens - self.compacted_tokens,
+            "removed_by_rule": dict(self.removed_bytes)
+        }
+
+
+def html_to_text(markup: str) -> str:
+    """Convert HTML to plain text, keeping line breaks at block boundaries."""
+    markup = re.sub(r"(?is)<(script|style|head)\b.*?</\1>", "", markup)
+    markup = re.sub(r"(?i)</(p|div|h[1-6]|table)>", "\n\n", markup)
+    markup = re.sub(r"(?i)<br\s*/?>|</(li|tr)>", "\n", markup)
+    return html.unescape(re.sub(r"<[^>]+>", "", markup))
+
+
+def normalize_whitespace(text: str) -> str:
+    """Unify line endings, strip trailing spaces and collapse runs of blank lines."""
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\u00a0", " ")
+    text = "\n".join(re.sub(r"[ \t]{2,}", " ", line).rstrip() for line in text.split("\n"))
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def _strip_html(text: str) -> str:
+    if not HTML_HINT.search(text):
+        return text
+    return html_to_text(TRACKING_PIXEL.sub("", text))
+
+
+def _strip_quoted(text: str) -> str:
+    # Cut at the first quote header that follows some body text; the email's own headers are not body text
+    leading = LEADING_HEADERS.match(text)
+    body_start = leading.end() if leading else 0
+    for match in QUOTE_HEADERS.finditer(text, body_start):
+        before = text[body_start:match.start()].strip()
+        if not before:
+            continue
+        # The headers of a forwarded message belong to the content that follows them
+        if match.group("headers") and FORWARD_MARKER.match(before.split("\n")[-1]):
+            continue
+        text = text[:match.start()]
+        break
+    return QUOTED_LINE.sub("", text)
+
+
+def _strip_signature(text: str) -> str:
+    text = MOBILE_FOOTERS.sub("", text)
+    match = None
+    for match in SIGNATURE_DELIMITER.finditer(text):
+        pass
+    # Only the last delimiter counts, only if it leaves the body intact and only if a signature follows it
+    if match is not None and text[:match.start()].strip() and _is_signature(text[match.end():]):
+        text = text[:match.start()]
+    return text
+
+
+def _is_signature(text: str) -> bool:
+    # A disclaimer below the signature is part of it
+    lines = [line.strip() for line in text.split("\n") if line.strip() and not DISCLAIMER.search(line)]
+    return len(lines) <= SIGNATURE_MAX_LINES and not any(
+        len(line) > SIGNATURE_MAX_LINE_CHARS or DATE.search(line) or OBLIGATION.search(line) for line in lines
+    )
+
+
+def _strip_disclaimers(text: str) -> str:
+    # Only the footer goes: disclaimers after the last content paragraph, the body may mention confidentiality too
+    paragraphs = re.split(r"\n\s*\n", text)
+    end = len(paragraphs)
+    while end and _is_footer(paragraphs[end - 1]):
+        end -= 1
+    return "\n\n".join(paragraphs[:end])
+
+
+def _is_footer(paragraph: str) -> bool:
+    return not paragraph.strip() or bool(DISCLAIMER.search(paragraph))
+
+
+def _shorten_links(text: str) -> str:
+    return LONG_URL.sub(lambda m: f"<link: {m.group(1)}>", text)
+
+
+# Applied in order; HTML goes first so that the other rules see plain text
+RULES: List[Tuple[str, Callable[[str], str]]] = [
+    ("html", _strip_html),
+    ("quoted_replies", _strip_quoted),
+    ("signature", _strip_signature),
+    ("disclaimers", _strip_disclaimers),
+    ("links", _shorten_links),
+    ("whitespace", normalize_whitespace)
+]
+
+
+def compact_email(text: str, keep_quoted: bool = False) -> CompactionResult:
+    """
+    Compact an email for prompting.
+    
+    Args:
+        text: The raw email text (plain text or HTML)
+        keep_quoted: Keep quoted reply history, e.g. when the thread is not
+            summarized message by message
+        
+    Returns:
+        The compacted text with per-rule statistics
+    """
+    original_bytes = len(text.encode("utf-8"))
+    removed: Dict[str, int] = {}
+    current = text
+    for name, rule in RULES:
+        if keep_quoted and name == "quoted_replies":
+            continue
+        compacted = rule(current)
+        removed[name] = len(current.encode("utf-8")) - len(compacted.encode("utf-8"))
+        current = compacted
+    
+    # Never hand the LLM an empty email because a rule was too eager
+    if not current.strip():
+        current = normalize_whitespace(text)
+        removed = {"whitespace": original_bytes - len(current.encode("utf-8"))}
+    
+    return CompactionResult(
+        text=current,
+        original_bytes=original_bytes,
+        original_tokens=count_tokens(text),
+        compacted_tokens=count_tokens(current),
+        removed_bytes=removed
+    )
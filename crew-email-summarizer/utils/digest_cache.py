@@ -0,0 +1,61 @@
+"""
+Digest Cache
+This module memoizes functions of an email's text for the stages that
+derive the same facts from the same email (token counts, content sentences,
+hints). Entries are keyed by a digest of the text rather than the text
+itself, so the cache does not keep email bodies alive, and the least
+recently used entry is evicted once maxsize are stored.
+"""
+
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, TypeVar
+
+
+T = TypeVar("T")
+
+
+def text_digest(text: str) -> bytes:
+    """A 16-byte BLAKE2b digest of text."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def digest_cache(maxsize: int) -> Callable[[Callable[[str], T]], Callable[[str], T]]:
+    """
+    Cache a function of one text argument under a digest of the text.
+    
+    Like functools.lru_cache, the wrapped function gets a cache_clear()
+    method. Results must be immutable, since callers share them.
+    
+    Args:
+        maxsize: Number of results kept
+    """
+    def decorator(function: Callable[[str], T]) -> Callable[[str], T]:
+        results: "OrderedDict[bytes, Any]" = OrderedDict()
+        lock = threading.Lock()
+        
+        @functools.wraps(function)
+        def wrapper(text: str) -> T:
+            key = text_digest(text)
+            with lock:
+                if key in results:
+                    results.move_to_end(key)
+                    return results[key]
+            
+            result = function(text)
+            with lock:
+                results[key] = result
+                if len(results) > maxsize:
+                    results.popitem(last=False)
+            return result
+        
+        def cache_clear():
+            with lock:
+                results.clear()
+        
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    
+    return decorator
@@ -0,0 +1,286 @@
+"""
+Extractive Summarization
+This module summarizes an email locally, in milliseconds and without an LLM:
+sentences are ranked with TextRank over TF-IDF vectors (NumPy), and dates,
+deadlines, action requests and open decisions are found with patterns. The
+result fills the same six sections as the LLM summaries.
+"""
+
+import re
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from utils.chunking import SENTENCE_END, split_paragraphs
+from utils.digest_cache import digest_cache
+
+
+MAX_SENTENCES = 800
+MAX_KEY_POINTS = 5
+MAX_LIST_ITEMS = 10
+MAX_ITEM_WORDS = 30
+DAMPING = 0.85
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between both but by
+can could did do does doing down during each few for from further had has have having he her here hers him his how
+i if in into is it its itself just let me more most my no nor not now of off on once only or other our ours out over
+own same she should so some such than that the their them then there these they this those through to too under
+until up very was we were what when where which while who whom why will with would you your yours hi hello thanks
+regards best dear team everyone please also just well like get got one two make sure need needs
+""".split())
+
+WORD = re.compile(r"[a-z][a-z0-9'-]+")
+HEADER_LINE = re.compile(r"^(from|to|cc|bcc|date|sent|subject|reply-to|message-id|in-reply-to|references):\s", re.IGNORECASE)
+SUBJECT_LINE = re.compile(r"^subject:\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+SUBJECT_PREFIX = re.compile(r"^((re|fw|fwd|aw)\s*:\s*)+", re.IGNORECASE)
+
+# Greetings, sign-offs and pleasantries carry no content
+BOILERPLATE = re.compile(
+    r"^(hi|hello|hey|dear|good (morning|afternoon|evening))\b[^.!?]{0,40}[,!]?$"
+    r"|^(best|kind|warm)?\s*(regards|wishes|thanks|thank you|cheers|sincerely)\b.{0,40}$"
+    r"|hope (this|the|you|your|all)\b.{0,40}(well|good|great)"
+    r"|(let me know|feel free to reach out|do not hesitate|don't hesitate) if you have any questions",
+    re.IGNORECASE
+)
+DISCOURSE_MARKER = re.compile(r"^(first(ly)?|second(ly)?|third(ly)?|finally|lastly|also|additionally|next|then|so|and)\s*,?\s+", re.IGNORECASE)
+
+MONTHS = r"(jan(uary)?|feb(ruary)?|mar(ch)?|apr(il)?|may|june?|july?|aug(ust)?|sep(t(ember)?)?|oct(ober)?|nov(ember)?|dec(ember)?)"
+WEEKDAYS = r"(mon|tues|wednes|thurs|fri|satur|sun)day"
+DATE = re.compile(
+    rf"\b({MONTHS}\.?\s+\d{{1,2}}(st|nd|rd|th)?(,?\s+\d{{4}})?"
+    rf"|\d{{1,2}}(st|nd|rd|th)?\s+(of\s+)?{MONTHS}\.?(,?\s+\d{{4}})?"
+    rf"|(in|by|during|until|early|mid|late)\s+(january|february|march|april|june|july|august|september|october|november|december)(?!\s*\d)"
+    r"|\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}(/\d{2,4})?"
+    rf"|(next|this|last)\s+{WEEKDAYS}|{WEEKDAYS}"
+    r"|tomorrow|today|tonight|end of (the )?(day|week|month|quarter|year)|eod|eow|next (week|month|quarter)|q[1-4])\b",
+    re.IGNORECASE
+)
+DEADLINE = re.compile(r"\b(by|before|due|no later than|deadline|until|cutoff|cut-off)\b", re.IGNORECASE)
+
+ACTION_VERBS = (
+    "please|kindly|make sure|ensure|send|submit|review|complete|update|prepare|schedule|confirm|share|provide|"
+    "remember|don't forget|do not forget|reply|respond|sign|book|check|finalize|finalise|flag|attend|join|read|"
+    "fill|register|approve|follow up|forward|call|email|let me know|let us know"
+)
+IMPERATIVE = re.compile(rf"^({ACTION_VERBS})\b", re.IGNORECASE)
+OBLIGATION = re.compile(
+    r"\b(needs? to|must|have to|has to|required to|action required|please|can you|could you|would you|"
+    r"will you|are expected to|is expected to)\b"
+    r"|\bneeds?\b[^.?!]*\b(by|before)\b",
+    re.IGNORECASE
+)
+DECISION = re.compile(
+    r"\b(decide|decision (is )?(needed|required|pending)|approve|approval|sign[- ]off|choose|vote|whether|go/no-go|"
+    r"should we|do we|can we|which option|your call|need your input)\b",
+    re.IGNORECASE
+)
+
+URGENT = re.compile(
+    r"\b(urgent(ly)?|asap|as soon as possible|immediately|critical|hard deadline|action required|time[- ]sensitive|"
+    r"right away|top priority|high priority|overdue)\b",
+    re.IGNORECASE
+)
+NEGATIVE = re.compile(r"\b(concern(s|ed)?|issue(s)?|problem(s)?|delay(s|ed)?|risk(s)?|unfortunately|disappoint\w*|complain\w*|escalat\w*|blocked|fail\w*)\b", re.IGNORECASE)
+POSITIVE = re.compile(r"\b(great|excellent|confident|pleased|happy|glad|excited|thank(s| you)|appreciate\w*|congratulations|well done)\b", re.IGNORECASE)
+
+
+@digest_cache(maxsize=256)
+def content_sentences(text: str) -> Tuple[str, ...]:
+    """
+    Split an email body into content sentences, dropping headers, quotes and boilerplate.
+    
+    Cached per text, since the summary and the hint extractor both split the same email.
+    """
+    sentences = []
+    for paragraph in split_paragraphs(text):
+        lines = [
+            line.strip() for line in paragraph.split("\n")
+            if line.strip() and not HEADER_LINE.match(line.strip()) and not line.strip().startswith(">")
+        ]
+        if not lines:
+            continue
+        for sentence in SENTENCE_END.split(" ".join(lines)):
+            sentence = sentence.strip()
+            if len(sentence.split()) >= 3 and not BOILERPLATE.search(sentence):
+                sentences.append(sentence)
+    return tuple(sentences[:MAX_SENTENCES])
+
+
+def _terms(sentence: str) -> List[str]:
+    return [w for w in WORD.findall(sentence.lower()) if w not in STOPWORDS]
+
+
+def rank_sentences(sentences: Sequence[str]) -> np.ndarray:
+    """
+    Score sentences with TextRank over TF-IDF cosine similarities.
+    
+    Args:
+        sentences: The sentences of one email, in order
+        
+    Returns:
+        One score per sentence; higher is more central to the email
+    """
+    n = len(sentences)
+    if n == 0:
+        return np.zeros(0)
+    
+    vocabulary: Dict[str, int] = {}
+    rows, columns = [], []
+    for i, sentence in enumerate(sentences):
+        for term in _terms(sentence):
+            rows.append(i)
+            columns.append(vocabulary.setdefault(term, len(vocabulary)))
+    counts = np.zeros((n, max(len(vocabulary), 1)), dtype=np.float32)
+    np.add.at(counts, (rows, columns), 1.0)
+    
+    # Sublinear TF with smoothed IDF, L2-normalized rows
+    idf = np.log((1.0 + n) / (1.0 + (counts > 0).sum(axis=0))) + 1.0
+    weights = np.log1p(counts) * idf
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    weights = np.divide(weights, norms, out=np.zeros_like(weights), where=norms > 0)
+    
+    similarity = weights @ weights.T
+    np.fill_diagonal(similarity, 0.0)
+    out_degree = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, out_degree, out=np.full_like(similarity, 1.0 / n), where=out_degree > 0)
+    
+    # Power iteration of PageRank on the similarity graph
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(100):
+        updated = (1.0 - DAMPING) / n + DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < 1e-6:
+            scores = updated
+            break
+        scores = updated
+    
+    # Emails front-load their point, so earlier sentences get a small boost
+    position = 1.0 + 0.3 / (1.0 + np.arange(n))
+    return scores * position
+
+
+def _shorten(text: str, words: int = MAX_ITEM_WORDS) -> str:
+    tokens = text.split()
+    return text if len(tokens) <= words else " ".join(tokens[:words]) + "..."
+
+
+def clean_item(sentence: str) -> str:
+    """Drop leading discourse markers and a trailing period."""
+    cleaned = DISCOURSE_MARKER.sub("", sentence).strip()
+    cleaned = cleaned[:1].upper() + cleaned[1:]
+    return _shorten(cleaned.rstrip("."))
+
+
+def _clause(sentence: str, start: int, end: int) -> str:
+    """Return the comma/semicolon-delimited clause around a match."""
+    left = max(sentence.rfind(",", 0, start), sentence.rfind(";", 0, start)) + 1
+    right_candidates = [i for i in (sentence.find(",", end), sentence.find(";", end)) if i != -1]
+    right = min(right_candidates) if right_candidates else len(sentence)
+    return clean_item(sentence[left:right].strip())
+
+
+def _dedupe(items: List[str], limit: int = MAX_LIST_ITEMS) -> List[str]:
+    seen, unique = set(), []
+    for item in items:
+        key = item.lower()
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique[:limit]
+
+
+def is_action(sentence: str) -> bool:
+    """Return True for requests and obligations (imperatives, "needs to ... by", "please", ...)."""
+    stripped = DISCOURSE_MARKER.sub("", sentence).strip()
+    return bool(IMPERATIVE.match(stripped) or OBLIGATION.search(stripped))
+
+
+def find_dates(sentences: Sequence[str]) -> List[Tuple[str, str, bool]]:
+    """
+    Find date expressions with their context.
+    
+    Returns:
+        (date text, clause around it, is_deadline) per date, in order of appearance
+    """
+    found = []
+    for sentence in sentences:
+        spans: List[List[int]] = []
+        for match in DATE.finditer(sentence):
+            # Adjacent expressions ("end of day tomorrow") are one date
+            if spans and match.start() - spans[-1][1] <= 1:
+                spans[-1][1] = match.end()
+            else:
+                spans.append([match.start(), match.end()])
+        for start, end in spans:
+            clause = _clause(sentence, start, end)
+            found.append((sentence[start:end], clause, bool(DEADLINE.search(clause))))
+    return found
+
+
+def _tone(text: str, deadlines: int) -> str:
+    urgent = len(URGENT.findall(text)) + text.count("!") // 2
+    if urgent >= 2 or (urgent and deadlines):
+        urgency = "High urgency"
+    elif urgent or deadlines:
+        urgency = "Moderate urgency"
+    else:
+        urgency = "Low urgency"
+    
+    negative, positive = len(NEGATIVE.findall(text)), len(POSITIVE.findall(text))
+    if negative > positive:
+        tone = "concerned tone"
+    elif positive > negative:
+        tone = "positive tone"
+    else:
+        tone = "neutral tone"
+    detail = f", {deadlines} deadline{'s' if deadlines != 1 else ''}" if deadlines else ""
+    return f"{urgency}{detail}; {tone}"
+
+
+def extract_summary(text: str, max_points: int = MAX_KEY_POINTS) -> Dict[str, Any]:
+    """
+    Summarize an email without an LLM.
+    
+    Args:
+        text: The email text (headers, if present, are used for the topic)
+        max_points: Maximum number of key points
+        
+    Returns:
+        The six summary sections as a dictionary with the fields of
+        tools.schemas.EmailSummary
+    """
+    sentences = content_sentences(text)
+    subject = SUBJECT_LINE.search(text)
+    if not sentences:
+        topic = SUBJECT_PREFIX.sub("", subject.group(1)).strip() if subject else "Empty or very short email"
+        return {"main_topic": topic, "key_points": [], "action_items": [], "decisions_needed": [],
+                "important_dates": [], "tone_urgency": _tone(text, 0)}
+    
+    scores = rank_sentences(sentences)
+    actions = [i for i, s in enumerate(sentences) if is_action(s)]
+    decisions = [i for i, s in enumerate(sentences) if DECISION.search(s) or s.rstrip().endswith("?")]
+    
+    # Key points: the best-ranked sentences that are not already listed as actions, in email order
+    count = int(min(max_points, max(2, round(np.sqrt(len(sentences))))))
+    order = [int(i) for i in np.argsort(-scores, kind="stable")]
+    candidates = [i for i in order if i not in actions] or order
+    key_points = [clean_item(sentences[i]) for i in sorted(candidates[:count])]
+    
+    dates = find_dates(sentences)
+    important_dates = _dedupe([f"{date}: {clause}" for date, clause, _ in dates])
+    deadlines = len({date.lower() for date, _, is_deadline in dates if is_deadline})
+    
+    if subject:
+        topic = SUBJECT_PREFIX.sub("", subject.group(1)).strip()
+    else:
+        topic = _shorten(clean_item(sentences[order[0]]), 15)
+    
+    return {
+        "main_topic": topic,
+        "key_points": _dedupe(key_points, count),
+        "action_items": _dedupe([clean_item(sentences[i]) for i in actions]),
+        "decisions_needed": _dedupe([clean_item(sentences[i]) for i in decisions if i not in actions] or
+                                    [clean_item(sentences[i]) for i in decisions]),
+        "important_dates": important_dates,
+        "tone_urgency": _tone(text, deadlines)
+    }
@@ -0,0 +1,376 @@
+"""
+Email Hints
+This module pre-extracts the facts a summary must get right, locally and
+deterministically: dates resolved against the email's Date header, deadlines,
+action items with their owners and due dates, and questions waiting on the
+reader. The facts are rendered as a compact block for the summary prompt,
+so the model can confirm them instead of working them out, and returned as
+plain data alongside the summary.
+"""
+
+import calendar
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from utils.digest_cache import digest_cache
+from utils.extractive import DATE, MAX_LIST_ITEMS, clean_item, content_sentences, find_dates, is_action
+
+
+DATE_HEADER = re.compile(r"^date:\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+
+MONTH_NUMBERS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+MONTH_NUMBERS.update({name[:3]: number for name, number in list(MONTH_NUMBERS.items())})
+WEEKDAY_NUMBERS = {name.lower(): number for number, name in enumerate(calendar.day_name)}
+
+MONTH_DAY = re.compile(r"^(?P<month>[a-z]+)\.?\s+(?P<day>\d{1,2})(st|nd|rd|th)?(,?\s+(?P<year>\d{4}))?$")
+DAY_MONTH = re.compile(r"^(?P<day>\d{1,2})(st|nd|rd|th)?\s+(of\s+)?(?P<month>[a-z]+)\.?(,?\s+(?P<year>\d{4}))?$")
+MONTH_ONLY = re.compile(r"^(?P<part>in|by|during|until|early|mid|late)\s+(?P<month>[a-z]+)$")
+NUMERIC = re.compile(r"^(?P<month>\d{1,2})/(?P<day>\d{1,2})(/(?P<year>\d{2,4}))?$")
+RELATIVE_WEEKDAY = re.compile(r"^((?P<which>next|this|last)\s+)?(?P<weekday>[a-z]+day)$")
+
+# Owners: "Sarah will ...", "The design team needs to ...", "I need everyone to ...", "Tom, please ..."
+SUBJECT_OWNER = re.compile(
+    r"^((and|but|also|then)\s+)?(?P<owner>I|we|you|everyone|everybody|(the\s+)?[A-Z][\w&-]*(\s+([A-Z][\w&-]*|team|department|group)){0,2})"
+    r"\s+(needs?\s+to|must|will|has\s+to|have\s+to|(is|are)\s+(expected|required)\s+to|should)\b"
+)
+OBJECT_OWNER = re.compile(
+    r"\b(need|want|ask|expect)(s|ing)?\s+(?P<owner>everyone|everybody|all of you|you|[A-Z][a-z]+(\s+[A-Z][a-z]+)?)\s+to\b"
+)
+VOCATIVE_OWNER = re.compile(r"^(?P<owner>[A-Z][a-z]+),\s+(please|can you|could you|would you)\b")
+OWNER_PREFIX = re.compile(
+    r"^((and|but|also|then)\s+)?([\w&-]+(\s+[\w&-]+){0,2}\s+(needs?\s+to|must|will|has\s+to|have\s+to|should)"
+    r"|I\s+(need|want|ask|expect)\s+\w+(\s+\w+)?\s+to|[A-Z][a-z]+,|please|kindly|(can|could|would|will) you)\s+",
+    re.IGNORECASE
+)
+DUE_PHRASE = re.compile(r"\s+(by|before|due|no later than|until|on|for|in)?\s*$", re.IGNORECASE)
+MAX_TASK_WORDS = 12
+CLAUSE_SPLIT = re.compile(r";\s*|,\s*(?:and|while|but)\s+(?=[A-Z])")
+
+# Questions and explicit asks wait on the reader
+REQUEST = re.compile(
+    r"\b(let (me|us) know|please (confirm|advise|reply|respond)|can you confirm|need your (input|approval|feedback|decision)"
+    r"|your (thoughts|approval|feedback) (on|by))\b",
+    re.IGNORECASE
+)
+
+
+@dataclass(frozen=True)
+class DateMention:
+    """A date expression, resolved to an ISO date when the reference date allows it."""
+    
+    text: str
+    date: Optional[str]
+    context: str
+    deadline: bool
+
+
+@dataclass(frozen=True)
+class ActionItem:
+    """Something someone has to do, with its owner and due date when stated."""
+    
+    task: str
+    owner: Optional[str]
+    due: Optional[str]
+    due_text: Optional[str]
+
+
+@dataclass(frozen=True)
+class EmailHints:
+    """The facts pre-extracted from one email."""
+    
+    reference_date: Optional[str]
+    dates: Tuple[DateMention, ...]
+    action_items: Tuple[ActionItem, ...]
+    requests: Tuple[str, ...]
+    
+    def __bool__(self) -> bool:
+        return bool(self.dates or self.action_items or self.requests)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the facts as JSON-serializable data."""
+        return {
+            "reference_date": self.reference_date,
+            "dates": [vars(mention).copy() for mention in self.dates],
+            "deadlines": [vars(mention).copy() for mention in self.dates if mention.deadline],
+            "action_items": [vars(item).copy() for item in self.action_items],
+            "requests": list(self.requests)
+        }
+    
+    def to_prompt(self) -> str:
+        """Render the facts as a compact block for a prompt, one fact per line."""
+        lines = []
+        if self.reference_date:
+            lines.append(f"SENT: {_with_weekday(self.reference_date)}")
+        # Dates already given as an action's due date are not repeated
+        due = {item.due_text.lower() for item in self.action_items if item.due_text}
+        dates = [mention for mention in self.dates if mention.text.lower() not in due]
+        if dates:
+            lines.append("DATES:")
+            for mention in dates:
+                resolved = f"{_with_weekday(mention.date)} " if mention.date else ""
+                kind = " (deadline)" if mention.deadline else ""
+                lines.append(f"- {resolved}\"{mention.text}\"{kind}: {_shorten(mention.context)}")
+        if self.action_items:
+            lines.append("ACTIONS:")
+            for item in self.action_items:
+                due = f" (due {item.due or item.due_text})" if item.due or item.due_text else ""
+                lines.append(f"- {item.owner or 'unassigned'}: {item.task}{due}")
+        # Requests that are also action items are listed once
+        requests = [request for request in self.requests if not is_action(request)]
+        if requests:
+            lines.append("QUESTIONS FOR THE READER:")
+            lines.extend(f"- {request}" for request in requests)
+        return "\n".join(lines)
+
+
+def _shorten(text: str, words: int = MAX_TASK_WORDS) -> str:
+    tokens = text.split()
+    return text if len(tokens) <= words else " ".join(tokens[:words]) + "..."
+
+
+def _with_weekday(iso: str) -> str:
+    return f"{iso} ({date.fromisoformat(iso).strftime('%a')})"
+
+
+def reference_date(text: str) -> Optional[date]:
+    """Return the date the email was sent, from its Date header, or None."""
+    header = DATE_HEADER.search(text)
+    if not header:
+        return None
+    value = header.group(1).strip()
+    try:
+        return parsedate_to_datetime(value).date()
+    except (TypeError, ValueError, IndexError):
+        pass
+    try:
+        return datetime.fromisoformat(value).date()
+    except ValueError:
+        return None
+
+
+def _month_end(year: int, month: int) -> date:
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _upcoming(reference: date, month: int, day: int) -> Optional[date]:
+    """The month/day on or after reference, allowing for dates a little in the past."""
+    try:
+        candidate = date(reference.year, month, day)
+    except ValueError:
+        return None
+    # "January 5" written in November is next year's
+    if candidate < reference - timedelta(days=90):
+        candidate = candidate.replace(year=reference.year + 1)
+    return candidate
+
+
+def _explicit(month: int, day: int, year: Optional[str], reference: Optional[date]) -> Optional[date]:
+    if year:
+        full_year = int(year) + 2000 if len(year) == 2 else int(year)
+        try:
+            return date(full_year, month, day)
+        except ValueError:
+            return None
+    return _upcoming(reference, month, day) if reference else None
+
+
+def resolve_date(expression: str, reference: Optional[date]) -> Optional[date]:
+    """
+    Resolve a date expression matched by utils.extractive.DATE.
+    
+    Expressions naming a period (a month, a week, a quarter) resolve to the
+    latest day they allow: weeks to their Friday, months and quarters to
+    their last day. Relative expressions need the reference date.
+    
+    Args:
+        expression: The date text, e.g. "October 15th", "next Friday", "EOD"
+        reference: The date the email was sent
+        
+    Returns:
+        The resolved date, or None if it cannot be resolved
+    """
+    text = " ".join(expression.lower().replace(",", ", ").split()).replace(" ,", ",")
+    
+    if re.fullmatch(r"\d{4}-\d{2}-\d{2}", text):
+        try:
+            return date.fromisoformat(text)
+        except ValueError:
+            return None
+    for pattern in (MONTH_DAY, DAY_MONTH):
+        match = pattern.match(text)
+        if match and match.group("month")[:3] in MONTH_NUMBERS:
+            return _explicit(MONTH_NUMBERS[match.group("month")[:3]], int(match.group("day")), match.group("year"), reference)
+    match = NUMERIC.match(text)
+    if match and 1 <= int(match.group("month")) <= 12:
+        return _explicit(int(match.group("month")), int(match.group("day")), match.group("year"), reference)
+    
+    if reference is None:
+        return None
+    
+    match = MONTH_ONLY.match(text)
+    if match and match.group("month")[:3] in MONTH_NUMBERS:
+        month = MONTH_NUMBERS[match.group("month")[:3]]
+        first = _upcoming(reference, month, 1)
+        if match.group("part") == "early":
+            return first.replace(day=10)
+        if match.group("part") == "mid":
+            return first.replace(day=15)
+        return _month_end(first.year, first.month)
+    
+    # Compound expressions ("end of day tomorrow") resolve on their most specific word
+    if "tomorrow" in text:
+        return reference + timedelta(days=1)
+    if text in ("today", "tonight", "eod") or text == "end of day" or text == "end of the day":
+        return reference
+    if text in ("eow", "end of week", "end of the week"):
+        return reference + timedelta(days=(4 - reference.weekday()) % 7)
+    if text == "next week":
+        return reference + timedelta(days=7 - reference.weekday() + 4)
+    if text in ("end of month", "end of the month"):
+        return _month_end(reference.year, reference.month)
+    if text == "next month":
+        year, month = (reference.year + 1, 1) if reference.month == 12 else (reference.year, reference.month + 1)
+        return _month_end(year, month)
+    if text in ("end of year", "end of the year"):
+        return date(reference.year, 12, 31)
+    
+    quarter = re.fullmatch(r"q([1-4])", text)
+    if quarter or text in ("end of quarter", "end of the quarter", "next quarter"):
+        number = int(quarter.group(1)) if quarter else (reference.month - 1) // 3 + 1 + (text == "next quarter")
+        year = reference.year + (number - 1) // 4
+        number = (number - 1) % 4 + 1
+        end = _month_end(year, number * 3)
+        # "Q1" written in Q4 is next year's
+        if quarter and end < reference - timedelta(days=90):
+            end = _month_end(year + 1, number * 3)
+        return end
+    
+    match = RELATIVE_WEEKDAY.match(text)
+    if match and match.group("weekday") in WEEKDAY_NUMBERS:
+        weekday = WEEKDAY_NUMBERS[match.group("weekday")]
+        if match.group("which") == "last":
+            return reference - timedelta(days=(reference.weekday() - weekday - 1) % 7 + 1)
+        if match.group("which") == "next":
+            return reference + timedelta(days=7 - reference.weekday() + weekday)
+        if match.group("which") == "this":
+            return reference + timedelta(days=weekday - reference.weekday())
+        # A bare weekday is the next one; "Monday" written on a Monday means next week
+        return reference + timedelta(days=(weekday - reference.weekday() - 1) % 7 + 1)
+    return None
+
+
+def _is_task(clause: str) -> bool:
+    return is_action(clause) or bool(SUBJECT_OWNER.search(clause))
+
+
+def _owner(clause: str) -> Optional[str]:
+    for pattern in (VOCATIVE_OWNER, OBJECT_OWNER, SUBJECT_OWNER):
+        match = pattern.search(clause)
+        if match:
+            owner = match.group("owner")
+            if owner.lower() in ("i", "we"):
+                return "sender"
+            if owner.lower() in ("everyone", "everybody", "all of you"):
+                return "everyone"
+            return "reader" if owner.lower() == "you" else owner
+    # Imperatives and "please ..." / "can you ..." are addressed to the reader
+    return "reader" if is_action(clause) else None
+
+
+def _due(clause: str, sentence: str, reference: Optional[date]) -> Tuple[Optional[str], Optional[str]]:
+    """The due date of an action clause, or of its sentence when the sentence names a single date."""
+    found = find_dates([clause]) or find_dates([sentence])
+    if not found or (len(found) > 1 and not DATE.search(clause)):
+        return None, None
+    # Past references ("as discussed last Tuesday") are not due dates
+    candidates = []
+    for text, _, is_deadline in found:
+        resolved = resolve_date(text, reference)
+        if text.lower().startswith("last ") or (resolved and reference and resolved < reference):
+            continue
+        candidates.append((text, resolved, is_deadline))
+    if not candidates:
+        return None, None
+    # A deadline ("by Friday") beats other dates in the same clause
+    due_text, resolved, _ = next((candidate for candidate in candidates if candidate[2]), candidates[0])
+    return (resolved.isoformat() if resolved else None), due_text
+
+
+def _task(clause: str, due_text: Optional[str]) -> str:
+    """Shorten an action clause to what has to be done: no owner, no "please", no due date."""
+    task = clause.strip().rstrip(".?!")
+    for _ in range(2):
+        task = OWNER_PREFIX.sub("", task, count=1)
+    if due_text and due_text in task:
+        head, _, tail = task.partition(due_text)
+        task = (DUE_PHRASE.sub("", head) + tail).strip(" ,;")
+    return _shorten(clean_item(task or clause))
+
+
+def _action_items(sentences: Sequence[str], reference: Optional[date]) -> List[ActionItem]:
+    items, seen = [], set()
+    for sentence in sentences:
+        if not (is_action(sentence) or SUBJECT_OWNER.search(sentence)):
+            continue
+        # Compound sentences assign work to several owners
+        clauses = [c.strip() for c in CLAUSE_SPLIT.split(sentence) if c.strip()]
+        actions = [c for c in clauses if _is_task(c)] or [sentence]
+        for clause in actions:
+            # Lead-ins ("As we approach Q4, ...") are not part of the task
+            parts = clause.split(", ")
+            start = next((i for i, part in enumerate(parts) if _is_task(part)), 0)
+            due, due_text = _due(clause, sentence, reference)
+            task = _task(", ".join(parts[start:]), due_text)
+            key = (task.lower(), due or due_text)
+            if key in seen:
+                continue
+            seen.add(key)
+            items.append(ActionItem(task=task, owner=_owner(clause), due=due, due_text=due_text))
+            if len(items) == MAX_LIST_ITEMS:
+                return items
+    return items
+
+
+@digest_cache(maxsize=256)
+def extract_hints(text: str) -> EmailHints:
+    """
+    Pre-extract dates, deadlines, action items and open questions from an email.
+    
+    Results are cached per text, since the summarizer and the pipeline both
+    ask for the hints of the same email.
+    
+    Args:
+        text: The email text; a "Date:" header, if present, anchors
+            relative dates such as "next Friday" or "tomorrow"
+            
+    Returns:
+        The extracted facts
+    """
+    reference = reference_date(text)
+    sentences = content_sentences(text)
+    
+    # Long emails stop at the list limit instead of scanning every sentence
+    dates, seen = [], set()
+    for sentence in sentences:
+        if len(dates) == MAX_LIST_ITEMS:
+            break
+        for expression, context, is_deadline in find_dates([sentence]):
+            resolved = resolve_date(expression, reference)
+            key = (resolved or expression.lower(), context.lower())
+            if key in seen or len(dates) == MAX_LIST_ITEMS:
+                continue
+            seen.add(key)
+            dates.append(DateMention(
+                text=expression, date=resolved.isoformat() if resolved else None, context=context, deadline=is_deadline
+            ))
+    
+    requests = [clean_item(s) for s in sentences if s.rstrip().endswith("?") or REQUEST.search(s)]
+    return EmailHints(
+        reference_date=reference.isoformat() if reference else None,
+        dates=tuple(dates),
+        action_items=tuple(_action_items(sentences, reference)),
+        requests=tuple(dict.fromkeys(requests))[:MAX_LIST_ITEMS]
+    )
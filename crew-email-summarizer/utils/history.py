@@ -0,0 +1,242 @@
+"""
+Processing History
+This module keeps the processing history in SQLite: one compact row per
+processed email (preview, content hashes, status, timings) that pages and
+counts read through indexes, with the full email, summary and review texts
+stored once per distinct text and loaded only when an entry is opened.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+DEFAULT_HISTORY_PATH = os.path.join(".cache", "history.sqlite3")
+PREVIEW_CHARS = 100
+
+_COLUMNS = "id, session_id, created_at, preview, email_hash, summary_hash, review_hash, status, fallback, model_tier, latency_s, time_to_first_token"
+
+
+@dataclass
+class HistoryEntry:
+    """One processed email, without its full texts."""
+    
+    entry_id: int
+    session_id: str
+    created_at: float
+    preview: str
+    email_hash: str
+    summary_hash: str
+    review_hash: str
+    status: str
+    fallback: bool
+    model_tier: str
+    latency_s: Optional[float]
+    time_to_first_token: Optional[float]
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class HistoryStore:
+    """Bounded SQLite history of processed emails with lazily loaded texts."""
+    
+    def __init__(self, path: Optional[str] = DEFAULT_HISTORY_PATH, max_entries: int = 10000):
+        """
+        Args:
+            path: SQLite file, or None to keep the history in memory only
+            max_entries: Maximum number of entries kept; the oldest are deleted
+        """
+        self.max_entries = max_entries
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                preview TEXT NOT NULL,
+                email_hash TEXT NOT NULL,
+                summary_hash TEXT NOT NULL,
+                review_hash TEXT NOT NULL,
+                status TEXT NOT NULL,
+                fallback INTEGER NOT NULL,
+                model_tier TEXT NOT NULL,
+                latency_s REAL,
+                time_to_first_token REAL
+            )"""
+        )
+        # Content-addressed: an email processed many times is stored once
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS history_texts (
+                hash TEXT PRIMARY KEY,
+                text TEXT NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_history_created ON history (created_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_history_session ON history (session_id, created_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_history_status ON history (status, created_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_history_session_status ON history (session_id, status, created_at)")
+        # Let evictions check whether a text is still referenced without scanning the table
+        for column in ("email_hash", "summary_hash", "review_hash"):
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS idx_history_{column} ON history ({column})")
+        self._db.commit()
+        self._lock = threading.Lock()
+    
+    def add(self, session_id: str, email_content: str, result: Dict[str, Any], latency_s: Optional[float] = None) -> int:
+        """
+        Record a processed email.
+        
+        Args:
+            session_id: The session (or client) that processed the email
+            email_content: The email text
+            result: The result dictionary of process_email or its variants
+            latency_s: End-to-end processing time, if measured
+            
+        Returns:
+            The id of the new entry
+        """
+        texts = (email_content, result.get("summary", ""), result.get("review", ""))
+        hashes = [_digest(text) for text in texts]
+        preview = " ".join(email_content.split())[:PREVIEW_CHARS]
+        with self._lock:
+            self._db.executemany("INSERT OR IGNORE INTO history_texts (hash, text) VALUES (?, ?)", zip(hashes, texts))
+            cursor = self._db.execute(
+                """INSERT INTO history (session_id, created_at, preview, email_hash, summary_hash, review_hash,
+                    status, fallback, model_tier, latency_s, time_to_first_token)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    session_id, time.time(), preview, *hashes,
+                    result.get("status", "success"), int(bool(result.get("fallback"))), result.get("model_tier", ""),
+                    latency_s, result.get("time_to_first_token")
+                )
+            )
+            # Ids only grow, so entries more than max_entries ids old are past the bound
+            if cursor.lastrowid > self.max_entries:
+                self._delete(" WHERE id <= ?", [cursor.lastrowid - self.max_entries])
+            self._db.commit()
+            return cursor.lastrowid
+    
+    @staticmethod
+    def _where(session_id: Optional[str], status: Optional[str], since: Optional[float]) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        if session_id is not None:
+            clauses.append("session_id = ?")
+            params.append(session_id)
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+    
+    def page(self, page: int = 0, page_size: int = 10, session_id: Optional[str] = None,
+             status: Optional[str] = None, since: Optional[float] = None) -> List[HistoryEntry]:
+        """
+        Return one page of entries, newest first.
+        
+        Args:
+            page: Zero-based page number
+            page_size: Entries per page
+            session_id: Only entries of this session
+            status: Only entries with this status ("success" or "error")
+            since: Only entries created at or after this Unix time
+            
+        Returns:
+            The entries of the page, without their full texts
+        """
+        where, params = self._where(session_id, status, since)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {_COLUMNS} FROM history{where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+                params + [page_size, page * page_size]
+            ).fetchall()
+        return [self._entry(row) for row in rows]
+    
+    def count(self, session_id: Optional[str] = None, status: Optional[str] = None, since: Optional[float] = None) -> int:
+        """Return the number of entries matching the filters of page."""
+        where, params = self._where(session_id, status, since)
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM history{where}", params).fetchone()[0]
+    
+    def latest(self, session_id: Optional[str] = None) -> Optional[HistoryEntry]:
+        """Return the most recent entry, or None if there is none."""
+        entries = self.page(page_size=1, session_id=session_id)
+        return entries[0] if entries else None
+    
+    def texts(self, entry_id: int, session_id: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """
+        Load the email, summary and review of an entry, or None if it no
+        longer exists (or, with session_id, belongs to another session).
+        """
+        query = """SELECT e.text, s.text, r.text FROM history h
+                JOIN history_texts e ON e.hash = h.email_hash
+                JOIN history_texts s ON s.hash = h.summary_hash
+                JOIN history_texts r ON r.hash = h.review_hash
+                WHERE h.id = ?"""
+        params: List[Any] = [entry_id]
+        if session_id is not None:
+            query += " AND h.session_id = ?"
+            params.append(session_id)
+        with self._lock:
+            row = self._db.execute(query, params).fetchone()
+        return dict(zip(("email", "summary", "review"), row)) if row is not None else None
+    
+    def clear(self, session_id: Optional[str] = None) -> None:
+        """Delete all entries, or those of one session, and texts no entry refers to any more."""
+        where, params = self._where(session_id, None, None)
+        with self._lock:
+            self._delete(where, params)
+            self._db.commit()
+    
+    def _delete(self, where: str, params: List[Any]) -> None:
+        """Delete the matching entries, then those of their texts no remaining entry refers to; call with the lock held."""
+        rows = self._db.execute(f"SELECT id, email_hash, summary_hash, review_hash FROM history{where}", params).fetchall()
+        if not rows:
+            return
+        self._db.executemany("DELETE FROM history WHERE id = ?", [(row[0],) for row in rows])
+        hashes = {text_hash for row in rows for text_hash in row[1:]}
+        self._db.executemany(
+            """DELETE FROM history_texts WHERE hash = ?
+                AND NOT EXISTS (SELECT 1 FROM history WHERE email_hash = ?)
+                AND NOT EXISTS (SELECT 1 FROM history WHERE summary_hash = ?)
+                AND NOT EXISTS (SELECT 1 FROM history WHERE review_hash = ?)""",
+            [(text_hash,) * 4 for text_hash in hashes]
+        )
+    
+    @staticmethod
+    def _entry(row: Tuple[Any, ...]) -> HistoryEntry:
+        values = list(row)
+        values[8] = bool(values[8])
+        return HistoryEntry(*values)
+
+
+_default_history: Optional[HistoryStore] = None
+_default_history_lock = threading.Lock()
+
+
+def get_history_store() -> HistoryStore:
+    """
+    Return the process-wide history store.
+    
+    Configured through EMAIL_HISTORY_PATH (empty = memory only) and
+    EMAIL_HISTORY_MAX_ENTRIES.
+    """
+    global _default_history
+    with _default_history_lock:
+        if _default_history is None:
+            _default_history = HistoryStore(
+                path=os.getenv("EMAIL_HISTORY_PATH", DEFAULT_HISTORY_PATH) or None,
+                max_entries=int(os.getenv("EMAIL_HISTORY_MAX_ENTRIES", "10000"))
+            )
+        return _default_history
@@ -0,0 +1,165 @@
+"""
+Email Ingestion
+This module streams emails out of mbox files, Maildir directories and .eml
+files with the stdlib email parser, one message at a time, so memory use does
+not depend on mailbox size.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from email import policy
+from email.message import EmailMessage
+from email.parser import BytesParser
+from typing import BinaryIO, Iterator, List, Optional
+
+from utils.compaction import html_to_text
+
+
+_parser = BytesParser(policy=policy.default)
+
+
+@dataclass
+class ParsedEmail:
+    """A normalized email: the headers the pipeline uses plus a plain-text body."""
+    
+    message_id: str = ""
+    subject: str = ""
+    sender: str = ""
+    to: str = ""
+    date: str = ""
+    in_reply_to: str = ""
+    references: List[str] = field(default_factory=list)
+    body: str = ""
+    source: str = ""
+    
+    def to_text(self) -> str:
+        """Render the email as the plain text the summarizer expects."""
+        headers = [
+            f"{name}: {value}" for name, value in (
+                ("Subject", self.subject), ("From", self.sender), ("To", self.to), ("Date", self.date)
+            ) if value
+        ]
+        return "\n".join(headers) + "\n\n" + self.body if headers else self.body
+
+
+def iter_emails(path: str) -> Iterator[ParsedEmail]:
+    """
+    Stream the emails stored at path.
+    
+    Args:
+        path: An mbox file, a Maildir directory (with cur/ and new/), a
+            directory of .eml files, or a single .eml file
+            
+    Yields:
+        ParsedEmail objects, one at a time
+    """
+    if os.path.isdir(path):
+        if os.path.isdir(os.path.join(path, "cur")) or os.path.isdir(os.path.join(path, "new")):
+            yield from iter_maildir(path)
+        else:
+            yield from iter_eml_directory(path)
+    elif path.lower().endswith(".eml"):
+        yield read_eml(path)
+    else:
+        yield from iter_mbox(path)
+
+
+def iter_mbox(path: str) -> Iterator[ParsedEmail]:
+    """
+    Stream messages from an mbox file without loading it whole.
+    
+    The file is read line by line and only the current message is buffered.
+    Messages start at lines beginning with "From "; mboxrd-escaped
+    ">From " lines in bodies are unescaped.
+    """
+    with open(path, "rb") as handle:
+        lines: List[bytes] = []
+        index = 0
+        for line in handle:
+            if line.startswith(b"From "):
+                if lines:
+                    yield _parse_lines(lines, f"{path}#{index}")
+                    index += 1
+                lines = []
+                continue
+            if re.match(rb"^>+From ", line):
+                line = line[1:]
+            lines.append(line)
+        if lines and any(l.strip() for l in lines):
+            yield _parse_lines(lines, f"{path}#{index}")
+
+
+def iter_maildir(path: str) -> Iterator[ParsedEmail]:
+    """Stream messages from the cur/ and new/ folders of a Maildir."""
+    for folder in ("new", "cur"):
+        directory = os.path.join(path, folder)
+        if not os.path.isdir(directory):
+            continue
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.startswith("."):
+                    with open(entry.path, "rb") as handle:
+                        yield _parse_file(handle, entry.path)
+
+
+def iter_eml_directory(path: str) -> Iterator[ParsedEmail]:
+    """Stream every .eml file below a directory."""
+    for root, _, files in os.walk(path):
+        for name in sorted(files):
+            if name.lower().endswith(".eml"):
+                yield read_eml(os.path.join(root, name))
+
+
+def read_eml(path: str) -> ParsedEmail:
+    """Parse a single .eml file."""
+    with open(path, "rb") as handle:
+        return _parse_file(handle, path)
+
+
+def parse_message(message: EmailMessage, source: str = "") -> ParsedEmail:
+    """
+    Convert a parsed email.message.EmailMessage into a ParsedEmail.
+    
+    Only the chosen body part is decoded; attachments are never read.
+    """
+    return ParsedEmail(
+        message_id=str(message.get("Message-ID", "")).strip(),
+        subject=str(message.get("Subject", "")).strip(),
+        sender=str(message.get("From", "")).strip(),
+        to=str(message.get("To", "")).strip(),
+        date=str(message.get("Date", "")).strip(),
+        in_reply_to=str(message.get("In-Reply-To", "")).strip(),
+        references=str(message.get("References", "")).split(),
+        body=_normalize_body(_extract_body(message)),
+        source=source
+    )
+
+
+def _parse_lines(lines: List[bytes], source: str) -> ParsedEmail:
+    return parse_message(_parser.parsebytes(b"".join(lines)), source)
+
+
+def _parse_file(handle: BinaryIO, source: str) -> ParsedEmail:
+    return parse_message(_parser.parse(handle), source)
+
+
+def _extract_body(message: EmailMessage) -> str:
+    """Decode the text/plain body, falling back to text/html with tags removed."""
+    part: Optional[EmailMessage] = message.get_body(preferencelist=("plain", "html"))
+    if part is None:
+        return ""
+    try:
+        content = part.get_content()
+    except (LookupError, UnicodeDecodeError):
+        payload = part.get_payload(decode=True) or b""
+        content = payload.decode("utf-8", errors="replace")
+    if part.get_content_subtype() == "html":
+        content = html_to_text(content)
+    return content
+
+
+def _normalize_body(text: str) -> str:
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = "\n".join(line.rstrip() for line in text.split("\n"))
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
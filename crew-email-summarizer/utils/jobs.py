@@ -0,0 +1,224 @@
+"""
+Job Queue
+This module runs summarization work in the background: submit returns a job
+ID at once, a fixed pool of worker threads runs the jobs in order, and
+callers poll the job for its status, timings and result. The number of
+waiting jobs is bounded, queued jobs can be cancelled, and finished jobs are
+kept only up to a limit, so many users can share one pool.
+"""
+
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.metrics import get_metrics
+
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+@dataclass
+class Job:
+    """A unit of background work and its progress."""
+    
+    job_id: str
+    kind: str
+    owner: str = ""
+    status: str = QUEUED
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+    
+    @property
+    def wait_s(self) -> Optional[float]:
+        """Seconds spent queued, so far if still waiting."""
+        end = self.started_at or (self.finished_at if self.status == CANCELLED else None) or time.time()
+        return end - self.submitted_at
+    
+    @property
+    def run_s(self) -> Optional[float]:
+        """Seconds spent running, so far if still running; None if it never started."""
+        if self.started_at is None:
+            return None
+        return (self.finished_at or time.time()) - self.started_at
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the job's status and timings, without its result."""
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "wait_s": self.wait_s,
+            "run_s": self.run_s,
+            "error": self.error
+        }
+
+
+class JobQueue:
+    """Bounded queue of jobs in front of a fixed pool of worker threads."""
+    
+    def __init__(self, workers: int = 4, max_pending: int = 32, max_finished: int = 256):
+        """
+        Args:
+            workers: Number of worker threads (jobs running at once)
+            max_pending: Maximum number of queued and running jobs; submit
+                raises queue.Full beyond it
+            max_finished: Finished jobs kept for polling; the oldest are dropped
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="email-job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+    
+    def submit(self, kind: str, function: Callable[..., Any], *args: Any, owner: str = "", **kwargs: Any) -> str:
+        """
+        Queue function(*args, **kwargs) and return its job ID without waiting.
+        
+        Args:
+            kind: What the job does, e.g. "summarize" or "refine"
+            function: The work to run on a worker thread
+            owner: Who submitted the job (a session or client ID), for listing
+            
+        Returns:
+            The job ID
+            
+        Raises:
+            queue.Full: If max_pending jobs are already queued or running
+        """
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if not job.finished)
+            if pending >= self.max_pending:
+                raise queue.Full(f"{pending} jobs are already queued or running")
+            job = Job(job_id=uuid.uuid4().hex[:12], kind=kind, owner=owner)
+            self._jobs[job.job_id] = job
+            self._futures[job.job_id] = self._executor.submit(self._run, job, function, args, kwargs)
+        return job.job_id
+    
+    def _run(self, job: Job, function: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> None:
+        with self._lock:
+            if job.status == CANCELLED:
+                return
+            job.status, job.started_at = RUNNING, time.time()
+        get_metrics().observe("job_queue_wait", job.started_at - job.submitted_at)
+        
+        try:
+            with get_metrics().track(f"job_{job.kind}"):
+                result = function(*args, **kwargs)
+            error = None
+        except Exception as e:
+            print(f"Error in background job {job.job_id}: {str(e)}")
+            result, error = None, str(e)
+        
+        with self._lock:
+            job.finished_at = time.time()
+            # A job cancelled while running finishes, but its result is dropped
+            if job.cancel_requested:
+                job.status = CANCELLED
+            elif error is not None:
+                job.status, job.error = FAILED, error
+            else:
+                job.status, job.result = DONE, result
+            self._futures.pop(job.job_id, None)
+            self._prune()
+    
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job.
+        
+        A queued job never runs. A running job cannot be interrupted, so it
+        runs to the end and its result is discarded.
+        
+        Returns:
+            True if the job was queued or running
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return False
+            job.cancel_requested = True
+            if job.status == QUEUED:
+                future = self._futures.pop(job_id, None)
+                if future is not None:
+                    future.cancel()
+                job.status, job.finished_at = CANCELLED, time.time()
+                self._prune()
+            return True
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job, or None if it is unknown or was pruned."""
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def jobs(self, owner: Optional[str] = None) -> List[Job]:
+        """Return the known jobs, newest first, optionally only those of one owner."""
+        with self._lock:
+            return [job for job in reversed(self._jobs.values()) if owner is None or job.owner == owner]
+    
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Job]:
+        """Block until a job has finished (or timeout seconds pass) and return it."""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                pass
+        return self.get(job_id)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of jobs per status and the pool size."""
+        with self._lock:
+            counts = {status: 0 for status in (QUEUED, RUNNING) + FINISHED}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return {"workers": self.workers, "max_pending": self.max_pending, **counts}
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers; queued jobs are cancelled."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+    
+    def _prune(self) -> None:
+        """Drop the oldest finished jobs beyond max_finished (caller holds the lock)."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+
+_default_queue: Optional[JobQueue] = None
+_default_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """
+    Return the process-wide job queue shared by all sessions.
+    
+    Configured through EMAIL_JOB_WORKERS, EMAIL_JOB_MAX_PENDING and
+    EMAIL_JOB_MAX_FINISHED.
+    """
+    global _default_queue
+    with _default_queue_lock:
+        if _default_queue is None:
+            _default_queue = JobQueue(
+                workers=int(os.getenv("EMAIL_JOB_WORKERS", "4")),
+                max_pending=int(os.getenv("EMAIL_JOB_MAX_PENDING", "32")),
+                max_finished=int(os.getenv("EMAIL_JOB_MAX_FINISHED", "256"))
+            )
+        return _default_queue
@@ -0,0 +1,267 @@
+"""
+LLM Client
+This module is the single entry point for LLM calls. It holds the model
+routing policy, per-task sampling settings and timeout, sizes max_tokens to
+each prompt, reuses pooled keep-alive HTTP connections, and applies caching,
+token budgets, rate limiting, retries and metrics.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from utils.budget import get_token_budget
+from utils.cache import SummaryCache, get_cache
+from utils.metrics import CallRecord
+from utils.rate_limit import acomplete_with_retries, complete_with_retries, request_tokens
+from utils.routing import ModelRouter
+from utils.tokens import completion_budget, count_tokens
+
+
+DEFAULT_MODEL = "gemini/gemini-pro"
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MAX_CONNECTIONS = 20
+KEEPALIVE_EXPIRY = 30.0
+
+# Sampling settings per task: (temperature, max_tokens); max_tokens is the
+# ceiling of the budget sized to each prompt (utils.tokens.completion_budget)
+TASK_SETTINGS = {
+    "summary": (0.3, 500),
+    "summary_hinted": (0.3, 350),
+    "review": (0.4, 600),
+    "summary_review": (0.3, 900),
+    # max_tokens of a full pack; packed requests ask for less when they hold fewer emails
+    "summary_packed": (0.3, 2000),
+    "summary_sections": (0.3, 350),
+    "review_sections": (0.4, 200)
+}
+
+
+class LLMClient:
+    """
+    Shared client for all LLM calls.
+    
+    completion and acompletion default to LiteLLM's (None) and can be set
+    (e.g. to the benchmarks' fake backend) to reroute every call at once.
+    """
+    
+    def __init__(self, model: Optional[str] = None, timeout: Optional[float] = None,
+                 api_base: Optional[str] = None, max_connections: Optional[int] = None):
+        """
+        Args:
+            model: LiteLLM model name (default EMAIL_LLM_MODEL or gemini/gemini-pro);
+                the strong tier of the model router
+            timeout: Seconds per request (default EMAIL_LLM_TIMEOUT or 60)
+            api_base: Override for the provider URL (default EMAIL_LLM_API_BASE)
+            max_connections: Size of the keep-alive connection pool
+                (default EMAIL_LLM_MAX_CONNECTIONS or 20)
+        
+        max_tokens is sized to each prompt unless EMAIL_ADAPTIVE_MAX_TOKENS=0.
+        """
+        self.model = model or os.getenv("EMAIL_LLM_MODEL", DEFAULT_MODEL)
+        self.timeout = timeout if timeout is not None else float(os.getenv("EMAIL_LLM_TIMEOUT", str(DEFAULT_TIMEOUT)))
+        self.api_base = api_base or os.getenv("EMAIL_LLM_API_BASE") or None
+        self.max_connections = max_connections or int(os.getenv("EMAIL_LLM_MAX_CONNECTIONS", str(DEFAULT_MAX_CONNECTIONS)))
+        self.adaptive_max_tokens = os.getenv("EMAIL_ADAPTIVE_MAX_TOKENS", "1") != "0"
+        self.router = ModelRouter(strong_model=self.model)
+        self.completion: Optional[Callable[..., Any]] = None
+        self.acompletion: Optional[Callable[..., Any]] = None
+        self._http_client: Any = None
+        self._async_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+    
+    @property
+    def api_key(self) -> Optional[str]:
+        # Read on every call so keys loaded by load_dotenv() after import are seen
+        return os.getenv("GEMINI_API_KEY")
+    
+    @property
+    def available(self) -> bool:
+        """Return True if an API key is configured."""
+        return bool(self.api_key)
+    
+    def settings(self, task: str) -> Tuple[float, int]:
+        """Return (temperature, max_tokens) for a task."""
+        return TASK_SETTINGS[task]
+    
+    def max_tokens(self, task: str, prompt_tokens: int, sections: Optional[int] = None) -> int:
+        """Return max_tokens for a prompt of a task: sized to the prompt, up to the task's setting."""
+        ceiling = self.settings(task)[1]
+        if not self.adaptive_max_tokens:
+            return ceiling
+        return completion_budget(task, prompt_tokens, ceiling, sections)
+    
+    def request(self, prompt: str, task: str, tier: Optional[str] = None, sections: Optional[int] = None,
+                **extra: Any) -> Dict[str, Any]:
+        """
+        Build the keyword arguments for a LiteLLM completion call on a model
+        tier (default: the current one); sections is the number of sections
+        the answer must contain when the task's default does not apply.
+        """
+        request = {
+            "model": self.router.model(tier),
+            "messages": [{"role": "user", "content": prompt}],
+            "api_key": self.api_key,
+            "temperature": self.settings(task)[0],
+            "max_tokens": self.max_tokens(task, count_tokens(prompt), sections),
+            "timeout": self.timeout
+        }
+        if self.api_base:
+            request["api_base"] = self.api_base
+        request.update(extra)
+        return request
+    
+    def complete(self, prompt: str, task: str, record: Optional[CallRecord] = None, sections: Optional[int] = None,
+                 **extra: Any) -> str:
+        """
+        Complete a prompt over a pooled connection.
+        
+        Args:
+            prompt: The full prompt text
+            task: Key into TASK_SETTINGS
+            record: Metrics record that receives usage, cost and retries
+            sections: Number of sections the answer must contain, for
+                sizing max_tokens when it varies (default: the task's)
+            **extra: Additional LiteLLM arguments (e.g. response_format)
+            
+        Returns:
+            The completion text
+            
+        Raises:
+            BudgetExceeded: Before sending, if the request does not fit the
+                per-request limit or the current user's token budget
+            The provider error once retries are exhausted
+        """
+        tier = self.router.current_tier()
+        completion, pool = self._completion(tier)
+        request = self.request(prompt, task, tier, sections, **pool, **extra)
+        with get_token_budget().reserve(request_tokens(request)) as reservation:
+            start = time.perf_counter()
+            response = complete_with_retries(completion, request, record)
+            reservation.used = self._record(tier, record, start, response)
+        return response.choices[0].message.content
+    
+    async def acomplete(self, prompt: str, task: str, record: Optional[CallRecord] = None, sections: Optional[int] = None,
+                        **extra: Any) -> str:
+        """Async variant of complete."""
+        tier = self.router.current_tier()
+        acompletion, pool = self._acompletion(tier)
+        request = self.request(prompt, task, tier, sections, **pool, **extra)
+        with get_token_budget().reserve(request_tokens(request)) as reservation:
+            start = time.perf_counter()
+            response = await acomplete_with_retries(acompletion, request, record)
+            reservation.used = self._record(tier, record, start, response)
+        return response.choices[0].message.content
+    
+    def stream(self, prompt: str, task: str, record: Optional[CallRecord] = None) -> Iterator[str]:
+        """
+        Stream a completion as text deltas.
+        
+        Usage is recorded once the stream finishes. Retries only cover
+        opening the stream; an error mid-stream is raised to the caller.
+        """
+        tier = self.router.current_tier()
+        completion, pool = self._completion(tier)
+        request = self.request(prompt, task, tier, stream=True, **pool)
+        with get_token_budget().reserve(request_tokens(request)) as reservation:
+            start = time.perf_counter()
+            response = complete_with_retries(completion, request, record)
+            chunks = []
+            for chunk in response:
+                text = chunk.choices[0].delta.content
+                if text:
+                    chunks.append(text)
+                    yield text
+            reservation.used = self._record(tier, record, start, prompt=prompt, completion="".join(chunks))
+    
+    def lookup(self, template: str, task: str, *texts: str) -> Tuple[Optional[SummaryCache], Optional[str], Optional[str]]:
+        """Serve repeat requests from the cache; returns (cache, key, cached value)."""
+        cache = get_cache()
+        if cache is None:
+            return None, None, None
+        cache_key = cache.make_key(template, self.router.model(), self.settings(task)[0], *texts)
+        return cache, cache_key, cache.get(cache_key)
+    
+    @staticmethod
+    def store(cache: Optional[SummaryCache], cache_key: Optional[str], text: str) -> str:
+        """Cache a freshly generated text and return it."""
+        if cache is not None and text:
+            cache.set(cache_key, text)
+        return text
+    
+    def _record(self, tier: str, record: Optional[CallRecord], start: float, response: Any = None, **texts: str) -> int:
+        """Record usage and cost on the metrics record and the tier's routing statistics; returns the tokens used."""
+        if record is None:
+            record = CallRecord("untracked")
+        record.record_usage(self.router.model(tier), response, **texts)
+        self.router.stats.call(tier, record, time.perf_counter() - start)
+        return record.prompt_tokens + record.completion_tokens
+    
+    def _completion(self, tier: str) -> Tuple[Callable[..., Any], Dict[str, Any]]:
+        """
+        Return the completion function and the extra request arguments it needs.
+        
+        LiteLLM calls get the pooled client and, when routing is enabled, go
+        through the LiteLLM Router addressed by tier name.
+        """
+        if self.completion is not None:
+            return self.completion, {}
+        pool = {"client": self._sync_http_client()}
+        if self.router.enabled:
+            return self.router.litellm_router().completion, {"model": tier, **pool}
+        from litellm import completion
+        return completion, pool
+    
+    def _acompletion(self, tier: str) -> Tuple[Callable[..., Any], Dict[str, Any]]:
+        """Async variant of _completion."""
+        if self.acompletion is not None:
+            return self.acompletion, {}
+        pool = {"client": self._async_http_client()}
+        if self.router.enabled:
+            return self.router.litellm_router().acompletion, {"model": tier, **pool}
+        from litellm import acompletion
+        return acompletion, pool
+    
+    def _sync_http_client(self) -> Any:
+        """Return the keep-alive connection pool shared by all threads."""
+        with self._lock:
+            if self._http_client is None:
+                import httpx
+                from litellm.llms.custom_httpx.http_handler import HTTPHandler
+                limits = httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=KEEPALIVE_EXPIRY
+                )
+                self._http_client = HTTPHandler(
+                    timeout=self.timeout,
+                    client=httpx.Client(limits=limits, timeout=self.timeout, follow_redirects=True)
+                )
+            return self._http_client
+    
+    def _async_http_client(self) -> Any:
+        """Return the connection pool for the running event loop (pools cannot cross loops)."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_http_clients.get(loop)
+            if client is None:
+                from litellm.llms.custom_httpx.http_handler import AsyncHTTPHandler
+                client = AsyncHTTPHandler(timeout=self.timeout)
+                self._async_http_clients[loop] = client
+            return client
+
+
+_default_client: Optional[LLMClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """Return the process-wide LLM client shared by all tools."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = LLMClient()
+        return _default_client
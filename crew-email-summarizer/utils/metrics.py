@@ -0,0 +1,300 @@
+"""
+Pipeline Metrics
+This module records wall time, token usage, estimated cost, cache hits and
+fallbacks for every pipeline stage, aggregates them into latency histograms
+and percentiles, and exposes them in Prometheus text format.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from utils.tokens import count_tokens
+
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILES = (0.5, 0.95, 0.99)
+SAMPLE_WINDOW = 2048
+METRIC_PREFIX = "email_summarizer"
+
+# USD per 1M (prompt, completion) tokens for models LiteLLM's price map lacks
+FALLBACK_PRICES = {
+    "gemini/gemini-pro": (0.50, 1.50)
+}
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimate the USD cost of a call from LiteLLM's price map (0.0 if unknown)."""
+    try:
+        from litellm import cost_per_token
+        prompt_cost, completion_cost = cost_per_token(
+            model=model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens
+        )
+        return prompt_cost + completion_cost
+    except Exception:
+        prompt_price, completion_price = FALLBACK_PRICES.get(model, (0.0, 0.0))
+        return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+
+
+class CallRecord:
+    """Mutable record of a single tracked call, filled in by the caller."""
+    
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.cache_hit = False
+        self.fallback = False
+        self.error = False
+        self.retries = 0
+        self.rate_limit_wait = 0.0
+        # Stages tracked inside this call that returned fallback output
+        self.fallback_stages: List[str] = []
+        # Usage of the LLM calls tracked inside this call
+        self.nested_prompt_tokens = 0
+        self.nested_completion_tokens = 0
+        self.nested_cost = 0.0
+    
+    @property
+    def total_prompt_tokens(self) -> int:
+        """Prompt tokens of this call and every call tracked inside it."""
+        return self.prompt_tokens + self.nested_prompt_tokens
+    
+    @property
+    def total_completion_tokens(self) -> int:
+        return self.completion_tokens + self.nested_completion_tokens
+    
+    @property
+    def total_cost(self) -> float:
+        return self.cost + self.nested_cost
+    
+    def record_usage(self, model: str, response: Any = None, prompt: str = "", completion: str = "") -> None:
+        """
+        Record token usage and cost for a completed LLM call.
+        
+        Uses response.usage when the provider reports it, otherwise counts the
+        prompt and completion text locally.
+        """
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+            self.completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        else:
+            self.prompt_tokens = count_tokens(prompt)
+            self.completion_tokens = count_tokens(completion)
+        self.cost = estimate_cost(model, self.prompt_tokens, self.completion_tokens)
+
+
+class StageStats:
+    """Aggregated metrics for one stage."""
+    
+    def __init__(self):
+        self.count = 0
+        self.latency_sum = 0.0
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self.samples: Deque[float] = deque(maxlen=SAMPLE_WINDOW)
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.cache_hits = 0
+        self.fallbacks = 0
+        self.errors = 0
+        self.retries = 0
+        self.rate_limit_wait = 0.0
+    
+    def add(self, seconds: float, record: CallRecord) -> None:
+        self.count += 1
+        self.latency_sum += seconds
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+        self.samples.append(seconds)
+        self.prompt_tokens += record.prompt_tokens
+        self.completion_tokens += record.completion_tokens
+        self.cost += record.cost
+        self.cache_hits += int(record.cache_hit)
+        self.fallbacks += int(record.fallback)
+        self.errors += int(record.error)
+        self.retries += record.retries
+        self.rate_limit_wait += record.rate_limit_wait
+    
+    def quantile(self, q: float) -> float:
+        """Nearest-rank quantile over the most recent SAMPLE_WINDOW latencies."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))]
+
+
+class MetricsRegistry:
+    """Thread-safe collection of per-stage metrics."""
+    
+    def __init__(self):
+        self._stages: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def track(self, stage: str) -> Iterator[CallRecord]:
+        """
+        Time the enclosed block and record it under stage.
+        
+        Fallbacks inside nested tracked calls are collected on the enclosing
+        call's fallback_stages, and their token usage and cost on its
+        nested_* totals, so a pipeline can report on all of its stages.
+        
+        Yields:
+            A CallRecord the caller fills in with usage, cache hits and fallbacks
+        """
+        record = CallRecord(stage)
+        parent = _current_call.get()
+        token = _current_call.set(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception:
+            record.error = True
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start, record)
+            try:
+                _current_call.reset(token)
+            except ValueError:
+                # A generator closed from another context (e.g. garbage collected)
+                pass
+            if parent is not None:
+                # Children may finish on several threads at once (e.g. the map phase)
+                with self._lock:
+                    parent.fallback_stages += ([stage] if record.fallback else []) + record.fallback_stages
+                    parent.nested_prompt_tokens += record.total_prompt_tokens
+                    parent.nested_completion_tokens += record.total_completion_tokens
+                    parent.nested_cost += record.total_cost
+    
+    def observe(self, stage: str, seconds: float, record: Optional[CallRecord] = None) -> None:
+        """Record a finished call directly."""
+        with self._lock:
+            self._stages.setdefault(stage, StageStats()).add(seconds, record or CallRecord(stage))
+    
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+    
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Return one summary row per stage, with latency percentiles in seconds."""
+        with self._lock:
+            rows = []
+            for stage, stats in sorted(self._stages.items()):
+                rows.append({
+                    "stage": stage,
+                    "calls": stats.count,
+                    "p50_s": stats.quantile(0.5),
+                    "p95_s": stats.quantile(0.95),
+                    "p99_s": stats.quantile(0.99),
+                    "mean_s": stats.latency_sum / stats.count if stats.count else 0.0,
+                    "prompt_tokens": stats.prompt_tokens,
+                    "completion_tokens": stats.completion_tokens,
+                    "cost_usd": stats.cost,
+                    "cache_hits": stats.cache_hits,
+                    "fallbacks": stats.fallbacks,
+                    "errors": stats.errors,
+                    "retries": stats.retries,
+                    "rate_limit_wait_s": stats.rate_limit_wait
+                })
+            return rows
+    
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        latency = f"{METRIC_PREFIX}_stage_latency_seconds"
+        lines = [
+            f"# HELP {latency} Wall time per pipeline stage.",
+            f"# TYPE {latency} histogram"
+        ]
+        with self._lock:
+            stages = sorted(self._stages.items())
+            for stage, stats in stages:
+                for bound, count in zip(LATENCY_BUCKETS, stats.bucket_counts):
+                    lines.append(f'{latency}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'{latency}_bucket{{stage="{stage}",le="+Inf"}} {stats.count}')
+                lines.append(f'{latency}_sum{{stage="{stage}"}} {stats.latency_sum}')
+                lines.append(f'{latency}_count{{stage="{stage}"}} {stats.count}')
+            
+            quantile = f"{METRIC_PREFIX}_stage_latency_quantile_seconds"
+            lines += [f"# HELP {quantile} Recent latency percentiles per stage.", f"# TYPE {quantile} gauge"]
+            for stage, stats in stages:
+                for q in QUANTILES:
+                    lines.append(f'{quantile}{{stage="{stage}",quantile="{q}"}} {stats.quantile(q)}')
+            
+            counters = (
+                ("tokens_total", "Tokens used per stage.", None),
+                ("cost_usd_total", "Estimated LLM cost in USD per stage.", "cost"),
+                ("cache_hits_total", "Cache hits per stage.", "cache_hits"),
+                ("fallbacks_total", "Fallback outputs returned per stage.", "fallbacks"),
+                ("errors_total", "Calls that raised per stage.", "errors"),
+                ("retries_total", "LLM call retries per stage.", "retries"),
+                ("rate_limit_wait_seconds_total", "Time spent waiting on the rate limiter per stage.", "rate_limit_wait")
+            )
+            for suffix, help_text, attribute in counters:
+                name = f"{METRIC_PREFIX}_stage_{suffix}"
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for stage, stats in stages:
+                    if attribute is None:
+                        lines.append(f'{name}{{stage="{stage}",type="prompt"}} {stats.prompt_tokens}')
+                        lines.append(f'{name}{{stage="{stage}",type="completion"}} {stats.completion_tokens}')
+                    else:
+                        lines.append(f'{name}{{stage="{stage}"}} {getattr(stats, attribute)}')
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+_current_call: ContextVar[Optional[CallRecord]] = ContextVar("current_call", default=None)
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Return the process-wide metrics registry."""
+    return _registry
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = get_metrics().to_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: Optional[int] = None, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """
+    Serve /metrics in Prometheus text format from a background thread.
+    
+    Safe to call repeatedly (e.g. on every Streamlit rerun): only the first
+    call starts a server. The port defaults to EMAIL_METRICS_PORT or 9464.
+    
+    Returns:
+        The running server, or None if the port could not be bound
+    """
+    global _server
+    with _server_lock:
+        if _server is None:
+            port = port if port is not None else int(os.getenv("EMAIL_METRICS_PORT", "9464"))
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                print(f"Metrics endpoint unavailable on port {port}: {str(e)}")
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server
@@ -0,0 +1,44 @@
+"""
+Request Packing
+This module groups short emails into packs that share one LLM request. Packs
+keep the emails in order, stay within a token budget and an email count, and
+wrap each email in a block tagged with its own ID so the per-email answers can
+be matched back to the emails.
+"""
+
+from typing import List, Sequence
+
+
+EMAIL_BLOCK = '<email id="{email_id}">\n{text}\n</email>'
+
+
+def pack_groups(token_counts: Sequence[int], max_tokens: int, max_items: int) -> List[List[int]]:
+    """
+    Split items, in order, into consecutive packs.
+    
+    Args:
+        token_counts: Token count of each item
+        max_tokens: Token budget of a pack; an item over the budget gets a
+            pack of its own
+        max_items: Maximum number of items in a pack
+        
+    Returns:
+        The item indexes of each pack
+    """
+    packs: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for index, tokens in enumerate(token_counts):
+        if current and (len(current) >= max_items or current_tokens + tokens > max_tokens):
+            packs.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        packs.append(current)
+    return packs
+
+
+def email_block(email_id: str, text: str) -> str:
+    """Wrap one email (and anything sent along with it) in a block tagged with its ID."""
+    return EMAIL_BLOCK.format(email_id=email_id, text=text.strip())
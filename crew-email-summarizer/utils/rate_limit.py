@@ -0,0 +1,219 @@
+"""
+Rate Limiting and Retries
+This module provides the process-wide token-bucket limiter on requests and
+tokens per minute that every LLM call goes through, and jittered
+exponential-backoff retries that only retry errors worth retrying.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.metrics import CallRecord
+from utils.tokens import count_tokens
+
+
+DEFAULT_RPM = 60
+DEFAULT_TPM = 120000
+
+# Rate limits, timeouts, conflicts and server errors are worth another try;
+# anything else (bad request, authentication, ...) fails the same way again
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504})
+RETRYABLE_EXCEPTIONS = (ConnectionError, TimeoutError)
+
+
+class TokenBucket:
+    """Token bucket that refills continuously up to its capacity."""
+    
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self, amount: float) -> float:
+        """
+        Take amount tokens from the bucket, going into debt if necessary.
+        
+        Callers that go into debt are queued fairly behind earlier ones
+        without holding a lock while they wait.
+        
+        Returns:
+            Seconds the caller must wait before using the reservation
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+            self._updated = now
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.refill_per_second
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits shared by all callers."""
+    
+    def __init__(self, requests_per_minute: int = DEFAULT_RPM, tokens_per_minute: int = DEFAULT_TPM):
+        """
+        Args:
+            requests_per_minute: Request limit (0 = unlimited)
+            tokens_per_minute: Prompt plus completion token limit (0 = unlimited)
+        """
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60) if tokens_per_minute > 0 else None
+    
+    def reserve(self, tokens: int) -> float:
+        """Reserve one request and tokens; returns the seconds to wait."""
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(tokens))
+        return wait
+    
+    def acquire(self, tokens: int) -> float:
+        """Block until one request of the given token size may be sent; returns the time waited."""
+        wait = self.reserve(tokens)
+        if wait:
+            time.sleep(wait)
+        return wait
+    
+    async def aacquire(self, tokens: int) -> float:
+        """Async variant of acquire that waits without blocking the event loop."""
+        wait = self.reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class RetryPolicy:
+    """Jittered exponential backoff for retryable LLM errors."""
+    
+    def __init__(self, max_retries: int = 3, base_delay: float = 1.0, max_delay: float = 30.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+    
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        """Return True for rate limits, timeouts and transient server errors."""
+        status_code = getattr(error, "status_code", None)
+        if isinstance(status_code, int):
+            return status_code in RETRYABLE_STATUS_CODES
+        return isinstance(error, RETRYABLE_EXCEPTIONS)
+    
+    def delay(self, attempt: int, error: Exception) -> float:
+        """
+        Seconds to wait before retry number attempt (starting at 0).
+        
+        Honours a Retry-After header when the provider sends one, otherwise
+        uses full jitter so that throttled callers do not retry in lockstep.
+        """
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        try:
+            retry_after = float(headers.get("retry-after", ""))
+            return min(retry_after, self.max_delay)
+        except (TypeError, ValueError):
+            return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+def request_tokens(request: Dict[str, Any]) -> int:
+    """Tokens a completion request can use: its prompt plus max_tokens."""
+    prompt = "\n".join(message["content"] for message in request["messages"])
+    return count_tokens(prompt) + request.get("max_tokens", 0)
+
+
+def complete_with_retries(completion: Callable[..., Any], request: Dict[str, Any], record: Optional[CallRecord] = None) -> Any:
+    """
+    Call completion(**request) under the shared rate limiter, retrying
+    retryable errors with backoff.
+    
+    Args:
+        completion: litellm.completion or a compatible callable
+        request: Keyword arguments for the call
+        record: Metrics record that receives retry counts and limiter waits
+        
+    Returns:
+        The completion response
+        
+    Raises:
+        The last error once retries are exhausted, or the first fatal error
+    """
+    limiter, policy = get_rate_limiter(), get_retry_policy()
+    tokens = request_tokens(request)
+    for attempt in range(policy.max_retries + 1):
+        waited = limiter.acquire(tokens)
+        if record is not None:
+            record.rate_limit_wait += waited
+        try:
+            return completion(**request)
+        except Exception as e:
+            if attempt == policy.max_retries or not policy.is_retryable(e):
+                raise
+            if record is not None:
+                record.retries += 1
+            time.sleep(policy.delay(attempt, e))
+
+
+async def acomplete_with_retries(acompletion: Callable[..., Awaitable[Any]], request: Dict[str, Any], record: Optional[CallRecord] = None) -> Any:
+    """Async variant of complete_with_retries for litellm.acompletion."""
+    limiter, policy = get_rate_limiter(), get_retry_policy()
+    tokens = request_tokens(request)
+    for attempt in range(policy.max_retries + 1):
+        waited = await limiter.aacquire(tokens)
+        if record is not None:
+            record.rate_limit_wait += waited
+        try:
+            return await acompletion(**request)
+        except Exception as e:
+            if attempt == policy.max_retries or not policy.is_retryable(e):
+                raise
+            if record is not None:
+                record.retries += 1
+            await asyncio.sleep(policy.delay(attempt, e))
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_policy: Optional[RetryPolicy] = None
+_defaults_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Return the process-wide rate limiter shared by all tools and threads.
+    
+    Configured through EMAIL_RATE_LIMIT_RPM and EMAIL_RATE_LIMIT_TPM
+    (0 = unlimited).
+    """
+    global _default_limiter
+    with _defaults_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter(
+                requests_per_minute=int(os.getenv("EMAIL_RATE_LIMIT_RPM", str(DEFAULT_RPM))),
+                tokens_per_minute=int(os.getenv("EMAIL_RATE_LIMIT_TPM", str(DEFAULT_TPM)))
+            )
+        return _default_limiter
+
+
+def get_retry_policy() -> RetryPolicy:
+    """
+    Return the process-wide retry policy.
+    
+    Configured through EMAIL_RETRY_MAX_RETRIES, EMAIL_RETRY_BASE_DELAY and
+    EMAIL_RETRY_MAX_DELAY (seconds).
+    """
+    global _default_policy
+    with _defaults_lock:
+        if _default_policy is None:
+            _default_policy = RetryPolicy(
+                max_retries=int(os.getenv("EMAIL_RETRY_MAX_RETRIES", "3")),
+                base_delay=float(os.getenv("EMAIL_RETRY_BASE_DELAY", "1.0")),
+                max_delay=float(os.getenv("EMAIL_RETRY_MAX_DELAY", "30.0"))
+            )
+        return _default_policy
@@ -0,0 +1,213 @@
+"""
+Delta Refinement
+This module supports refining a summary section by section: it splits a
+structured summary into its sections, pulls the actionable points out of a
+review, maps them to the sections they affect and selects the email excerpts
+those points refer to, so each refinement round only sends what changes.
+"""
+
+import re
+from typing import Dict, Iterable, List
+
+from utils.chunking import SENTENCE_END, split_paragraphs
+from utils.tokens import count_tokens
+
+
+SECTION_NAMES = ("MAIN TOPIC", "KEY POINTS", "ACTION ITEMS", "DECISIONS NEEDED", "IMPORTANT DATES", "TONE/URGENCY")
+REVIEW_HEADINGS = ("QUALITY SCORE", "ACCURACY CHECK", "COMPLETENESS", "CLARITY", "STRENGTHS", "IMPROVEMENTS", "SUGGESTED REVISIONS")
+ACTIONABLE_HEADINGS = ("IMPROVEMENTS", "SUGGESTED REVISIONS")
+
+# Name used when a summary has no recognizable sections
+WHOLE_SUMMARY = "SUMMARY"
+
+
+def _heading_pattern(names: Iterable[str]) -> re.Pattern:
+    # Tolerates "1." numbering, markdown bold/headers and trailing text after the colon
+    alternatives = "|".join(re.escape(name) for name in names)
+    return re.compile(
+        rf"^[ \t#*]*(?:\d+[.)]\s*)?\**\s*({alternatives})\s*\**\s*:\**[ \t]*(.*)$",
+        re.IGNORECASE | re.MULTILINE
+    )
+
+
+SECTION_HEADING = _heading_pattern(SECTION_NAMES)
+REVIEW_HEADING = _heading_pattern(REVIEW_HEADINGS)
+BULLET = re.compile(r"^\s*(?:[-*\u2022]|\d+[.)])\s+")
+
+# Keywords that tie a review point to the section it most likely concerns
+SECTION_KEYWORDS = {
+    "ACTION ITEMS": ("action", "owner", "task", "follow up", "follow-up", "responsib", "assign", "todo", "to-do"),
+    "IMPORTANT DATES": ("date", "deadline", "due", "when", "schedule", "time", "day"),
+    "DECISIONS NEEDED": ("decision", "decide", "approv", "choose", "sign-off", "sign off"),
+    "TONE/URGENCY": ("tone", "urgen", "priority", "sentiment"),
+    "MAIN TOPIC": ("topic", "subject", "headline", "title")
+}
+
+STOPWORDS = frozenset(
+    "the and that this with from have will should would could about into more less also there their "
+    "they them what when which while where summary section sections email include including mention "
+    "missing add make clear clearer better".split()
+)
+
+
+def split_sections(summary: str) -> Dict[str, str]:
+    """
+    Split a structured summary into its sections.
+    
+    Args:
+        summary: A summary using the MAIN TOPIC / KEY POINTS / ... layout
+        
+    Returns:
+        Section name -> raw section text (heading included), in order. Text
+        before the first heading is kept under "". A summary without any
+        known heading is returned whole under WHOLE_SUMMARY.
+    """
+    matches = list(SECTION_HEADING.finditer(summary))
+    if not matches:
+        return {WHOLE_SUMMARY: summary}
+    
+    sections: Dict[str, str] = {}
+    if summary[:matches[0].start()].strip():
+        sections[""] = summary[:matches[0].start()]
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(summary)
+        name = match.group(1).upper()
+        # A repeated heading is folded into the first occurrence
+        sections[name] = sections.get(name, "") + summary[match.start():end]
+    return sections
+
+
+def join_sections(sections: Dict[str, str]) -> str:
+    """Reassemble sections produced by split_sections, keeping their original spacing."""
+    joined = ""
+    for text in sections.values():
+        if joined and not joined.endswith("\n"):
+            joined += "\n"
+        joined += text
+    return joined.strip()
+
+
+def apply_revision(sections: Dict[str, str], targets: List[str], revision: str) -> Dict[str, str]:
+    """
+    Replace the target sections with their revised text.
+    
+    Args:
+        sections: The current sections
+        targets: The sections that were sent for revision
+        revision: The model's reply containing the revised sections
+        
+    Returns:
+        A new section mapping; sections the reply does not contain are kept
+    """
+    updated = dict(sections)
+    revised = split_sections(revision)
+    if WHOLE_SUMMARY in revised:
+        # No headings in the reply: only usable when a single section was revised
+        if len(targets) == 1 and revision.strip():
+            name = targets[0]
+            updated[name] = revision if name == WHOLE_SUMMARY else f"{name}:\n{revision.strip()}"
+        return updated
+    for name in targets:
+        if name in revised and revised[name].strip():
+            updated[name] = revised[name]
+    return updated
+
+
+def actionable_points(review: str, limit: int = 6) -> List[str]:
+    """
+    Extract the actionable points of a review.
+    
+    Bullets (or lines, when there are no bullets) under IMPROVEMENTS and
+    SUGGESTED REVISIONS are returned, minus duplicates; "NONE" (or an empty section) means nothing is left to fix.
+    
+    Args:
+        review: Review text from the feedback tool
+        limit: Maximum number of points to return
+        
+    Returns:
+        The points, without bullet markers
+    """
+    points: List[str] = []
+    matches = list(REVIEW_HEADING.finditer(review))
+    for i, match in enumerate(matches):
+        if match.group(1).upper() not in ACTIONABLE_HEADINGS:
+            continue
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(review)
+        lines = review[match.end():end].splitlines()
+        # When the section uses bullets, closing prose lines are not points
+        if any(BULLET.match(line) for line in lines):
+            lines = [line for line in lines if BULLET.match(line)]
+        for line in [match.group(2)] + lines:
+            point = BULLET.sub("", line).strip().strip("*").strip()
+            if not point or point.rstrip(".").upper() in ("NONE", "N/A", "NOTHING"):
+                continue
+            if point.lower() not in (p.lower() for p in points):
+                points.append(point)
+    return points[:limit]
+
+
+def affected_sections(points: List[str], sections: Dict[str, str]) -> List[str]:
+    """
+    Map review points to the summary sections they concern.
+    
+    Args:
+        points: Actionable review points
+        sections: The current summary sections
+        
+    Returns:
+        The affected section names, in summary order (KEY POINTS when a
+        point matches no more specific section)
+    """
+    if WHOLE_SUMMARY in sections:
+        return [WHOLE_SUMMARY]
+    
+    wanted = set()
+    for point in points:
+        lowered = point.lower()
+        named = [name for name in SECTION_NAMES if name.lower() in lowered]
+        matched = named or [name for name, words in SECTION_KEYWORDS.items() if any(w in lowered for w in words)]
+        wanted.update(matched or ["KEY POINTS"])
+    
+    affected = [name for name in sections if name in wanted]
+    # A point can refer to a section the summary left out; revise KEY POINTS instead
+    if not affected:
+        affected = [name for name in sections if name == "KEY POINTS"] or [name for name in sections if name]
+    return affected
+
+
+def _terms(text: str) -> set:
+    return {w for w in re.findall(r"[a-z0-9][a-z0-9'-]{2,}", text.lower()) if w not in STOPWORDS}
+
+
+def select_excerpts(email: str, query: str, max_tokens: int = 400) -> str:
+    """
+    Select the sentences of an email that are most relevant to a query.
+    
+    Args:
+        email: The (compacted) email text
+        query: Review points and section text the excerpts should support
+        max_tokens: Token budget for the excerpts
+        
+    Returns:
+        The best-matching sentences in their original order, or the whole
+        email when it already fits the budget
+    """
+    if count_tokens(email) <= max_tokens:
+        return email
+    
+    sentences = [s.strip() for p in split_paragraphs(email) for s in SENTENCE_END.split(p) if s.strip()]
+    wanted = _terms(query)
+    scored = sorted(
+        range(len(sentences)),
+        key=lambda i: (-len(_terms(sentences[i]) & wanted), i)
+    )
+    
+    chosen: List[int] = []
+    used = 0
+    for i in scored:
+        cost = count_tokens(sentences[i])
+        if used + cost > max_tokens:
+            continue
+        chosen.append(i)
+        used += cost
+    return "\n".join(sentences[i] for i in sorted(chosen))
@@ -0,0 +1,253 @@
+"""
+Model Routing
+This module sends short, simple emails to a fast, cheap model and long or
+complex ones to a stronger model, escalates to the stronger model when a
+review scores below a threshold, and keeps per-tier routing statistics.
+Calls are dispatched through a LiteLLM Router with one model group per tier.
+"""
+
+import os
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from utils.metrics import CallRecord
+from utils.tokens import count_tokens
+
+
+FAST = "fast"
+STRONG = "strong"
+TIERS = (FAST, STRONG)
+
+DEFAULT_FAST_MODEL = "gemini/gemini-2.5-flash-lite"
+DEFAULT_MAX_FAST_TOKENS = 1200
+DEFAULT_COMPLEXITY_THRESHOLD = 6
+DEFAULT_ESCALATE_BELOW = 6
+
+# Signals that an email needs a stronger model; each counts at most MAX_SIGNAL_HITS times
+COMPLEXITY_SIGNALS = {
+    "deadlines": re.compile(r"\b(deadline|due (by|on)|no later than|eod|asap|by (mon|tues|wednes|thurs|fri|satur|sun)day)\b", re.IGNORECASE),
+    "decisions": re.compile(r"\b(decide|decision|approv(e|al)|sign[- ]off|vote)\b", re.IGNORECASE),
+    "legal": re.compile(r"\b(contract|agreement|clause|liabilit(y|ies)|indemn\w*|compliance|warrant(y|ies)|terminat\w*)\b", re.IGNORECASE),
+    "figures": re.compile(r"[$\u20ac\u00a3]\s?\d|\b\d+(\.\d+)?\s?(%|percent|k|m|million)\b", re.IGNORECASE),
+    "questions": re.compile(r"\?(\s|$)"),
+    "messages": re.compile(r"^(On .{1,200} wrote:|From:\s.+)$", re.IGNORECASE | re.MULTILINE)
+}
+MAX_SIGNAL_HITS = 3
+
+QUALITY_SCORE = re.compile(r"QUALITY SCORE\W*?(\d+(\.\d+)?)", re.IGNORECASE)
+
+_current_tier: ContextVar[Optional[str]] = ContextVar("current_tier", default=None)
+
+
+class RoutingStats:
+    """Thread-safe counters of routing decisions and per-tier usage."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self) -> None:
+        with self._lock:
+            self.decisions: Dict[str, int] = {}
+            self.escalations = 0
+            self.tiers = {
+                tier: {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0, "latency_s": 0.0}
+                for tier in TIERS
+            }
+    
+    def decide(self, tier: str, reason: str) -> None:
+        with self._lock:
+            key = f"{tier}:{reason}"
+            self.decisions[key] = self.decisions.get(key, 0) + 1
+    
+    def escalate(self) -> None:
+        with self._lock:
+            self.escalations += 1
+    
+    def call(self, tier: str, record: Optional[CallRecord], seconds: float) -> None:
+        with self._lock:
+            stats = self.tiers[tier]
+            stats["calls"] += 1
+            stats["latency_s"] += seconds
+            if record is not None:
+                stats["prompt_tokens"] += record.prompt_tokens
+                stats["completion_tokens"] += record.completion_tokens
+                stats["cost_usd"] += record.cost
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Return decisions by tier and reason, escalations, and calls, tokens, cost and latency per tier."""
+        with self._lock:
+            return {
+                "decisions": dict(self.decisions),
+                "escalations": self.escalations,
+                "tiers": {tier: dict(stats) for tier, stats in self.tiers.items()}
+            }
+
+
+class ModelRouter:
+    """
+    Routing policy and LiteLLM Router for the fast and strong model tiers.
+    
+    The tier is chosen once per email by route() and applies to every LLM
+    call made inside the block, including nested tool calls; calls outside
+    any route() block use the strong tier.
+    """
+    
+    def __init__(self, strong_model: str, fast_model: Optional[str] = None, enabled: Optional[bool] = None,
+                 max_fast_tokens: Optional[int] = None, complexity_threshold: Optional[int] = None,
+                 escalate_below: Optional[float] = None):
+        """
+        Args:
+            strong_model: LiteLLM model for long or complex emails
+                (EMAIL_ROUTE_STRONG_MODEL overrides it)
+            fast_model: LiteLLM model for short, simple emails
+                (default EMAIL_ROUTE_FAST_MODEL or gemini/gemini-2.5-flash-lite)
+            enabled: Route by size and complexity (default: EMAIL_ROUTING != "0");
+                when disabled every call uses the strong model
+            max_fast_tokens: Largest email the fast tier takes
+                (default EMAIL_ROUTE_MAX_FAST_TOKENS or 1200)
+            complexity_threshold: Complexity score from which the strong tier
+                is used (default EMAIL_ROUTE_COMPLEXITY or 6)
+            escalate_below: Review score under which a fast-tier result is
+                redone on the strong tier (default EMAIL_ROUTE_ESCALATE_BELOW
+                or 6; 0 disables escalation)
+        """
+        self.models = {
+            FAST: fast_model or os.getenv("EMAIL_ROUTE_FAST_MODEL", DEFAULT_FAST_MODEL),
+            STRONG: os.getenv("EMAIL_ROUTE_STRONG_MODEL") or strong_model
+        }
+        self.enabled = enabled if enabled is not None else os.getenv("EMAIL_ROUTING", "1") != "0"
+        self.max_fast_tokens = max_fast_tokens or int(os.getenv("EMAIL_ROUTE_MAX_FAST_TOKENS", str(DEFAULT_MAX_FAST_TOKENS)))
+        self.complexity_threshold = complexity_threshold or int(
+            os.getenv("EMAIL_ROUTE_COMPLEXITY", str(DEFAULT_COMPLEXITY_THRESHOLD))
+        )
+        self.escalate_below = escalate_below if escalate_below is not None else float(
+            os.getenv("EMAIL_ROUTE_ESCALATE_BELOW", str(DEFAULT_ESCALATE_BELOW))
+        )
+        self.stats = RoutingStats()
+        self._router: Any = None
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def complexity(text: str) -> int:
+        """Score how demanding an email is to summarize (0 to 3 per signal)."""
+        return sum(min(len(pattern.findall(text)), MAX_SIGNAL_HITS) for pattern in COMPLEXITY_SIGNALS.values())
+    
+    def choose(self, text: str) -> Tuple[str, str]:
+        """
+        Pick the tier for an email.
+        
+        Returns:
+            (tier, reason), where reason is "disabled", "long", "complex" or "simple"
+        """
+        if not self.enabled:
+            return STRONG, "disabled"
+        if count_tokens(text) > self.max_fast_tokens:
+            return STRONG, "long"
+        if self.complexity(text) >= self.complexity_threshold:
+            return STRONG, "complex"
+        return FAST, "simple"
+    
+    @contextmanager
+    def route(self, text: str) -> Iterator[str]:
+        """
+        Route the LLM calls in the enclosed block by the email they are about.
+        
+        Inside an enclosing route() or escalated() block the outer tier is kept,
+        so a pipeline decides once for all of its tool calls.
+        
+        Args:
+            text: The email the calls are about
+            
+        Yields:
+            The tier in effect
+        """
+        current = _current_tier.get()
+        if current is not None:
+            yield current
+            return
+        tier, reason = self.choose(text)
+        self.stats.decide(tier, reason)
+        with self._tier(tier):
+            yield tier
+    
+    @contextmanager
+    def pinned(self, tier: str) -> Iterator[str]:
+        """
+        Run the enclosed block on a tier chosen beforehand, without counting a
+        routing decision (e.g. one packed request for emails already sorted by tier).
+        """
+        with self._tier(tier):
+            yield tier
+    
+    @contextmanager
+    def escalated(self) -> Iterator[str]:
+        """Run the enclosed block on the strong tier and count it as an escalation."""
+        self.stats.escalate()
+        with self._tier(STRONG):
+            yield STRONG
+    
+    @staticmethod
+    @contextmanager
+    def _tier(tier: str) -> Iterator[None]:
+        token = _current_tier.set(tier)
+        try:
+            yield
+        finally:
+            try:
+                _current_tier.reset(token)
+            except ValueError:
+                # A streaming generator closed from another context
+                pass
+    
+    @staticmethod
+    def current_tier() -> str:
+        """Return the tier of the enclosing route() block (strong outside any)."""
+        return _current_tier.get() or STRONG
+    
+    def model(self, tier: Optional[str] = None) -> str:
+        """Return the LiteLLM model of a tier (default: the current one)."""
+        return self.models[tier or self.current_tier()]
+    
+    @staticmethod
+    def review_score(review: str) -> Optional[float]:
+        """Parse the QUALITY SCORE of a review, if it has one."""
+        match = QUALITY_SCORE.search(review or "")
+        return float(match.group(1)) if match else None
+    
+    def should_escalate(self, tier: str, review: str) -> bool:
+        """Return True if a fast-tier result reviewed this poorly should be redone on the strong tier."""
+        if tier != FAST or not self.escalate_below or self.models[FAST] == self.models[STRONG]:
+            return False
+        score = self.review_score(review)
+        return score is not None and score < self.escalate_below
+    
+    def litellm_router(self) -> Any:
+        """
+        Return the LiteLLM Router with one model group per tier.
+        
+        Retries stay with the client's retry policy (num_retries=0); a fast
+        tier that fails outright falls back to the strong tier.
+        """
+        with self._lock:
+            if self._router is None:
+                from litellm import Router
+                self._router = Router(
+                    model_list=[
+                        {"model_name": tier, "litellm_params": {"model": model}}
+                        for tier, model in self.models.items()
+                    ],
+                    fallbacks=[{FAST: [STRONG]}],
+                    num_retries=0,
+                    disable_cooldowns=True
+                )
+            return self._router
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the routing statistics together with the tier models."""
+        snapshot = self.stats.snapshot()
+        snapshot["models"] = dict(self.models)
+        return snapshot
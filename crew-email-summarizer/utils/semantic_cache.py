@@ -0,0 +1,387 @@
+"""
+Semantic Cache
+This module reuses the results of near-identical emails: templated alerts,
+newsletters and CI notifications that differ only in IDs, numbers and
+timestamps. Emails are embedded with a local model and indexed in a
+persistent, bounded ChromaDB collection; a new email within the similarity
+threshold of a stored one gets the stored summary and review back, with the
+IDs, numbers and dates of the new email substituted in.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Any, Callable, Collection, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from utils.cache import normalize_text
+
+
+DEFAULT_INDEX_PATH = os.path.join(".cache", "semantic_index")
+DEFAULT_THRESHOLD = 0.93
+# Stored emails above the threshold that are tried, most similar first
+CANDIDATES = 3
+# Non-volatile words that may differ between two copies of a template
+MAX_CHANGED_WORDS = 4
+# Hits whose access times are buffered before they are written to the index
+ACCESS_FLUSH_SIZE = 64
+HASHING_DIMENSIONS = 1024
+EMBEDDERS = ("minilm", "hashing")
+
+# Values that change between copies of a template: URLs, addresses, anything
+# with a digit (IDs, counts, times, dates, versions) and day and month names
+VOLATILE = re.compile(
+    r"https?://\S+|[\w.+-]+@[\w-]+\.[\w.-]+"
+    r"|(?<![\w])[#$€£]?[\w./:-]*\d[\w./:-]*(?<![.:/-])"
+    r"|\b(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+    r"|january|february|march|april|june|july|august|september|october|november|december)\b",
+    re.IGNORECASE
+)
+# The reviewer's own score is never a value taken from the email
+SCORE_LINE = re.compile(r"^.*QUALITY SCORE.*$", re.IGNORECASE | re.MULTILINE)
+PLACEHOLDER = "<v>"
+WORD = re.compile(r"<v>|[a-z][a-z'-]*")
+TOKEN = re.compile(VOLATILE.pattern + r"|[^\W\d][\w'-]*", re.IGNORECASE)
+
+
+@dataclass
+class SemanticHit:
+    """A stored result reused for a near-identical email."""
+    
+    summary: str
+    review: str
+    similarity: float
+    adapted: bool
+    # The model that produced the stored result
+    model: str
+
+
+def skeleton(text: str) -> str:
+    """Return the email with its volatile values replaced by a placeholder."""
+    return VOLATILE.sub(PLACEHOLDER, normalize_text(text)).lower()
+
+
+class HashingEmbedder:
+    """
+    Embed text by feature hashing word unigrams and bigrams.
+    
+    Needs no model download, runs in well under a millisecond per email and
+    is ideal for templated email, where copies share almost every word.
+    """
+    
+    def __init__(self, dimensions: int = HASHING_DIMENSIONS):
+        self.dimensions = dimensions
+    
+    def __call__(self, texts: Sequence[str]) -> List[List[float]]:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = WORD.findall(text)
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                digest = zlib.crc32(feature.encode("utf-8"))
+                # The top bit picks the sign so that collisions cancel out on average
+                vectors[row, digest % self.dimensions] += 1.0 if digest & 0x80000000 else -1.0
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0).tolist()
+
+
+def _minilm_embedder() -> Callable[[Sequence[str]], List[List[float]]]:
+    """ChromaDB's bundled all-MiniLM-L6-v2 (ONNX, CPU); downloaded once, then local."""
+    from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+    
+    model = ONNXMiniLM_L6_V2()
+    model(["warm up"])
+    return lambda texts: [list(map(float, vector)) for vector in model(list(texts))]
+
+
+@dataclass
+class TemplateDiff:
+    """How a new email differs from a stored copy of the same template."""
+    
+    replaced: Dict[str, str]
+    # Old phrases the reused text must not mention
+    removed: List[str]
+    
+    def apply(self, text: str, keep: Optional["re.Pattern[str]"] = None) -> Optional[str]:
+        """
+        Carry a stored summary or review over to the new email.
+        
+        Every replaced phrase the text mentions is swapped for its new
+        counterpart. Changed values (IDs, numbers, dates) the text does not
+        mention do not matter, but a changed word it does not mention might
+        have been paraphrased, so the text is not reused.
+        
+        Args:
+            text: The stored summary or review
+            keep: Parts of text to leave as they are, e.g. a review's score line
+            
+        Returns:
+            The adapted text, or None if it cannot be carried over safely
+        """
+        if keep is not None:
+            adapted = [self.apply(part) for part in keep.split(text)]
+            if any(part is None for part in adapted):
+                return None
+            kept = keep.findall(text) + [""]
+            return "".join(part + kept[i] for i, part in enumerate(adapted))
+        
+        if any(_mentions(text, phrase) for phrase in self.removed):
+            return None
+        changed = {}
+        for old, new in self.replaced.items():
+            if _mentions(text, old):
+                changed[old] = new
+            elif not VOLATILE.fullmatch(old):
+                return None
+        if not changed:
+            return text
+        pattern = re.compile(
+            r"(?<![\w])(" + "|".join(_phrase_pattern(old) for old in sorted(changed, key=len, reverse=True)) + r")(?![\w])"
+        )
+        lookup = {" ".join(old.split()): new for old, new in changed.items()}
+        return pattern.sub(lambda match: lookup[" ".join(match.group(0).split())], text)
+
+
+def template_diff(old_email: str, new_email: str, max_changed_words: int = MAX_CHANGED_WORDS) -> Optional[TemplateDiff]:
+    """
+    Compare two emails token by token.
+    
+    Args:
+        old_email: The stored email
+        new_email: The new email
+        max_changed_words: Most non-volatile words that may differ
+        
+    Returns:
+        The replacements and removed values, or None if the emails differ
+        by more than replaced phrases: added or dropped words, too many
+        changed words, or one phrase replaced by two different ones
+    """
+    old_tokens = [match.group(0) for match in TOKEN.finditer(normalize_text(old_email))]
+    new_tokens = [match.group(0) for match in TOKEN.finditer(normalize_text(new_email))]
+    replaced: Dict[str, str] = {}
+    removed: List[str] = []
+    unchanged = set()
+    changed_words = 0
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old_tokens, new_tokens, autojunk=False).get_opcodes():
+        if tag == "equal":
+            unchanged.update(old_tokens[i1:i2])
+            continue
+        old_part, new_part = old_tokens[i1:i2], new_tokens[j1:j2]
+        words = [token for token in old_part + new_part if not VOLATILE.fullmatch(token)]
+        # Words that appear or disappear can change the meaning ("not")
+        if words and tag != "replace":
+            return None
+        changed_words += len(words)
+        if changed_words > max_changed_words:
+            return None
+        if tag == "delete":
+            removed.extend(old_part)
+        elif tag == "replace":
+            old, new = " ".join(old_part), " ".join(new_part)
+            if replaced.setdefault(old, new) != new:
+                return None
+    
+    # A value that changed in one place and not in another ("Monday" in the
+    # subject, "by Monday" becoming "by Friday") cannot be mapped in the result
+    for old in [old for old in replaced if old in unchanged]:
+        removed.append(old)
+        del replaced[old]
+    return TemplateDiff(replaced=replaced, removed=removed)
+
+
+def _phrase_pattern(phrase: str) -> str:
+    return r"\s+".join(re.escape(word) for word in phrase.split())
+
+
+def _mentions(text: str, phrase: str) -> bool:
+    return re.search(r"(?<![\w])" + _phrase_pattern(phrase) + r"(?![\w])", text) is not None
+
+
+class SemanticCache:
+    """Bounded, persistent index of processed emails for near-duplicate reuse."""
+    
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_INDEX_PATH,
+        threshold: float = DEFAULT_THRESHOLD,
+        max_entries: int = 5000,
+        embedder: str = "minilm"
+    ):
+        """
+        Args:
+            path: Directory of the persistent ChromaDB index, or None for memory only
+            threshold: Minimum cosine similarity between an email and a stored
+                one for the stored result to be reused
+            max_entries: Maximum number of stored emails; the least recently
+                used are evicted
+            embedder: "minilm" (ChromaDB's local all-MiniLM-L6-v2) or
+                "hashing" (feature hashing, no model download). If MiniLM
+                cannot be loaded, hashing is used
+        """
+        if embedder not in EMBEDDERS:
+            raise ValueError(f"embedder must be one of {EMBEDDERS}, got {embedder!r}")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        
+        self.embedder_name = embedder
+        self._embed: Callable[[Sequence[str]], List[List[float]]]
+        if embedder == "minilm":
+            try:
+                self._embed = _minilm_embedder()
+            except Exception as e:
+                print(f"Error loading the MiniLM embedding model, using hashing embeddings: {str(e)}")
+                self.embedder_name = "hashing"
+        if self.embedder_name == "hashing":
+            self._embed = HashingEmbedder()
+        
+        # Imported here: chromadb takes about a second to import
+        import chromadb
+        
+        self._client = chromadb.PersistentClient(path=path) if path else chromadb.EphemeralClient()
+        # Vectors of different embedders are not comparable, so each gets its own collection
+        self._collection = self._client.get_or_create_collection(
+            f"emails_{self.embedder_name}", embedding_function=None, metadata={"hnsw:space": "cosine"}
+        )
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "adapted": 0, "rejected": 0, "writes": 0, "evictions": 0}
+        self._accessed: Dict[str, Dict[str, Any]] = {}
+    
+    def lookup(self, email_content: str, models: Collection[str]) -> Optional[SemanticHit]:
+        """
+        Return the stored result of the most similar email, adapted to this one.
+        
+        Args:
+            email_content: The email text as it would be prompted
+            models: The models whose results may be reused
+            
+        Returns:
+            The reusable result, or None
+        """
+        embedding = self._embed([skeleton(email_content)])[0]
+        with self._lock:
+            count = self._collection.count()
+            # Filtering on the model after the query is about twice as fast as a where clause
+            found = self._collection.query(
+                query_embeddings=[embedding], n_results=min(CANDIDATES, count),
+                include=["documents", "metadatas", "distances"]
+            ) if count else {"ids": [[]]}
+            
+            candidates = 0
+            for i, entry_id in enumerate(found["ids"][0]):
+                similarity = 1.0 - found["distances"][0][i]
+                if similarity < self.threshold:
+                    break
+                model = found["metadatas"][0][i]["model"]
+                if model not in models:
+                    continue
+                candidates += 1
+                stored = json.loads(found["documents"][0][i])
+                diff = template_diff(stored["email"], email_content)
+                if diff is None:
+                    continue
+                summary = diff.apply(stored["summary"])
+                review = diff.apply(stored["review"], keep=SCORE_LINE)
+                if summary is None or review is None:
+                    continue
+                
+                self._touch(entry_id, found["metadatas"][0][i])
+                adapted = summary != stored["summary"] or review != stored["review"]
+                self._stats["hits"] += 1
+                self._stats["adapted"] += adapted
+                return SemanticHit(summary=summary, review=review, similarity=similarity, adapted=adapted, model=model)
+            
+            # Similar emails whose results cannot be carried over safely
+            if candidates:
+                self._stats["rejected"] += 1
+            self._stats["misses"] += 1
+            return None
+    
+    def _touch(self, entry_id: str, metadata: Dict[str, Any]) -> None:
+        """Record a hit; access times are written back in batches, since every index write costs milliseconds."""
+        self._accessed[entry_id] = dict(metadata, accessed_at=time.time())
+        if len(self._accessed) >= ACCESS_FLUSH_SIZE:
+            self._flush_accessed()
+    
+    def _flush_accessed(self) -> None:
+        if self._accessed:
+            existing = set(self._collection.get(ids=list(self._accessed), include=[])["ids"])
+            pending = [(entry_id, metadata) for entry_id, metadata in self._accessed.items() if entry_id in existing]
+            if pending:
+                self._collection.update(ids=[e for e, _ in pending], metadatas=[m for _, m in pending])
+            self._accessed.clear()
+    
+    def add(self, email_content: str, model: str, summary: str, review: str) -> None:
+        """Store the result of an email produced by model, evicting the least recently used entries if needed."""
+        embedding = self._embed([skeleton(email_content)])[0]
+        key = hashlib.sha256((model + "\x00" + normalize_text(email_content)).encode("utf-8")).hexdigest()
+        document = json.dumps({"email": normalize_text(email_content), "summary": summary, "review": review})
+        now = time.time()
+        with self._lock:
+            self._accessed.pop(key, None)
+            self._collection.upsert(
+                ids=[key], embeddings=[embedding], documents=[document],
+                metadatas=[{"model": model, "created_at": now, "accessed_at": now}]
+            )
+            self._stats["writes"] += 1
+            
+            overflow = self._collection.count() - self.max_entries
+            if overflow > 0:
+                self._flush_accessed()
+                # Evict a tenth of the index at a time so eviction scans stay rare
+                batch = max(overflow, self.max_entries // 10)
+                entries = self._collection.get(include=["metadatas"])
+                oldest = sorted(zip(entries["metadatas"], entries["ids"]), key=lambda entry: entry[0]["accessed_at"])
+                self._collection.delete(ids=[entry_id for _, entry_id in oldest[:batch]])
+                self._stats["evictions"] += min(batch, len(oldest))
+    
+    def clear(self) -> None:
+        """Remove every stored email."""
+        with self._lock:
+            self._accessed.clear()
+            # Recreating the collection also drops the deleted vectors from the HNSW index
+            name, metadata = self._collection.name, self._collection.metadata
+            self._client.delete_collection(name)
+            self._collection = self._client.create_collection(name, embedding_function=None, metadata=metadata)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters, the hit rate and the index size."""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["entries"] = self._collection.count()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["embedder"] = self.embedder_name
+        return stats
+
+
+_default_semantic_cache: Optional[SemanticCache] = None
+_default_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """
+    Return the process-wide semantic cache, or None unless EMAIL_SEMANTIC_CACHE=1.
+    
+    Configured through EMAIL_SEMANTIC_PATH (empty = memory only),
+    EMAIL_SEMANTIC_THRESHOLD, EMAIL_SEMANTIC_MAX_ENTRIES and
+    EMAIL_SEMANTIC_EMBEDDER ("minilm" or "hashing").
+    """
+    global _default_semantic_cache
+    if os.getenv("EMAIL_SEMANTIC_CACHE", "").lower() not in ("1", "true", "yes"):
+        return None
+    with _default_semantic_cache_lock:
+        if _default_semantic_cache is None:
+            _default_semantic_cache = SemanticCache(
+                path=os.getenv("EMAIL_SEMANTIC_PATH", DEFAULT_INDEX_PATH) or None,
+                threshold=float(os.getenv("EMAIL_SEMANTIC_THRESHOLD", str(DEFAULT_THRESHOLD))),
+                max_entries=int(os.getenv("EMAIL_SEMANTIC_MAX_ENTRIES", "5000")),
+                embedder=os.getenv("EMAIL_SEMANTIC_EMBEDDER", "minilm")
+            )
+        return _default_semantic_cache
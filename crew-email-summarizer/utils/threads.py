@@ -0,0 +1,162 @@
+"""
+Thread Store
+This module groups emails into threads by Message-ID, In-Reply-To and
+References and keeps a rolling summary per thread in SQLite, so a new reply
+only needs the previous thread summary and the new message.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+from utils.ingestion import ParsedEmail
+
+
+DEFAULT_THREAD_PATH = os.path.join(".cache", "threads.sqlite3")
+
+
+@dataclass
+class ThreadState:
+    """The rolling summary of one thread."""
+    
+    thread_id: str
+    subject: str = ""
+    summary: str = ""
+    message_count: int = 0
+    last_message_id: str = ""
+    updated_at: float = 0.0
+
+
+class ThreadStore:
+    """SQLite-backed mapping of messages to threads and threads to rolling summaries."""
+    
+    def __init__(self, path: Optional[str] = DEFAULT_THREAD_PATH):
+        """
+        Args:
+            path: SQLite file, or None to keep threads in memory only
+        """
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS threads (
+                thread_id TEXT PRIMARY KEY,
+                subject TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                message_count INTEGER NOT NULL,
+                last_message_id TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS thread_messages (
+                message_id TEXT PRIMARY KEY,
+                thread_id TEXT NOT NULL,
+                added_at REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_thread_messages_thread ON thread_messages (thread_id)")
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._thread_locks: Dict[str, threading.Lock] = {}
+    
+    @staticmethod
+    def message_key(message: ParsedEmail) -> str:
+        """The Message-ID, or a digest of the body for messages without one."""
+        if message.message_id:
+            return message.message_id
+        return "sha256:" + hashlib.sha256(message.body.encode("utf-8")).hexdigest()
+    
+    def resolve(self, message: ParsedEmail) -> str:
+        """
+        Return the thread a message belongs to.
+        
+        The nearest known ancestor (In-Reply-To, then References from last to
+        first) decides. A message with no known ancestor starts a thread
+        named after its thread root (the first Reference) so that later
+        siblings join it.
+        """
+        ancestors = [message.in_reply_to] + list(reversed(message.references))
+        with self._lock:
+            row = self._db.execute(
+                "SELECT thread_id FROM thread_messages WHERE message_id = ?", (self.message_key(message),)
+            ).fetchone()
+            if row is not None:
+                return row[0]
+            for ancestor in filter(None, ancestors):
+                row = self._db.execute(
+                    "SELECT thread_id FROM thread_messages WHERE message_id = ?", (ancestor,)
+                ).fetchone()
+                if row is not None:
+                    return row[0]
+        if message.references:
+            return message.references[0]
+        return message.in_reply_to or self.message_key(message)
+    
+    def contains(self, message: ParsedEmail) -> bool:
+        """Return True if the message is already part of a thread summary."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM thread_messages WHERE message_id = ?", (self.message_key(message),)
+            ).fetchone()
+        return row is not None
+    
+    def get(self, thread_id: str) -> Optional[ThreadState]:
+        """Return the state of a thread, or None if it has no summary yet."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT thread_id, subject, summary, message_count, last_message_id, updated_at "
+                "FROM threads WHERE thread_id = ?", (thread_id,)
+            ).fetchone()
+        return ThreadState(*row) if row is not None else None
+    
+    def record(self, thread_id: str, message: ParsedEmail, summary: str) -> ThreadState:
+        """Add a message to a thread and replace the thread's rolling summary."""
+        now = time.time()
+        message_key = self.message_key(message)
+        with self._lock:
+            self._db.execute(
+                """INSERT INTO threads (thread_id, subject, summary, message_count, last_message_id, updated_at)
+                VALUES (?, ?, ?, 1, ?, ?)
+                ON CONFLICT(thread_id) DO UPDATE SET
+                    summary = excluded.summary,
+                    message_count = message_count + 1,
+                    last_message_id = excluded.last_message_id,
+                    updated_at = excluded.updated_at""",
+                (thread_id, message.subject, summary, message_key, now)
+            )
+            self._db.execute(
+                "INSERT OR IGNORE INTO thread_messages (message_id, thread_id, added_at) VALUES (?, ?, ?)",
+                (message_key, thread_id, now)
+            )
+            self._db.commit()
+        return self.get(thread_id)
+    
+    @contextmanager
+    def locked(self, thread_id: str) -> Iterator[None]:
+        """Serialize updates to one thread; different threads proceed in parallel."""
+        with self._lock:
+            lock = self._thread_locks.setdefault(thread_id, threading.Lock())
+        with lock:
+            yield
+
+
+_default_store: Optional[ThreadStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_thread_store() -> ThreadStore:
+    """Return the process-wide thread store (EMAIL_THREAD_DB, empty for memory only)."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ThreadStore(os.getenv("EMAIL_THREAD_DB", DEFAULT_THREAD_PATH) or None)
+        return _default_store
@@ -0,0 +1,121 @@
+"""
+Token Counting
+This module counts prompt tokens with a Hugging Face tokenizer that is loaded
+once per process, falling back to a character-based estimate when no
+tokenizer is configured or available. Neither matches Gemini's own
+tokenizer, so counts are approximate and only meant for budgeting. It also
+sizes the completion budget (max_tokens) of a request from its prompt.
+"""
+
+import os
+import threading
+from typing import Any, Optional
+
+from utils.digest_cache import digest_cache
+
+
+CHARS_PER_TOKEN = 4
+
+# Shape of the answer per task: (sections it must contain, tokens per section,
+# extra tokens per prompt token); longer inputs get room for more detail
+COMPLETION_SHAPES = {
+    "summary": (6, 40, 0.1),
+    "summary_hinted": (6, 30, 0.08),
+    "review": (7, 55, 0.05),
+    "summary_review": (9, 40, 0.1),
+    "summary_sections": (1, 70, 0.1),
+    "review_sections": (1, 60, 0.05)
+}
+MIN_COMPLETION_TOKENS = 64
+
+# Recent tokenizer counts
+COUNT_CACHE_SIZE = 512
+
+_tokenizer: Any = None
+_tokenizer_loaded = False
+_tokenizer_lock = threading.Lock()
+
+
+def get_tokenizer() -> Optional[Any]:
+    """
+    Return the shared tokenizer, loading it on first use.
+    
+    EMAIL_TOKENIZER_PATH points at a local tokenizer.json. Downloading one
+    is opt-in: EMAIL_TOKENIZER names a Hugging Face Hub tokenizer (e.g.
+    gpt2), which needs network access the first time. With neither set,
+    token counts use the character estimate.
+    
+    Returns:
+        A tokenizers.Tokenizer, or None if none could be loaded
+    """
+    global _tokenizer, _tokenizer_loaded
+    if _tokenizer_loaded:
+        return _tokenizer
+    
+    with _tokenizer_lock:
+        if not _tokenizer_loaded:
+            name = os.getenv("EMAIL_TOKENIZER", "")
+            path = os.getenv("EMAIL_TOKENIZER_PATH")
+            try:
+                from tokenizers import Tokenizer
+                if path:
+                    _tokenizer = Tokenizer.from_file(path)
+                elif name and name.lower() != "none":
+                    _tokenizer = Tokenizer.from_pretrained(name)
+            except Exception as e:
+                print(f"Tokenizer unavailable, estimating token counts: {str(e)}")
+                _tokenizer = None
+            _tokenizer_loaded = True
+    return _tokenizer
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens in text.
+    
+    Tokenizer counts of recent texts are cached under a digest of the text,
+    since the same email is measured by several stages (routing, map-reduce
+    and packing checks, budgets).
+    
+    Args:
+        text: The text to measure
+        
+    Returns:
+        Token count from the shared tokenizer, or an estimate of
+        len(text) / CHARS_PER_TOKEN when no tokenizer is loaded
+    """
+    if not text:
+        return 0
+    if get_tokenizer() is None:
+        # The estimate is cheaper than a cache lookup
+        return max(1, len(text) // CHARS_PER_TOKEN)
+    return _tokenizer_count(text)
+
+
+@digest_cache(COUNT_CACHE_SIZE)
+def _tokenizer_count(text: str) -> int:
+    return len(get_tokenizer().encode(text, add_special_tokens=False).ids)
+
+
+def completion_budget(task: str, prompt_tokens: int, ceiling: int, sections: Optional[int] = None) -> int:
+    """
+    Pick max_tokens for a request from the size of its prompt and the
+    sections its answer must contain.
+    
+    Args:
+        task: LLM client task (see COMPLETION_SHAPES)
+        prompt_tokens: Tokens in the prompt
+        ceiling: The task's fixed max_tokens, which is never exceeded
+        sections: Number of sections the answer must contain, when it
+            varies (e.g. the sections being revised); default: the task's
+            
+    Returns:
+        A budget between MIN_COMPLETION_TOKENS and ceiling; the ceiling
+        itself for tasks without a known shape
+    """
+    shape = COMPLETION_SHAPES.get(task)
+    if shape is None:
+        return ceiling
+    default_sections, per_section, per_prompt_token = shape
+    budget = (sections or default_sections) * per_section + int(per_prompt_token * prompt_tokens)
+    return max(min(MIN_COMPLETION_TOKENS, ceiling), min(ceiling, budget))
\ No newline at end of file